@@ -4,3 +4,8 @@ from django.apps import AppConfig
 class CoreConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'core'
+
+    def ready(self):
+        from django.db.backends.signals import connection_created
+        from .metrics import install_query_hook
+        connection_created.connect(install_query_hook, dispatch_uid='core.metrics.install_query_hook')
@@ -0,0 +1,223 @@
+"""
+Async-версии представлений только для чтения для деплоя под ASGI
+(uvicorn / gunicorn -k uvicorn.workers.UvicornWorker).
+
+Пока запрос ждёт БД, воркер обслуживает другие соединения, поэтому
+медленные клиенты не занимают процесс целиком. Формат ответов тот же,
+что у синхронных DRF-представлений в core.views: строки из RowSerializer,
+курсорная пагинация, orjson, ETag, пользователь из claims.
+Какие представления подключены, решает settings.ASYNC_READ_VIEWS (core.urls).
+
+Под ASGI каждый запрос ходит в БД из своего потока со своим соединением,
+поэтому одновременная работа с БД ограничена settings.ASYNC_DB_CONCURRENCY
+на процесс: остальные запросы ждут в event loop, а не в max_connections Postgres.
+"""
+import asyncio
+import weakref
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db.models import Count, Max
+from django.http import HttpResponse, StreamingHttpResponse
+from django.views import View
+from rest_framework import exceptions
+from rest_framework.request import Request
+from rest_framework_simplejwt.models import TokenUser
+
+from .authentication import ClaimsJWTAuthentication
+from .events import event_stream, get_broker
+from .metrics import serialize_timer
+from .conditional import Validators
+from .models import Category
+from .pagination import KeysetPagination
+from .renderers import dumps
+from .serializers import (
+    CategorySerializer, OrderFilterSerializer, OrderRowSerializer, ReviewRowSerializer, StatsBreakdownSerializer
+)
+from .services import OrderService, ReviewService, StatsService
+
+
+_db_slots = weakref.WeakKeyDictionary()
+
+
+def db_slots():
+    """Семафор на event loop: asyncio-примитивы нельзя делить между циклами."""
+    loop = asyncio.get_running_loop()
+    if loop not in _db_slots:
+        _db_slots[loop] = asyncio.Semaphore(settings.ASYNC_DB_CONCURRENCY)
+    return _db_slots[loop]
+
+
+class JSONResponse(HttpResponse):
+    def __init__(self, data, **kwargs):
+        kwargs.setdefault('content_type', 'application/json')
+        with serialize_timer():
+            content = dumps(data)
+        super().__init__(content, **kwargs)
+
+
+class AsyncReadView(View):
+    """
+    Базовое async-представление: аутентификация по JWT, условный GET
+    по get_version() и ошибки DRF в том же JSON-формате, что и у
+    синхронных представлений.
+    """
+    http_method_names = ['get', 'head', 'options']
+    authentication = ClaimsJWTAuthentication()
+    login_required = False
+
+    async def get(self, request, *args, **kwargs):
+        try:
+            request.user = await self.authenticate(request)
+            async with db_slots():
+                version = await self.get_version(request)
+                validators = Validators(version, request.get_full_path(), request.user.pk, 'json')
+                response = validators.not_modified(request)
+                if response is None:
+                    response = validators.apply(JSONResponse(await self.get_data(request)))
+            return response
+        except exceptions.APIException as exc:
+            return self.handle_exception(exc)
+
+    async def authenticate(self, request):
+        result = await self.authentication.aauthenticate(request)
+        if result is None:
+            if self.login_required:
+                raise exceptions.NotAuthenticated()
+            return _AnonymousUser()
+        return result[0]
+
+    async def get_version(self, request):
+        raise NotImplementedError
+
+    async def get_data(self, request):
+        raise NotImplementedError
+
+    @staticmethod
+    def handle_exception(exc):
+        data = exc.detail if isinstance(exc.detail, (list, dict)) else {'detail': exc.detail}
+        response = JSONResponse(data, status=exc.status_code)
+        if isinstance(exc, (exceptions.NotAuthenticated, exceptions.AuthenticationFailed)):
+            response['WWW-Authenticate'] = 'Bearer realm="api"'
+        return response
+
+
+class _AnonymousUser:
+    pk = None
+    is_authenticated = False
+
+
+class AsyncRowListView(AsyncReadView):
+    """Список через RowSerializer с курсорной пагинацией (как RowListMixin)."""
+    row_serializer_class = None
+    version_field = 'updated_at'
+
+    async def get(self, request, *args, **kwargs):
+        if request.GET.get('stream') == '1':
+            # ?stream=1 (RowListMixin.stream) читает серверным курсором, у него нет async-API
+            return self.handle_exception(exceptions.ValidationError(
+                {'stream': ['Streaming is not supported by this endpoint.']}
+            ))
+        return await super().get(request, *args, **kwargs)
+
+    def get_queryset(self, request):
+        raise NotImplementedError
+
+    async def get_version(self, request):
+        return await self.get_queryset(request).order_by().aaggregate(
+            count=Count('pk'), last_modified=Max(self.version_field)
+        )
+
+    async def get_data(self, request):
+        queryset = self.row_serializer_class.project(self.get_queryset(request))
+        paginator = KeysetPagination()
+        page = await paginator.apaginate_queryset(queryset, Request(request), view=self)
+        return paginator.get_paginated_data(self.row_serializer_class.serialize(page))
+
+
+class AsyncOrderListView(AsyncRowListView):
+    row_serializer_class = OrderRowSerializer
+
+    def get_queryset(self, request):
+        filters = OrderFilterSerializer(data=request.GET)
+        filters.is_valid(raise_exception=True)
+        return OrderService.get_filtered_orders(filters.validated_data)
+
+    async def get_version(self, request):
+        return await sync_to_async(OrderService.get_orders_version)()
+
+    async def get_data(self, request):
+        data = await super().get_data(request)
+        if not request.GET.get('cursor'):
+            # фасеты — один сырой SQL через cursor(), у него нет async-API
+            data['facets'] = await sync_to_async(OrderService.get_order_facets)(self.get_queryset(request))
+        return data
+
+
+class AsyncCategoryListView(AsyncReadView):
+
+    async def get_version(self, request):
+        return await Category.objects.aaggregate(count=Count('pk'), last_modified=Max('updated_at'))
+
+    async def get_data(self, request):
+        # та же курсорная пагинация по умолчанию, что у CategoryAPIView
+        paginator = KeysetPagination()
+        page = await paginator.apaginate_queryset(Category.objects.all(), Request(request), view=self)
+        return paginator.get_paginated_data(CategorySerializer(page, many=True).data)
+
+
+class AsyncJobStatsView(AsyncReadView):
+
+    async def get(self, request, *args, **kwargs):
+        if any(key in request.GET for key in ('by',) + StatsBreakdownSerializer.DIMENSIONS):
+            params = StatsBreakdownSerializer(data=request.GET)
+            if not params.is_valid():
+                return self.handle_exception(exceptions.ValidationError(params.errors))
+            async with db_slots():
+                return JSONResponse(await sync_to_async(StatsService.get_breakdown)(**params.validated_data))
+        # кэш в памяти процесса (SingleFlightCache); в БД идём только при промахе
+        async with db_slots():
+            return JSONResponse(await sync_to_async(StatsService.get_job_stats)())
+
+
+class AsyncReviewListView(AsyncRowListView):
+    row_serializer_class = ReviewRowSerializer
+    login_required = True
+    # отзывы не редактируются
+    version_field = 'created_at'
+
+    def get_queryset(self, request):
+        return ReviewService.get_user_reviews(
+            request.user, request.GET.get('order'), request.GET.get('user')
+        )
+
+
+class EventStreamView(AsyncReadView):
+    """
+    SSE-поток событий текущего пользователя (core.events): новые заявки
+    для работодателя, accept/reject и смена статуса заказа для воркера.
+    EventSource не умеет ставить заголовки, поэтому токен можно передать
+    в ?token=. Событие resync значит, что часть событий потеряна и списки
+    надо перечитать.
+    """
+    login_required = True
+
+    async def get(self, request, *args, **kwargs):
+        try:
+            user = await self.authenticate(request)
+        except exceptions.APIException as exc:
+            return self.handle_exception(exc)
+
+        subscription = get_broker().subscribe(user.pk)
+        response = StreamingHttpResponse(event_stream(subscription), content_type='text/event-stream')
+        response['Cache-Control'] = 'no-cache'
+        # nginx не должен буферизовать поток
+        response['X-Accel-Buffering'] = 'no'
+        return response
+
+    async def authenticate(self, request):
+        token = request.GET.get('token')
+        if token:
+            # для подписки нужен только id пользователя из токена
+            return TokenUser(self.authentication.get_validated_token(token.encode()))
+        return await super().authenticate(request)
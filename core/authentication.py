@@ -0,0 +1,93 @@
+from asgiref.sync import sync_to_async
+from django.core.exceptions import ObjectDoesNotExist
+from django.utils.functional import cached_property
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.models import TokenUser
+
+
+class ClaimsProfile:
+    """Лёгкая замена Profile: только то, что нужно правам и сервисам."""
+
+    def __init__(self, pk, user_id, role):
+        self.pk = self.id = pk
+        self.user_id = user_id
+        self.role = role
+
+
+class ClaimsUser(TokenUser):
+    """Пользователь, собранный из claims access-токена, без обращения к БД."""
+
+    @cached_property
+    def profile(self):
+        if self.token.get('profile_id') is None:
+            return None
+        return ClaimsProfile(self.token['profile_id'], self.pk, self.token.get('role'))
+
+
+class ClaimsJWTAuthentication(JWTAuthentication):
+    """
+    Для GET/HEAD/OPTIONS пользователь и профиль берутся из claims токена
+    (см. WorkifyTokenObtainPairSerializer), так что чтение стоит ноль
+    запросов на аутентификацию. Изменяющие запросы по-прежнему загружают
+    User из БД: там нужны актуальный объект и проверка is_active.
+    Смена роли попадает в claims при следующем выпуске токена.
+
+    Подзапросы пакета (core.batch) несут пользователя пакетного запроса
+    в атрибуте batch_auth: клиент его задать не может, токен уже проверен.
+    """
+
+    def authenticate(self, request):
+        batch_auth = getattr(request, 'batch_auth', None)
+        if batch_auth is not None:
+            return batch_auth
+        if request.method not in SAFE_METHODS:
+            return super().authenticate(request)
+
+        header = self.get_header(request)
+        if header is None:
+            return None
+
+        raw_token = self.get_raw_token(header)
+        if raw_token is None:
+            return None
+
+        validated_token = self.get_validated_token(raw_token)
+        if 'role' not in validated_token:
+            # токены, выпущенные до появления claims с ролью
+            return self.get_user(validated_token), validated_token
+
+        return ClaimsUser(validated_token), validated_token
+
+    async def aauthenticate(self, request):
+        """
+        Версия для async-представлений (core.async_views), только для чтения:
+        принимает Django HttpRequest, в event loop не ходит в БД, если
+        в токене есть claims.
+        """
+        batch_auth = getattr(request, 'batch_auth', None)
+        if batch_auth is not None:
+            return batch_auth
+        header = self.get_header(request)
+        if header is None:
+            return None
+
+        raw_token = self.get_raw_token(header)
+        if raw_token is None:
+            return None
+
+        validated_token = self.get_validated_token(raw_token)
+        if 'role' not in validated_token:
+            user = await sync_to_async(self._load_user)(validated_token)
+            return user, validated_token
+
+        return ClaimsUser(validated_token), validated_token
+
+    def _load_user(self, validated_token):
+        user = self.get_user(validated_token)
+        # профиль нужен сервисам; в async-коде ленивый запрос за ним запрещён
+        try:
+            user.profile
+        except ObjectDoesNotExist:
+            pass
+        return user
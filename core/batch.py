@@ -0,0 +1,171 @@
+"""
+Пакетные запросы (/api/v1/batch/): несколько вызовов API за один round trip.
+
+Подзапросы выполняются в процессе: путь разрешается по core.urls и view
+вызывается напрямую, без HTTP и без middleware. Метрики (core.metrics)
+пишутся на каждый подзапрос под именем его URL, как у MetricsMiddleware.
+Пользователь берётся из пакетного запроса и передаётся подзапросам
+атрибутом batch_auth, который читает ClaimsJWTAuthentication, поэтому токен
+разбирается один раз. Исключение в подзапросе даёт в конверте элемент
+со статусом 500, остальные подзапросы выполняются как обычно. Пакет из одних GET
+с parallel=true выполняется в общем пуле из BATCH_MAX_WORKERS потоков;
+соединения потоков пула живут по тем же правилам CONN_MAX_AGE, что и у
+обычных запросов. Иначе подзапросы идут по порядку, и запись видна
+следующим за ней чтениям.
+
+Ответ — {"responses": [{"id", "status", "headers", "body"}, ...]} в порядке
+запроса. Тела подзапросов уже сериализованы рендерером и вставляются
+в конверт как есть, без повторного разбора JSON.
+"""
+import contextvars
+import io
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import orjson
+from asgiref.sync import async_to_sync, iscoroutinefunction
+from django.conf import settings
+from django.db import close_old_connections
+from django.http import HttpRequest, QueryDict
+from django.urls import Resolver404, resolve
+
+from . import db_router, metrics
+
+logger = logging.getLogger(__name__)
+
+URLCONF = 'core.urls'
+# потоковые ответы, сам batch и метрики в пакет не берём
+EXCLUDED_URL_NAMES = frozenset({'batch', 'events', 'export', 'metrics'})
+# заголовки подзапроса, которые клиент может задать сам
+FORWARDED_HEADERS = {
+    'if-none-match': 'HTTP_IF_NONE_MATCH',
+}
+# заголовки ответа подзапроса, которые попадают в конверт
+RESPONSE_HEADERS = ('ETag', 'Location')
+
+
+def build_request(request, user, auth, item):
+    """HttpRequest подзапроса: META пакетного запроса, свои метод, путь и тело."""
+    path, _, query = item['path'].partition('?')
+    body = orjson.dumps(item['body']) if item.get('body') is not None else b''
+    meta = {
+        key: value for key, value in request.META.items()
+        if not key.startswith('HTTP_IF_') and key not in ('CONTENT_TYPE', 'CONTENT_LENGTH')
+    }
+    meta.update({
+        'REQUEST_METHOD': item['method'],
+        'PATH_INFO': path,
+        'QUERY_STRING': query,
+        'CONTENT_TYPE': 'application/json',
+        'CONTENT_LENGTH': str(len(body)),
+        'HTTP_ACCEPT': 'application/json',
+    })
+    for name, value in item.get('headers', {}).items():
+        if name.lower() in FORWARDED_HEADERS:
+            meta[FORWARDED_HEADERS[name.lower()]] = value
+
+    sub = HttpRequest()
+    sub.method = item['method']
+    sub.path = sub.path_info = path
+    sub.META = meta
+    sub.GET = QueryDict(query)
+    sub.content_type = 'application/json'
+    sub.content_params = {}
+    sub._stream = io.BytesIO(body)
+    sub._read_started = False
+    if user is not None and user.is_authenticated:
+        # ClaimsJWTAuthentication возьмёт пользователя отсюда, не разбирая токен заново
+        sub.batch_auth = (user, auth)
+    return sub
+
+
+def run_one(request, user, auth, item):
+    """(status, headers, тело JSON в байтах) одного подзапроса; метрики — как у MetricsMiddleware."""
+    started = time.perf_counter()
+    stats, token = metrics.start_request()
+    path = item['path'].partition('?')[0]
+    view_name = 'unmatched'
+    try:
+        match = resolve(path, urlconf=URLCONF)
+        view_name = match.url_name or view_name
+        if match.url_name in EXCLUDED_URL_NAMES:
+            status, headers, content = 400, {}, orjson.dumps({'detail': f'{path} cannot be used in a batch'})
+        else:
+            status, headers, content = call_view(request, user, auth, item, match)
+    except Resolver404:
+        status, headers, content = 404, {}, orjson.dumps({'detail': 'Not found.'})
+    except Exception:
+        logger.exception('Batch sub-request %s %s failed', item['method'], item['path'])
+        status, headers, content = 500, {}, orjson.dumps({'detail': 'A server error occurred.'})
+    finally:
+        metrics.end_request(token)
+    metrics.observe(view_name, item['method'], status, time.perf_counter() - started, stats, len(content))
+    return status, headers, content
+
+
+def call_view(request, user, auth, item, match):
+    sub = build_request(request, user, auth, item)
+    sub.resolver_match = match
+    view = match.func
+    if iscoroutinefunction(view):
+        response = async_to_sync(view)(sub, *match.args, **match.kwargs)
+    else:
+        response = view(sub, *match.args, **match.kwargs)
+    if hasattr(response, 'render'):
+        response.render()
+
+    headers = {name: response[name] for name in RESPONSE_HEADERS if response.has_header(name)}
+    content = response.content
+    if not content:
+        content = b'null'
+    elif not response.get('Content-Type', '').startswith('application/json'):
+        content = orjson.dumps(content.decode(response.charset or 'utf-8'))
+    return response.status_code, headers, content
+
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(settings.BATCH_MAX_WORKERS, thread_name_prefix='batch')
+        return _executor
+
+
+def _run_pooled(request, user, auth, item):
+    # как обработчик запроса Django: соединение потока живёт CONN_MAX_AGE
+    close_old_connections()
+    try:
+        return run_one(request, user, auth, item)
+    finally:
+        close_old_connections()
+
+
+def run_batch(request, user, auth, items, parallel=False):
+    if parallel and len(items) > 1 and all(item['method'] == 'GET' for item in items):
+        # только чтения: можно на реплику, и порядок между ними не важен
+        db_router.mark_read_only()
+        context = contextvars.copy_context()
+        futures = [
+            get_executor().submit(context.copy().run, _run_pooled, request, user, auth, item)
+            for item in items
+        ]
+        results = [future.result() for future in futures]
+    else:
+        results = [run_one(request, user, auth, item) for item in items]
+    return encode(items, results)
+
+
+def encode(items, results):
+    parts = []
+    for item, (status, headers, content) in zip(items, results):
+        parts.append(
+            b'{"id":' + orjson.dumps(item.get('id')) + b',"status":' + str(status).encode()
+            + b',"headers":' + orjson.dumps(headers) + b',"body":' + content + b'}'
+        )
+    return b'{"responses":[' + b','.join(parts) + b']}'
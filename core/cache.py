@@ -0,0 +1,55 @@
+import threading
+import time
+
+
+class SingleFlightCache:
+    """
+    Значение в памяти процесса с TTL и защитой от stampede.
+
+    Пересчитывает значение только один поток: остальные при устаревшем
+    значении сразу получают старое, а при пустом кэше ждут первый пересчёт,
+    вместо того чтобы дружно идти в БД. TTL ограничивает рассинхрон между
+    воркерами gunicorn, invalidate() сбрасывает значение в текущем процессе.
+    """
+
+    def __init__(self, loader, ttl):
+        self._loader = loader
+        self._ttl = ttl
+        self._lock = threading.Lock()
+        self._value = None
+        self._expires_at = 0.0
+        self._generation = 0
+
+    def get(self):
+        value = self._value
+        if value is not None and time.monotonic() < self._expires_at:
+            return value
+
+        if value is not None:
+            if not self._lock.acquire(blocking=False):
+                # кто-то уже пересчитывает — отдаём устаревшее значение
+                return value
+        else:
+            self._lock.acquire()
+
+        try:
+            if self._value is not None and time.monotonic() < self._expires_at:
+                return self._value
+
+            generation = self._generation
+            value = self._loader()
+            # если во время пересчёта пришла инвалидация, результат мог устареть
+            if generation == self._generation:
+                self._value = value
+                self._expires_at = time.monotonic() + self._ttl
+            return value
+        finally:
+            self._lock.release()
+
+    def invalidate(self):
+        self._generation += 1
+        self._expires_at = 0.0
+
+    def clear(self):
+        self.invalidate()
+        self._value = None
@@ -0,0 +1,34 @@
+import hashlib
+
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import quote_etag
+
+
+class Validators:
+    """
+    ETag для версии ресурса (время последнего изменения и число строк).
+    parts — всё, от чего ещё зависит тело ответа при той же версии данных:
+    query string, пользователь, формат.
+
+    Last-Modified не отдаём: он с точностью до секунды и не видит удалений,
+    не сдвигающих MAX(updated_at), а If-Modified-Since Django проверяет
+    только без If-None-Match — такие клиенты получали бы устаревший 304.
+    """
+
+    def __init__(self, version, *parts):
+        key = repr((sorted(version.items()), parts))
+        self.etag = quote_etag(hashlib.sha1(key.encode()).hexdigest())
+
+    def not_modified(self, request):
+        """304/412 по If-None-Match / If-Match или None."""
+        response = get_conditional_response(request, etag=self.etag)
+        if response is not None:
+            self.apply(response)
+        return response
+
+    def apply(self, response):
+        if response.status_code not in (200, 304):
+            return response
+        response['ETag'] = self.etag
+        patch_vary_headers(response, ('Accept', 'Authorization'))
+        return response
@@ -0,0 +1,156 @@
+"""
+Чтение с реплик (settings.DATABASE_REPLICAS) с read-your-writes.
+
+ReplicaRoutingMiddleware открывает на запрос маршрут в contextvar, и
+ReplicaRouter отправляет на реплику только ORM-чтения безопасных запросов
+(GET/HEAD/OPTIONS): списки, статистику, версии для ETag. Всё остальное идёт
+в default — записи, чтения внутри transaction.atomic, чтения после записи
+в этом же запросе, а также всё вне запроса (команды, фоновые потоки).
+Сырой SQL через django.db.connection всегда выполняется на default.
+
+После изменяющего запроса пользователь на REPLICA_STICKY_SECONDS читает
+с default, чтобы увидеть свою запись, даже если реплика отстаёт. Метка —
+строка PrimaryReadPin с id пользователя из токена и временем until на
+default: её видят все процессы и хосты, и клиенту ничего хранить не надо
+(JWT-клиенты, мобильные приложения, SPA с другого origin).
+"""
+import random
+from contextvars import ContextVar
+from datetime import timedelta
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.utils import timezone
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+_route = ContextVar('workify_db_route', default=None)
+
+
+def is_pinned(user_id):
+    """Писал ли пользователь не раньше REPLICA_STICKY_SECONDS назад."""
+    from .models import PrimaryReadPin
+    return PrimaryReadPin.objects.using(DEFAULT_DB_ALIAS).filter(
+        user_id=user_id, until__gt=timezone.now()
+    ).exists()
+
+
+def stick_to_primary(user_id):
+    from .models import PrimaryReadPin
+    with connections[DEFAULT_DB_ALIAS].cursor() as cursor:
+        cursor.execute(
+            f'''
+            INSERT INTO {PrimaryReadPin._meta.db_table} (user_id, until) VALUES (%s, %s)
+            ON CONFLICT (user_id) DO UPDATE SET until = EXCLUDED.until
+            ''',
+            [user_id, timezone.now() + timedelta(seconds=settings.REPLICA_STICKY_SECONDS)],
+        )
+
+
+class Route:
+    """Маршрут одного запроса: реплика выбирается один раз на запрос."""
+
+    def __init__(self, request, replica, safe):
+        self.request = request
+        self.replica = replica
+        self.safe = safe
+        self.wrote = False
+        self._pinned = None
+
+    def read_alias(self):
+        if self.replica is None or self.wrote or connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return DEFAULT_DB_ALIAS
+        if self._pinned is None:
+            # пользователь известен только после аутентификации во view
+            user = getattr(self.request, 'user', None)
+            if user is None or not user.is_authenticated:
+                return self.replica
+            self._pinned = is_pinned(user.pk)
+        return DEFAULT_DB_ALIAS if self._pinned else self.replica
+
+
+def mark_read_only():
+    """
+    Текущий запрос только читает, хотя пришёл не GET (например, POST
+    с пакетом GET-подзапросов, core.batch): чтения уходят на реплику,
+    метка после запроса не ставится.
+    """
+    route = _route.get()
+    if route is None or route.wrote or not settings.DATABASE_REPLICAS:
+        return
+    route.safe = True
+    if route.replica is None:
+        route.replica = random.choice(settings.DATABASE_REPLICAS)
+
+
+class ReplicaRouter:
+
+    def db_for_read(self, model, **hints):
+        route = _route.get()
+        return route.read_alias() if route is not None else DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        route = _route.get()
+        if route is not None:
+            route.wrote = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # реплики — копии default, объекты с них можно связывать
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == DEFAULT_DB_ALIAS
+
+
+class ReplicaRoutingMiddleware:
+    """Открывает маршрут запроса и ставит метку после изменяющих запросов."""
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        route, token = self._start(request)
+        try:
+            response = self.get_response(request)
+        finally:
+            _route.reset(token)
+        user_id = self._writer(request, route)
+        if user_id is not None:
+            stick_to_primary(user_id)
+        return response
+
+    async def __acall__(self, request):
+        route, token = self._start(request)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _route.reset(token)
+        user_id = self._writer(request, route)
+        if user_id is not None:
+            await sync_to_async(stick_to_primary)(user_id)
+        return response
+
+    @staticmethod
+    def _start(request):
+        safe = request.method in SAFE_METHODS
+        replicas = settings.DATABASE_REPLICAS
+        route = Route(request, random.choice(replicas) if replicas and safe else None, safe)
+        return route, _route.set(route)
+
+    @staticmethod
+    def _writer(request, route):
+        """id пользователя, которого после запроса надо держать на default, или None."""
+        if not settings.DATABASE_REPLICAS or (route.safe and not route.wrote):
+            return None
+        user = getattr(request, 'user', None)
+        if user is not None and user.is_authenticated:
+            return user.pk
+        return None
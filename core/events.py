@@ -0,0 +1,198 @@
+"""
+Push-уведомления о заявках и статусах заказов (SSE, core.async_views.EventStreamView).
+
+Сервисы публикуют события через pg_notify внутри своей транзакции: Postgres
+доставляет их только после COMMIT, поэтому откатившиеся изменения никого
+не уведомляют. Каждый ASGI-процесс держит одно LISTEN-соединение
+(EventBroker) и раздаёт события подписчикам по user_id из памяти:
+простаивающее SSE-соединение стоит одной asyncio-очереди, без потока
+и без соединения с БД.
+"""
+import asyncio
+import logging
+import weakref
+from collections import defaultdict
+
+import orjson
+import psycopg2
+from django.conf import settings
+from django.db import connection, connections
+
+logger = logging.getLogger(__name__)
+
+CHANNEL = 'workify_events'
+
+
+def publish(events):
+    """
+    events — список (user_ids, имя события, данные). Все уведомления уходят
+    одним запросом; вызывать внутри транзакции изменения.
+    """
+    payloads = [
+        orjson.dumps({'u': sorted(set(user_ids)), 'e': name, 'd': data}).decode()
+        for user_ids, name, data in events
+        if user_ids
+    ]
+    if not payloads:
+        return
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT pg_notify(%s, payload) FROM unnest(%s::text[]) AS payload', [CHANNEL, payloads])
+
+
+def format_event(name, data):
+    return f'event: {name}\ndata: {orjson.dumps(data).decode()}\n\n'
+
+
+class Subscription:
+    """Очередь событий одного SSE-соединения."""
+
+    def __init__(self, broker, user_id, maxsize):
+        self.broker = broker
+        self.user_id = user_id
+        self.queue = asyncio.Queue(maxsize)
+        # клиент не успевает читать: событие потеряно, поток надо закрыть
+        self.overflowed = False
+
+    def push(self, event):
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            self.overflowed = True
+
+    async def get(self, timeout):
+        """Следующее событие (имя, данные) или None, если за timeout ничего не пришло."""
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    def close(self):
+        self.broker.unsubscribe(self)
+
+
+class EventBroker:
+    """
+    LISTEN на канал CHANNEL и раздача событий подписчикам процесса.
+
+    Соединение psycopg2 неблокирующее: уведомления читаются из event loop
+    по готовности сокета (loop.add_reader). После обрыва соединение
+    переподключается, а подписчики получают resync — за время обрыва
+    события могли потеряться, и клиент перечитывает списки.
+    """
+    reconnect_delay = 1.0
+
+    def __init__(self, alias='default'):
+        self.alias = alias
+        self.subscribers = defaultdict(set)
+        self.listening = asyncio.Event()
+        self._task = None
+
+    def subscribe(self, user_id, maxsize=None):
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._listen())
+        subscription = Subscription(self, user_id, maxsize or settings.SSE_QUEUE_SIZE)
+        self.subscribers[user_id].add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        subscriptions = self.subscribers.get(subscription.user_id)
+        if subscriptions is not None:
+            subscriptions.discard(subscription)
+            if not subscriptions:
+                del self.subscribers[subscription.user_id]
+
+    def dispatch(self, payload):
+        try:
+            message = orjson.loads(payload)
+        except orjson.JSONDecodeError:
+            logger.warning('Malformed event payload: %r', payload)
+            return
+        event = (message['e'], message['d'])
+        for user_id in message['u']:
+            for subscription in self.subscribers.get(user_id, ()):
+                subscription.push(event)
+
+    def broadcast(self, name, data):
+        for subscriptions in self.subscribers.values():
+            for subscription in subscriptions:
+                subscription.push((name, data))
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _listen(self):
+        loop = asyncio.get_running_loop()
+        reconnected = False
+        while True:
+            conn = None
+            try:
+                conn = await asyncio.to_thread(self._connect)
+                ready = asyncio.Event()
+                loop.add_reader(conn.fileno(), ready.set)
+                self.listening.set()
+                if reconnected:
+                    self.broadcast('resync', {})
+                try:
+                    while True:
+                        await ready.wait()
+                        ready.clear()
+                        conn.poll()
+                        while conn.notifies:
+                            self.dispatch(conn.notifies.pop(0).payload)
+                finally:
+                    loop.remove_reader(conn.fileno())
+            except psycopg2.Error:
+                logger.exception('Event listener connection lost, reconnecting')
+            finally:
+                self.listening.clear()
+                if conn is not None:
+                    conn.close()
+            reconnected = True
+            await asyncio.sleep(self.reconnect_delay)
+
+    def _connect(self):
+        params = connections[self.alias].get_connection_params()
+        conn = psycopg2.connect(**params)
+        conn.set_session(autocommit=True)
+        with conn.cursor() as cursor:
+            cursor.execute(f'LISTEN {CHANNEL}')
+        return conn
+
+
+_brokers = weakref.WeakKeyDictionary()
+
+
+def get_broker():
+    """Брокер текущего event loop (один на процесс под ASGI)."""
+    loop = asyncio.get_running_loop()
+    if loop not in _brokers:
+        _brokers[loop] = EventBroker()
+    return _brokers[loop]
+
+
+async def event_stream(subscription, heartbeat=None):
+    """
+    Тело text/event-stream. Комментарий-пинг раз в heartbeat секунд не даёт
+    прокси закрыть простаивающее соединение. Отключение клиента отменяет
+    генератор, и подписка снимается в finally.
+    """
+    heartbeat = heartbeat or settings.SSE_HEARTBEAT_SECONDS
+    try:
+        yield 'retry: 3000\n\n'
+        while True:
+            event = await subscription.get(heartbeat)
+            if event is None:
+                yield ': ping\n\n'
+                continue
+            yield format_event(*event)
+            if subscription.overflowed and subscription.queue.empty():
+                yield format_event('resync', {})
+                return
+    finally:
+        subscription.close()
@@ -0,0 +1,117 @@
+"""
+Потоковые выгрузки заказов, заявок и отзывов в CSV и NDJSON.
+
+Строки читаются серверным курсором (iterator(chunk_size=...)) через
+RowSerializer и кодируются пачками, так что память не зависит от объёма
+выгрузки. Права те же, что у списков: работодатель получает свои заказы
+и заявки на них, воркер — заказы, где его приняли, и свои заявки, отзывы
+фильтрует ReviewService.get_user_reviews. user=None снимает ограничения,
+так выгружает только команда export_data. archived=True берёт заказы и заявки
+из архива (ArchiveService); отзывы в архив не переносятся.
+"""
+import csv
+import io
+
+from rest_framework.exceptions import PermissionDenied
+
+from .models import ArchivedOrder, ArchivedOrderApplication, Order, OrderApplication, Review
+from .renderers import dumps
+from .serializers import (
+    OrderApplicationRowSerializer, OrderApplicationRowSerializerForEmployer, OrderRowSerializer,
+    ReviewRowSerializer
+)
+from .services import OrderApplicationService, OrderService, ReviewService
+
+DATASETS = ('orders', 'applications', 'reviews')
+CONTENT_TYPES = {
+    'csv': 'text/csv; charset=utf-8',
+    'ndjson': 'application/x-ndjson',
+}
+CHUNK_SIZE = 2000
+
+
+def get_export(dataset, user=None, order_id=None, archived=False):
+    """(RowSerializer, queryset) выгрузки с учётом прав пользователя."""
+    role = None
+    if user is not None:
+        profile = getattr(user, 'profile', None)
+        if profile is None:
+            raise PermissionDenied('Export requires an employer or worker profile')
+        role = profile.role
+
+    if dataset == 'orders':
+        if role is None:
+            queryset = (ArchivedOrder if archived else Order).objects.select_related('employer', 'category')
+        elif role == 'employer':
+            queryset = OrderService.get_user_orders(user, archived)
+        else:
+            queryset = OrderService.get_worker_accepted_orders(user, archived)
+        serializer = OrderRowSerializer
+    elif dataset == 'applications':
+        if role is None:
+            model = ArchivedOrderApplication if archived else OrderApplication
+            queryset = model.objects.select_related('order', 'worker')
+            serializer = OrderApplicationRowSerializerForEmployer
+        elif role == 'employer':
+            queryset = OrderApplicationService.get_employer_applications(user, archived=archived)
+            serializer = OrderApplicationRowSerializerForEmployer
+        else:
+            queryset = OrderApplicationService.get_worker_applications(user, archived)
+            serializer = OrderApplicationRowSerializer
+    elif dataset == 'reviews':
+        if role is None:
+            queryset = Review.objects.select_related('order', 'reviewer', 'worker')
+        else:
+            queryset = ReviewService.get_user_reviews(user)
+        serializer = ReviewRowSerializer
+    else:
+        raise ValueError(f'Unknown dataset: {dataset}')
+
+    if order_id and dataset != 'orders':
+        queryset = queryset.filter(order_id=order_id)
+    return serializer, queryset
+
+
+def iter_rows(serializer, queryset, chunk_size=CHUNK_SIZE):
+    # порядок по id идёт по первичному ключу и не требует сортировки всей выборки
+    rows = serializer.project(queryset).order_by('id').iterator(chunk_size=chunk_size)
+    return serializer.iter_serialize(rows)
+
+
+def iter_csv(rows, fieldnames, chunk_size=CHUNK_SIZE):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(fieldnames)
+    count = 0
+    for row in rows:
+        writer.writerow([row[name] for name in fieldnames])
+        count += 1
+        if count % chunk_size == 0:
+            yield buffer.getvalue().encode()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue().encode()
+
+
+def iter_ndjson(rows, chunk_size=CHUNK_SIZE):
+    chunk = []
+    for row in rows:
+        chunk.append(dumps(row))
+        if len(chunk) >= chunk_size:
+            chunk.append(b'')
+            yield b'\n'.join(chunk)
+            chunk = []
+    if chunk:
+        chunk.append(b'')
+        yield b'\n'.join(chunk)
+
+
+def iter_export(dataset, fmt, user=None, order_id=None, chunk_size=CHUNK_SIZE, archived=False):
+    """Байтовые куски выгрузки; права проверяются сразу, а не на первой итерации."""
+    serializer, queryset = get_export(dataset, user, order_id, archived)
+    rows = iter_rows(serializer, queryset, chunk_size)
+    if fmt == 'csv':
+        return iter_csv(rows, [name for name, _, _ in serializer.fields], chunk_size)
+    if fmt == 'ndjson':
+        return iter_ndjson(rows, chunk_size)
+    raise ValueError(f'Unknown format: {fmt}')
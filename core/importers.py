@@ -0,0 +1,106 @@
+"""
+Массовый импорт заказов из CSV, NDJSON или JSON-списка.
+
+Строки читаются потоком и обрабатываются пачками: пачка проверяется
+BulkOrderRowSerializer (категории — по одному набору id на весь импорт)
+и записывается OrderService.bulk_create_orders в своей транзакции, то есть
+bulk_create и один UPDATE счётчиков категорий на пачку. Строки с ошибками
+пропускаются и попадают в отчёт со своим номером (с 1, без заголовка CSV).
+"""
+import codecs
+import csv
+import itertools
+
+import orjson
+
+from .models import Category
+from .serializers import BulkOrderRowSerializer
+from .services import OrderService
+
+FORMATS = {
+    'text/csv': 'csv',
+    'application/x-ndjson': 'ndjson',
+}
+BATCH_SIZE = 1000
+MAX_REPORTED_ERRORS = 1000
+
+
+def iter_records(stream, fmt):
+    """(номер строки, dict) из байтового потока; для битого NDJSON вместо dict — ValueError."""
+    lines = codecs.iterdecode(iter(stream), 'utf-8-sig')
+    if fmt == 'csv':
+        return enumerate(csv.DictReader(lines), 1)
+    if fmt == 'ndjson':
+        return _iter_ndjson(lines)
+    raise ValueError(f'Unknown format: {fmt}')
+
+
+def _iter_ndjson(lines):
+    number = 0
+    for line in lines:
+        if not line.strip():
+            continue
+        number += 1
+        try:
+            yield number, orjson.loads(line)
+        except orjson.JSONDecodeError as exc:
+            yield number, ValueError(f'Invalid JSON: {exc}')
+
+
+def import_orders(employer, records, batch_size=BATCH_SIZE, max_rows=None):
+    """
+    records — пары (номер, dict). Возвращает отчёт: created, failed,
+    ids созданных заказов и errors (первые MAX_REPORTED_ERRORS).
+    """
+    category_ids = set(Category.objects.values_list('id', flat=True))
+    report = {'created': 0, 'failed': 0, 'ids': [], 'errors': []}
+    records = iter(records)
+
+    while True:
+        batch = list(itertools.islice(records, batch_size))
+        if not batch:
+            break
+        rows = []
+        limit_reached = False
+        for number, record in batch:
+            if max_rows is not None and number > max_rows:
+                _add_error(report, number, f'Row limit of {max_rows} exceeded, the rest was not imported')
+                limit_reached = True
+                break
+            row = _validate(report, number, record, category_ids)
+            if row is not None:
+                rows.append(row)
+
+        if rows:
+            orders = OrderService.bulk_create_orders(employer, rows, batch_size)
+            report['created'] += len(orders)
+            report['ids'].extend(order.pk for order in orders)
+        if limit_reached:
+            break
+    return report
+
+
+def _validate(report, number, record, category_ids):
+    if isinstance(record, ValueError):
+        _add_error(report, number, str(record))
+        return None
+    serializer = BulkOrderRowSerializer(data=record)
+    if not serializer.is_valid():
+        _add_error(report, number, serializer.errors)
+        return None
+    data = serializer.validated_data
+    if data['category'] not in category_ids:
+        _add_error(report, number, {'category': [f'Invalid pk "{data["category"]}" - object does not exist.']})
+        return None
+    return {
+        'title': data['title'],
+        'description': data['description'],
+        'budget': data['budget'],
+        'category_id': data['category'],
+    }
+
+
+def _add_error(report, number, errors):
+    report['failed'] += 1
+    if len(report['errors']) < MAX_REPORTED_ERRORS:
+        report['errors'].append({'row': number, 'errors': errors})
@@ -0,0 +1,29 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from core.services import ArchiveService
+
+
+class Command(BaseCommand):
+    help = (
+        'Переносит заказы, закрытые (completed/cancelled) дольше --days дней, вместе с заявками '
+        'в архивные таблицы. Маленькими транзакциями с SKIP LOCKED, можно запускать по cron.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=settings.ARCHIVE_AFTER_DAYS)
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument('--max-batches', type=int, help='Остановиться после N пачек')
+        parser.add_argument('--pause', type=float, default=0.0, help='Пауза между пачками, секунд')
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        totals = ArchiveService.archive_closed_orders(
+            options['days'], options['batch_size'], options['max_batches'], options['pause']
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f'archived orders={totals["orders"]} applications={totals["applications"]} '
+            f'in {totals["batches"]} batches, {time.monotonic() - started:.1f}s'
+        ))
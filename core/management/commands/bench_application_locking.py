@@ -0,0 +1,131 @@
+import random
+import threading
+import time
+import uuid
+from collections import Counter
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import IntegrityError, connection
+from django.db.models import Count, Q
+from rest_framework.exceptions import ValidationError
+
+from core.models import Category, Order, OrderApplication, Profile
+from core.services import OrderApplicationService, OrderService
+
+
+class Command(BaseCommand):
+    help = (
+        'Нагрузочный тест блокировок: потоки подают и принимают заявки на один '
+        '"горячий" заказ и много "холодных", выводит пропускную способность и конфликты. '
+        'Пишет в настроенную БД и удаляет свои данные в конце.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=16)
+        parser.add_argument('--seconds', type=float, default=5.0)
+        parser.add_argument('--workers', type=int, default=200, help='Сколько воркеров создаётся для заявок')
+        parser.add_argument('--cold-orders', type=int, default=500)
+        parser.add_argument('--hot-ratio', type=float, default=0.5, help='Доля операций над горячим заказом')
+        parser.add_argument('--skip-locked', action='store_true', help='accept не ждёт занятый заказ')
+
+    def handle(self, *args, **options):
+        tag = uuid.uuid4().hex[:8]
+        employer, workers, category = self._seed(tag, options['workers'])
+        try:
+            hot = self._create_order(employer, category, 'hot')
+            cold = [self._create_order(employer, category, f'cold {i}') for i in range(options['cold_orders'])]
+            stats = self._run(options, employer, workers, hot, cold)
+            self._report(options, stats, [hot] + cold)
+        finally:
+            User.objects.filter(username__startswith=f'bench-{tag}-').delete()
+            category.delete()
+
+    def _seed(self, tag, worker_count):
+        employer = User.objects.create(username=f'bench-{tag}-employer')
+        Profile.objects.create(user=employer, role='employer')
+        workers = User.objects.bulk_create(
+            [User(username=f'bench-{tag}-worker{i}') for i in range(worker_count)]
+        )
+        Profile.objects.bulk_create([Profile(user=worker, role='worker') for worker in workers])
+        category = Category.objects.create(name=f'bench-{tag}')
+        return employer, workers, category
+
+    @staticmethod
+    def _create_order(employer, category, title):
+        return OrderService.create_order({
+            'employer': employer,
+            'title': title,
+            'description': 'benchmark',
+            'budget': Decimal('1000.00'),
+            'category': category,
+        })
+
+    def _run(self, options, employer, workers, hot, cold):
+        stats = Counter()
+        lock = threading.Lock()
+        deadline = time.monotonic() + options['seconds']
+
+        def worker_loop(seed):
+            rng = random.Random(seed)
+            local = Counter()
+            try:
+                while time.monotonic() < deadline:
+                    order = hot if rng.random() < options['hot_ratio'] else rng.choice(cold)
+                    kind = 'hot' if order is hot else 'cold'
+                    try:
+                        if rng.random() < 0.8:
+                            OrderApplicationService.create_application({
+                                'order': order,
+                                'worker': rng.choice(workers),
+                                'cover_letter': 'benchmark',
+                            })
+                            local[f'{kind}_apply_ok'] += 1
+                        else:
+                            application = OrderApplication.objects.filter(order=order).first()
+                            if application is None:
+                                continue
+                            OrderApplicationService.accept_application(
+                                application, employer, skip_locked=options['skip_locked']
+                            )
+                            local[f'{kind}_accept_ok'] += 1
+                    except ValidationError:
+                        local[f'{kind}_conflict'] += 1
+                    except IntegrityError:
+                        # повторная заявка того же воркера (unique order+worker)
+                        local[f'{kind}_duplicate'] += 1
+            finally:
+                connection.close()
+                with lock:
+                    stats.update(local)
+
+        threads = [threading.Thread(target=worker_loop, args=(i,)) for i in range(options['threads'])]
+        started = time.monotonic()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        stats['elapsed'] = time.monotonic() - started
+        return stats
+
+    def _report(self, options, stats, orders):
+        elapsed = stats.pop('elapsed')
+        total = sum(stats.values())
+        self.stdout.write(
+            f"threads={options['threads']} seconds={elapsed:.2f} "
+            f"skip_locked={options['skip_locked']} hot_ratio={options['hot_ratio']}"
+        )
+        self.stdout.write(f'total ops: {total} ({total / elapsed:.0f} ops/s)')
+        for key in sorted(stats):
+            self.stdout.write(f'  {key}: {stats[key]} ({stats[key] / elapsed:.0f}/s)')
+
+        # инварианты: не больше одной принятой заявки и ни одной pending у занятого заказа
+        broken = Order.objects.filter(pk__in=[order.pk for order in orders]).annotate(
+            accepted=Count('applications', filter=Q(applications__status='accepted')),
+            pending=Count('applications', filter=Q(applications__status='pending')),
+        ).filter(Q(accepted__gt=1) | Q(status='in_progress', pending__gt=0)).count()
+        if broken:
+            self.stdout.write(self.style.ERROR(f'{broken} orders violate accept invariants'))
+        else:
+            self.stdout.write(self.style.SUCCESS('accept invariants hold'))
@@ -0,0 +1,176 @@
+import asyncio
+import os
+import socket
+import subprocess
+import sys
+import time
+from urllib.parse import urlsplit
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает WSGI (gunicorn, sync-воркеры) и ASGI (uvicorn, core.async_views) '
+        'под N одновременными keep-alive соединениями: запросов в секунду и хвосты '
+        'задержки. Серверы поднимаются на свободных портах и гасятся в конце; '
+        'вместо этого можно передать --url уже запущенного сервера. Читает '
+        'настроенную БД, ничего в неё не пишет.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--connections', type=int, default=1000)
+        parser.add_argument('--seconds', type=float, default=15.0)
+        parser.add_argument('--workers', type=int, default=4, help='Процессов на сервер')
+        parser.add_argument('--path', default='/api/v1/orderlist/')
+        parser.add_argument('--token', help='JWT для эндпоинтов с авторизацией')
+        parser.add_argument('--targets', nargs='+', choices=['wsgi', 'asgi'], default=['wsgi', 'asgi'])
+        parser.add_argument('--url', help='Бенчмарк уже запущенного сервера, без запуска своих')
+        parser.add_argument('--timeout', type=float, default=30.0, help='Таймаут одного запроса')
+
+    def handle(self, *args, **options):
+        if options['url']:
+            parts = urlsplit(options['url'])
+            result = self._load(parts.hostname, parts.port or 80, options)
+            self._report(options['url'], result, options)
+            return
+
+        for target in options['targets']:
+            port = self._free_port()
+            server = self._start(target, port, options['workers'])
+            try:
+                self._wait_ready(port, server)
+                result = self._load('127.0.0.1', port, options)
+            finally:
+                server.terminate()
+                server.wait(timeout=30)
+            self._report(target, result, options)
+
+    @staticmethod
+    def _free_port():
+        with socket.socket() as sock:
+            sock.bind(('127.0.0.1', 0))
+            return sock.getsockname()[1]
+
+    @staticmethod
+    def _start(target, port, workers):
+        env = dict(os.environ, DJANGO_SETTINGS_MODULE=os.environ.get('DJANGO_SETTINGS_MODULE', 'workify.settings'))
+        if target == 'wsgi':
+            env['ASYNC_READ_VIEWS'] = 'False'
+            command = [
+                sys.executable, '-m', 'gunicorn', 'workify.wsgi:application',
+                '--workers', str(workers), '--bind', f'127.0.0.1:{port}', '--log-level', 'warning',
+            ]
+        else:
+            env['ASYNC_READ_VIEWS'] = 'True'
+            command = [
+                sys.executable, '-m', 'uvicorn', 'workify.asgi:application',
+                '--workers', str(workers), '--host', '127.0.0.1', '--port', str(port),
+                '--no-access-log', '--log-level', 'warning',
+            ]
+        return subprocess.Popen(command, cwd=settings.BASE_DIR, env=env)
+
+    @staticmethod
+    def _wait_ready(port, server, timeout=30):
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if server.poll() is not None:
+                raise CommandError(f'server exited with code {server.returncode}')
+            try:
+                socket.create_connection(('127.0.0.1', port), timeout=1).close()
+                return
+            except OSError:
+                time.sleep(0.2)
+        raise CommandError(f'server on port {port} did not start in {timeout}s')
+
+    def _load(self, host, port, options):
+        return asyncio.run(self._run_clients(host, port, options))
+
+    async def _run_clients(self, host, port, options):
+        headers = [f'Host: {host}:{port}', 'Connection: keep-alive', 'Accept: application/json']
+        if options['token']:
+            headers.append(f'Authorization: Bearer {options["token"]}')
+        request = (f'GET {options["path"]} HTTP/1.1\r\n' + '\r\n'.join(headers) + '\r\n\r\n').encode()
+
+        result = {'latencies': [], 'errors': 0, 'statuses': {}, 'connects': 0}
+        deadline = time.monotonic() + options['seconds']
+        started = time.monotonic()
+        await asyncio.gather(*[
+            self._client(host, port, request, deadline, options['timeout'], result)
+            for _ in range(options['connections'])
+        ])
+        result['elapsed'] = time.monotonic() - started
+        return result
+
+    async def _client(self, host, port, request, deadline, timeout, result):
+        reader = writer = None
+        while time.monotonic() < deadline:
+            started = time.monotonic()
+            try:
+                if writer is None:
+                    # соединение открывается внутри замера: sync-воркеры gunicorn
+                    # не держат keep-alive, и клиент платит за переподключение
+                    reader, writer = await asyncio.wait_for(asyncio.open_connection(host, port), timeout)
+                    result['connects'] += 1
+                writer.write(request)
+                status, keep_alive = await asyncio.wait_for(self._read_response(reader), timeout)
+            except (OSError, asyncio.TimeoutError, asyncio.IncompleteReadError, ValueError):
+                result['errors'] += 1
+                writer = self._close(writer)
+                await asyncio.sleep(0.05)
+                continue
+
+            result['latencies'].append(time.monotonic() - started)
+            result['statuses'][status] = result['statuses'].get(status, 0) + 1
+            if not keep_alive:
+                writer = self._close(writer)
+        self._close(writer)
+
+    @staticmethod
+    async def _read_response(reader):
+        head = await reader.readuntil(b'\r\n\r\n')
+        lines = head.decode('latin-1').split('\r\n')
+        status = int(lines[0].split(' ', 2)[1])
+        headers = {}
+        for line in lines[1:]:
+            if ':' in line:
+                name, value = line.split(':', 1)
+                headers[name.strip().lower()] = value.strip()
+
+        if headers.get('transfer-encoding', '').lower() == 'chunked':
+            while True:
+                size = int((await reader.readuntil(b'\r\n')).split(b';')[0], 16)
+                await reader.readexactly(size + 2)
+                if size == 0:
+                    break
+        elif 'content-length' in headers:
+            await reader.readexactly(int(headers['content-length']))
+        else:
+            await reader.read()
+            return status, False
+        return status, headers.get('connection', '').lower() != 'close'
+
+    @staticmethod
+    def _close(writer):
+        if writer is not None:
+            writer.close()
+        return None
+
+    def _report(self, name, result, options):
+        latencies = sorted(result['latencies'])
+        count = len(latencies)
+        if not count:
+            self.stdout.write(self.style.ERROR(f'{name}: no successful requests, errors={result["errors"]}'))
+            return
+
+        def percentile(value):
+            return latencies[min(count - 1, int(count * value))] * 1000
+
+        self.stdout.write(
+            f'{name:<5} connections={options["connections"]} requests={count} '
+            f'rps={count / result["elapsed"]:8.1f} '
+            f'p50={percentile(0.50):7.1f} ms p95={percentile(0.95):7.1f} ms '
+            f'p99={percentile(0.99):7.1f} ms max={latencies[-1] * 1000:7.1f} ms '
+            f'errors={result["errors"]} connects={result["connects"]} statuses={result["statuses"]}'
+        )
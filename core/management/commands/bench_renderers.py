@@ -0,0 +1,98 @@
+import io
+import time
+import tracemalloc
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.test import RequestFactory
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+
+from core.models import Category, Order, Profile
+from core.renderers import ORJSONParser, ORJSONRenderer, iter_json_array
+from core.serializers import OrderRowSerializer, OrderSerializer
+from core.services import OrderService
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает JSONRenderer/JSONParser DRF с orjson на данных OrderSerializer '
+        'и пиковую память полного рендера против потокового. Данные откатываются.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=20000)
+        parser.add_argument('--repeat', type=int, default=3)
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            employer = self._seed(options['rows'])
+            request = RequestFactory().get('/')
+            request.user = employer
+            queryset = OrderService.get_user_orders(employer)
+            data = OrderSerializer(queryset, many=True, context={'request': request}).data
+
+            stdlib = self._best_of(options['repeat'], lambda: JSONRenderer().render(data))
+            fast = self._best_of(options['repeat'], lambda: ORJSONRenderer().render(data))
+            body = JSONRenderer().render(data)
+            self._line('render', stdlib, fast, len(body))
+
+            stdlib = self._best_of(options['repeat'], lambda: JSONParser().parse(io.BytesIO(body)))
+            fast = self._best_of(options['repeat'], lambda: ORJSONParser().parse(io.BytesIO(body)))
+            self._line('parse', stdlib, fast, len(body))
+
+            full_peak = self._peak(lambda: ORJSONRenderer().render(
+                OrderRowSerializer.serialize(OrderRowSerializer.project(queryset))
+            ))
+            stream_peak = self._peak(lambda: sum(len(chunk) for chunk in iter_json_array(
+                OrderRowSerializer.iter_serialize(OrderRowSerializer.project(queryset).iterator(chunk_size=2000))
+            )))
+            self.stdout.write(
+                f'memory  full={full_peak / 2**20:8.1f} MiB stream={stream_peak / 2**20:8.1f} MiB'
+            )
+
+            transaction.set_rollback(True)
+
+    def _line(self, name, stdlib, fast, size):
+        self.stdout.write(
+            f'{name:<7} bytes={size} stdlib={stdlib * 1000:8.1f} ms '
+            f'orjson={fast * 1000:8.1f} ms speedup={stdlib / fast:5.1f}x'
+        )
+
+    @staticmethod
+    def _best_of(repeat, func):
+        best = None
+        for _ in range(repeat):
+            started = time.perf_counter()
+            func()
+            elapsed = time.perf_counter() - started
+            best = elapsed if best is None else min(best, elapsed)
+        return best
+
+    @staticmethod
+    def _peak(func):
+        tracemalloc.start()
+        try:
+            func()
+            return tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+
+    @staticmethod
+    def _seed(rows):
+        employer = User.objects.create(username='bench-renderers-employer')
+        Profile.objects.create(user=employer, role='employer')
+        category = Category.objects.create(name='bench-renderers')
+        Order.objects.bulk_create([
+            Order(
+                employer=employer,
+                title=f'Ремонт квартиры №{i}',
+                description='Покраска стен, замена плитки и сантехники. ' * 4,
+                budget=Decimal('15000.00') + i,
+                category=category,
+            )
+            for i in range(rows)
+        ])
+        return employer
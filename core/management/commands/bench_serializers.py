@@ -0,0 +1,91 @@
+import time
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.test import RequestFactory
+
+from core.models import Category, Order, OrderApplication, Profile, Review
+from core.serializers import (
+    OrderApplicationRowSerializerForEmployer, OrderApplicationSerializerForEmployer,
+    OrderRowSerializer, OrderSerializer, ReviewRowSerializer, ReviewSerializer
+)
+from core.services import OrderApplicationService, OrderService, ReviewService
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает ModelSerializer и RowSerializer на списках из N строк. '
+        'Данные создаются в транзакции, которая откатывается в конце.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=10000)
+        parser.add_argument('--repeat', type=int, default=3)
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            employer, worker = self._seed(options['rows'])
+            request = RequestFactory().get('/')
+            request.user = employer
+
+            cases = [
+                ('orders', OrderSerializer, OrderRowSerializer, OrderService.get_user_orders(employer)),
+                (
+                    'applications', OrderApplicationSerializerForEmployer, OrderApplicationRowSerializerForEmployer,
+                    OrderApplicationService.get_employer_applications(employer),
+                ),
+                ('reviews', ReviewSerializer, ReviewRowSerializer, ReviewService.get_user_reviews(employer)),
+            ]
+            for name, serializer_class, row_serializer_class, queryset in cases:
+                drf = self._best_of(options['repeat'], lambda: serializer_class(
+                    list(queryset), many=True, context={'request': request}
+                ).data)
+                fast = self._best_of(options['repeat'], lambda: row_serializer_class.serialize(
+                    list(row_serializer_class.project(queryset))
+                ))
+                self.stdout.write(
+                    f'{name:<13} rows={options["rows"]} drf={drf * 1000:8.1f} ms '
+                    f'fast={fast * 1000:8.1f} ms speedup={drf / fast:5.1f}x'
+                )
+
+            transaction.set_rollback(True)
+
+    @staticmethod
+    def _best_of(repeat, func):
+        best = None
+        for _ in range(repeat):
+            started = time.perf_counter()
+            func()
+            elapsed = time.perf_counter() - started
+            best = elapsed if best is None else min(best, elapsed)
+        return best
+
+    @staticmethod
+    def _seed(rows):
+        employer = User.objects.create(username='bench-serializers-employer', email='employer@example.com')
+        worker = User.objects.create(username='bench-serializers-worker', email='worker@example.com')
+        Profile.objects.bulk_create([Profile(user=employer, role='employer'), Profile(user=worker, role='worker')])
+        category = Category.objects.create(name='bench-serializers')
+
+        orders = Order.objects.bulk_create([
+            Order(
+                employer=employer,
+                title=f'Order {i}',
+                description='Ремонт квартиры под ключ',
+                budget=Decimal('15000.00') + i,
+                category=category,
+                status='completed',
+            )
+            for i in range(rows)
+        ])
+        OrderApplication.objects.bulk_create([
+            OrderApplication(order=order, worker=worker, cover_letter='Готов приступить', status='accepted')
+            for order in orders
+        ])
+        Review.objects.bulk_create([
+            Review(order=order, reviewer=employer, worker=worker, rating=5, comment='Отлично')
+            for order in orders
+        ])
+        return employer, worker
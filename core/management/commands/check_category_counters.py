@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand
+
+from core.services import CategoryService
+
+
+class Command(BaseCommand):
+    help = 'Сверяет счётчики заказов по статусам в категориях с фактическими данными'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--category', type=int, action='append', dest='categories',
+                            help='Проверить только указанные категории (можно повторять)')
+        parser.add_argument('--fix', action='store_true', help='Пересчитать счётчики при расхождении')
+
+    def handle(self, *args, **options):
+        drift = CategoryService.find_counter_drift(options['categories'])
+        if not drift:
+            self.stdout.write(self.style.SUCCESS('Category counters are in sync'))
+            return
+
+        for item in drift:
+            self.stdout.write(
+                f"category={item['category']} status={item['status']} "
+                f"stored={item['stored']} actual={item['actual']}"
+            )
+
+        if options['fix']:
+            CategoryService.sync_category_job_counts()
+            self.stdout.write(self.style.SUCCESS(f'Fixed {len(drift)} mismatched counters'))
+        else:
+            self.stdout.write(self.style.WARNING(f'{len(drift)} mismatched counters, run with --fix to recount'))
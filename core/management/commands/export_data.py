@@ -0,0 +1,43 @@
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+from core import exports
+
+
+class Command(BaseCommand):
+    help = (
+        'Потоковая выгрузка заказов, заявок или отзывов в CSV/NDJSON серверным курсором. '
+        'Без --user выгружает всё (для аналитики), с --user — то, что этот пользователь видит в API.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('dataset', choices=exports.DATASETS)
+        parser.add_argument('--format', choices=sorted(exports.CONTENT_TYPES), default='csv')
+        parser.add_argument('--output', '-o', default='-', help='Файл; "-" — stdout')
+        parser.add_argument('--user', help='username, чьими правами ограничить выгрузку')
+        parser.add_argument('--order', type=int, help='Только заявки/отзывы этого заказа')
+        parser.add_argument('--chunk-size', type=int, default=exports.CHUNK_SIZE)
+        parser.add_argument('--archived', action='store_true', help='Заказы и заявки из архива')
+
+    def handle(self, *args, **options):
+        user = None
+        if options['user']:
+            user = User.objects.select_related('profile').filter(username=options['user']).first()
+            if user is None:
+                raise CommandError(f'User {options["user"]} not found')
+
+        chunks = exports.iter_export(
+            options['dataset'], options['format'], user, options['order'], options['chunk_size'],
+            archived=options['archived'],
+        )
+        written = 0
+        if options['output'] == '-':
+            for chunk in chunks:
+                self.stdout.write(chunk.decode(), ending='')
+                written += len(chunk)
+        else:
+            with open(options['output'], 'wb') as output:
+                for chunk in chunks:
+                    output.write(chunk)
+                    written += len(chunk)
+        self.stderr.write(f'{options["dataset"]}: {written} bytes written')
@@ -0,0 +1,248 @@
+import io
+import math
+import random
+import time
+from datetime import datetime, timedelta, timezone as dt_timezone
+from decimal import Decimal
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from core.models import CITY_CHOICES, Category, Order, OrderApplication, Profile, Review, WorkerReputation
+from core.services import CategoryService, ReputationService, StatsService
+
+CATEGORY_NAMES = [
+    'Ремонт квартир', 'Сантехника', 'Электрика', 'Уборка', 'Переезды', 'Грузчики',
+    'Веб-разработка', 'Мобильные приложения', 'Дизайн', 'Копирайтинг', 'Переводы',
+    'Репетиторы', 'Фото и видео', 'Красота', 'Ремонт техники', 'Курьеры',
+    'Сборка мебели', 'Бухгалтерия', 'Юристы', 'Садовые работы',
+]
+TITLE_WORDS = [
+    'Срочно', 'Нужен', 'Ищу', 'Требуется', 'Помощь', 'Сделать', 'Разовая задача',
+]
+DESCRIPTION_WORDS = (
+    'ремонт покраска плитка сантехника проводка уборка квартира офис дом сайт '
+    'приложение логотип перевод текст доставка сборка мебель отчёт договор '
+    'консультация срочно качественно недорого опыт гарантия материал выезд'
+).split()
+# доли статусов заказов и статус заявки, если этот воркер не выбран
+ORDER_STATUSES = [('open', 0.4), ('in_progress', 0.2), ('completed', 0.3), ('cancelled', 0.1)]
+CITIES = [value for value, _ in CITY_CHOICES]
+
+
+class Command(BaseCommand):
+    help = (
+        'Генерирует воспроизводимый синтетический датасет (профили, категории, '
+        'заказы, заявки, отзывы) через COPY. Один --seed даёт одни и те же данные. '
+        'Пишет в настроенную БД и дописывает к существующим строкам.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--employers', type=int, default=20000)
+        parser.add_argument('--workers', type=int, default=100000)
+        parser.add_argument('--orders', type=int, default=1000000)
+        parser.add_argument('--applications', type=int, default=10000000, help='Примерное число заявок')
+        parser.add_argument('--reviews', type=int, default=500000, help='Максимум отзывов')
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--batch', type=int, default=20000, help='Заказов на одну транзакцию COPY')
+        parser.add_argument('--password', default='loadtest-pass', help='Пароль всех созданных пользователей')
+        parser.add_argument(
+            '--end-date', default='2025-01-01',
+            help='Даты создания раскладываются на год до этой даты (фиксирована ради воспроизводимости)',
+        )
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        self.end = datetime.fromisoformat(options['end_date']).replace(tzinfo=dt_timezone.utc)
+        self.prefix = f'gen{options["seed"]}'
+        if User.objects.filter(username__startswith=f'{self.prefix}-').exists():
+            raise CommandError(f'Dataset with seed {options["seed"]} already exists (users {self.prefix}-*)')
+        if options['workers'] < 1 or options['employers'] < 1:
+            raise CommandError('Need at least one employer and one worker')
+
+        started = time.monotonic()
+        employers, workers = self._users(rng, options)
+        categories = self._categories()
+        counts = self._orders(rng, options, employers, workers, categories)
+
+        CategoryService.sync_category_job_counts()
+        # отзывы и статусы вставлены COPY в обход сервисов
+        ReputationService.rebuild()
+        StatsService.invalidate()
+        with connection.cursor() as cursor:
+            for model in (User, Profile, Category, Order, OrderApplication, Review, WorkerReputation):
+                cursor.execute(f'ANALYZE {model._meta.db_table}')
+
+        self.stdout.write(self.style.SUCCESS(
+            f'employers={len(employers)} workers={len(workers)} categories={len(categories)} '
+            f'orders={counts["orders"]} applications={counts["applications"]} reviews={counts["reviews"]} '
+            f'in {time.monotonic() - started:.1f}s'
+        ))
+
+    # --- пользователи и справочники ---
+
+    def _users(self, rng, options):
+        # хэш пароля один на всех: PBKDF2 на каждого стоил бы часы
+        password = make_password(options['password'])
+        joined = self.end - timedelta(days=400)
+        first_id = self._next_id(User)
+        total = options['employers'] + options['workers']
+
+        with transaction.atomic():
+            self._copy(User, ['id', 'password', 'is_superuser', 'username', 'first_name', 'last_name',
+                              'email', 'is_staff', 'is_active', 'date_joined'], (
+                (first_id + i, password, 'f', self._username(i, options), '', '',
+                 f'{self._username(i, options)}@example.com', 'f', 't', joined)
+                for i in range(total)
+            ))
+            first_profile = self._next_id(Profile)
+            self._copy(Profile, ['id', 'user_id', 'role', 'phone', 'bio', 'city', 'created_at', 'updated_at'], (
+                (first_profile + i, first_id + i, 'employer' if i < options['employers'] else 'worker',
+                 f'+7700{rng.randrange(10**7):07d}', None, rng.choice(CITIES), joined, joined)
+                for i in range(total)
+            ))
+            self._reset_sequence(User)
+            self._reset_sequence(Profile)
+
+        employers = list(range(first_id, first_id + options['employers']))
+        workers = list(range(first_id + options['employers'], first_id + total))
+        return employers, workers
+
+    def _username(self, index, options):
+        if index < options['employers']:
+            return f'{self.prefix}-employer{index}'
+        return f'{self.prefix}-worker{index - options["employers"]}'
+
+    def _categories(self):
+        existing = dict(Category.objects.filter(name__in=CATEGORY_NAMES).values_list('name', 'id'))
+        Category.objects.bulk_create([Category(name=name) for name in CATEGORY_NAMES if name not in existing])
+        return list(Category.objects.filter(name__in=CATEGORY_NAMES).order_by('id').values_list('id', flat=True))
+
+    # --- заказы, заявки, отзывы ---
+
+    def _orders(self, rng, options, employers, workers, categories):
+        counts = {'orders': 0, 'applications': 0, 'reviews': 0}
+        mean_applications = options['applications'] / max(options['orders'], 1)
+        review_ratio = min(1.0, options['reviews'] / max(options['orders'] * 0.3, 1))
+        statuses, weights = zip(*ORDER_STATUSES)
+        # популярность категорий и работодателей неравномерна (Zipf-подобно)
+        category_weights = [1 / (rank + 1) for rank in range(len(categories))]
+
+        order_id = self._next_id(Order)
+        application_id = self._next_id(OrderApplication)
+        review_id = self._next_id(Review)
+        span = 365 * 24 * 3600
+
+        remaining = options['orders']
+        while remaining > 0:
+            size = min(options['batch'], remaining)
+            orders, applications, reviews = [], [], []
+            for _ in range(size):
+                created = self.end - timedelta(seconds=rng.randrange(span))
+                status = rng.choices(statuses, weights)[0]
+                budget = Decimal(min(9_999_999, round(math.exp(rng.gauss(10.3, 1.0)), -2))).quantize(Decimal('0.01'))
+                updated = created + timedelta(hours=rng.randrange(1, 240)) if status != 'open' else created
+                orders.append((
+                    order_id, int(employers[int(len(employers) * rng.random() ** 2)]), self._title(rng),
+                    self._description(rng), budget, rng.choices(categories, category_weights)[0],
+                    status, created, updated,
+                ))
+
+                count = min(len(workers), int(rng.expovariate(1 / mean_applications))) if mean_applications else 0
+                chosen = rng.sample(workers, count) if count else []
+                winner = chosen[0] if chosen and status in ('in_progress', 'completed') else None
+                for worker in chosen:
+                    if worker == winner:
+                        app_status = 'accepted'
+                    elif status == 'open':
+                        app_status = 'pending'
+                    else:
+                        app_status = 'rejected'
+                    applied = created + timedelta(minutes=rng.randrange(1, 4320))
+                    applications.append((
+                        application_id, order_id, worker, 'Готов выполнить, опыт есть', app_status,
+                        applied, max(applied, updated),
+                    ))
+                    application_id += 1
+
+                if (
+                    winner and status == 'completed' and counts['reviews'] + len(reviews) < options['reviews']
+                    and rng.random() < review_ratio
+                ):
+                    employer = orders[-1][1]
+                    rating = rng.choices([1, 2, 3, 4, 5], [2, 3, 10, 35, 50])[0]
+                    reviews.append((
+                        review_id, order_id, employer, winner, rating, rng.choice(['Отлично', 'Хорошо', None]),
+                        updated + timedelta(days=1),
+                    ))
+                    review_id += 1
+                order_id += 1
+
+            with transaction.atomic():
+                self._copy(Order, ['id', 'employer_id', 'title', 'description', 'budget', 'category_id',
+                                   'status', 'created_at', 'updated_at'], orders)
+                self._copy(OrderApplication, ['id', 'order_id', 'worker_id', 'cover_letter', 'status',
+                                              'created_at', 'updated_at'], applications)
+                self._copy(Review, ['id', 'order_id', 'reviewer_id', 'worker_id', 'rating', 'comment',
+                                    'created_at'], reviews)
+
+            counts['orders'] += len(orders)
+            counts['applications'] += len(applications)
+            counts['reviews'] += len(reviews)
+            remaining -= size
+            self.stdout.write(
+                f'  orders={counts["orders"]} applications={counts["applications"]} reviews={counts["reviews"]}'
+            )
+
+        for model in (Order, OrderApplication, Review):
+            self._reset_sequence(model)
+        return counts
+
+    @staticmethod
+    def _title(rng):
+        return f'{rng.choice(TITLE_WORDS)}: {" ".join(rng.sample(DESCRIPTION_WORDS, 3))}'
+
+    @staticmethod
+    def _description(rng):
+        return ' '.join(rng.choices(DESCRIPTION_WORDS, k=rng.randrange(8, 40)))
+
+    # --- COPY ---
+
+    @staticmethod
+    def _next_id(model):
+        with connection.cursor() as cursor:
+            cursor.execute(f'SELECT COALESCE(MAX(id), 0) + 1 FROM {model._meta.db_table}')
+            return cursor.fetchone()[0]
+
+    @staticmethod
+    def _reset_sequence(model):
+        table = model._meta.db_table
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), COALESCE(MAX(id), 1)) FROM {table}"
+            )
+
+    def _copy(self, model, columns, rows):
+        buffer = io.StringIO()
+        for row in rows:
+            buffer.write('\t'.join(self._copy_value(value) for value in row))
+            buffer.write('\n')
+        buffer.seek(0)
+        with connection.cursor() as cursor:
+            cursor.copy_expert(
+                f'COPY {model._meta.db_table} ({", ".join(columns)}) FROM STDIN',
+                buffer
+            )
+
+    @staticmethod
+    def _copy_value(value):
+        # текстовый формат COPY: \N — NULL, спецсимволы экранируются
+        if value is None:
+            return r'\N'
+        if isinstance(value, datetime):
+            return value.isoformat()
+        return (
+            str(value).replace('\\', '\\\\').replace('\t', '\\t').replace('\n', '\\n').replace('\r', '\\r')
+        )
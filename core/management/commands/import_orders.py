@@ -0,0 +1,43 @@
+import os
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+from core import importers
+
+
+class Command(BaseCommand):
+    help = (
+        'Импорт заказов работодателя из CSV (title,description,budget,category) или NDJSON '
+        'пачками через bulk_create. Ошибочные строки пропускаются и печатаются.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path')
+        parser.add_argument('--employer', required=True, help='username работодателя')
+        parser.add_argument('--format', choices=sorted(importers.FORMATS.values()),
+                            help='По умолчанию — по расширению файла')
+        parser.add_argument('--batch-size', type=int, default=importers.BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        employer = User.objects.select_related('profile').filter(username=options['employer']).first()
+        if employer is None or getattr(employer, 'profile', None) is None or employer.profile.role != 'employer':
+            raise CommandError(f'Employer {options["employer"]} not found')
+
+        fmt = options['format'] or os.path.splitext(options['path'])[1].lstrip('.').lower()
+        if fmt not in importers.FORMATS.values():
+            raise CommandError(f'Cannot detect format of {options["path"]}, pass --format')
+
+        started = time.monotonic()
+        with open(options['path'], 'rb') as source:
+            report = importers.import_orders(
+                employer, importers.iter_records(source, fmt), batch_size=options['batch_size']
+            )
+
+        for error in report['errors']:
+            self.stdout.write(f'row {error["row"]}: {error["errors"]}')
+        style = self.style.SUCCESS if not report['failed'] else self.style.WARNING
+        self.stdout.write(style(
+            f'created={report["created"]} failed={report["failed"]} in {time.monotonic() - started:.1f}s'
+        ))
@@ -0,0 +1,271 @@
+import http.client
+import json
+import random
+import threading
+import time
+from collections import defaultdict
+from urllib.parse import urlencode, urlsplit
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.urls import Resolver404, resolve
+
+from core.models import Category, Order, OrderApplication
+
+from .generate_dataset import DESCRIPTION_WORDS
+
+
+class HTTPClient:
+    """keep-alive соединение одного потока нагрузки; задержки пишутся по имени URL."""
+
+    def __init__(self, url, timeout, results):
+        parts = urlsplit(url)
+        self.host, self.port = parts.hostname, parts.port or 80
+        self.timeout = timeout
+        self.results = results
+        self.conn = None
+
+    def request(self, method, path, body=None, token=None):
+        headers = {'Accept': 'application/json'}
+        if body is not None:
+            body = json.dumps(body)
+            headers['Content-Type'] = 'application/json'
+        if token:
+            headers['Authorization'] = f'Bearer {token}'
+
+        name = self._name(path)
+        started = time.perf_counter()
+        try:
+            if self.conn is None:
+                self.conn = http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+            self.conn.request(method, path, body=body, headers=headers)
+            response = self.conn.getresponse()
+            payload = response.read()
+            if response.getheader('Connection', '').lower() == 'close':
+                self.close()
+        except (OSError, http.client.HTTPException):
+            self.close()
+            self.results.record(name, None, time.perf_counter() - started)
+            return None, None
+        self.results.record(name, response.status, time.perf_counter() - started)
+
+        if response.status < 300 and payload and response.getheader('Content-Type', '').startswith('application/json'):
+            return response.status, json.loads(payload)
+        return response.status, None
+
+    def close(self):
+        if self.conn is not None:
+            self.conn.close()
+            self.conn = None
+
+    @staticmethod
+    def _name(path):
+        try:
+            return resolve(urlsplit(path).path).url_name or 'token'
+        except Resolver404:
+            return 'unmatched'
+
+
+class Results:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.latencies = defaultdict(list)
+        self.statuses = defaultdict(lambda: defaultdict(int))
+
+    def record(self, name, status, elapsed):
+        bucket = 'error' if status is None else f'{status // 100}xx'
+        with self.lock:
+            self.latencies[name].append(elapsed)
+            self.statuses[name][bucket] += 1
+
+
+class Command(BaseCommand):
+    help = (
+        'Нагрузочный прогон по реальным URL из core/urls.py: смесь чтений и записей '
+        'от лица пользователей из generate_dataset. Печатает rps и p50/p95/p99 по '
+        'каждому эндпоинту. Записи меняют данные в БД сервера.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--url', default='http://127.0.0.1:8000')
+        parser.add_argument('--threads', type=int, default=32)
+        parser.add_argument('--seconds', type=float, default=60.0)
+        parser.add_argument('--users', type=int, default=50, help='Работодателей и воркеров (каждых)')
+        parser.add_argument('--user-prefix', default='gen42-', help='Префикс username из generate_dataset')
+        parser.add_argument('--password', default='loadtest-pass')
+        parser.add_argument('--write-ratio', type=float, default=0.1, help='Доля сценариев с записью')
+        parser.add_argument('--seed', type=int, default=1)
+        parser.add_argument('--timeout', type=float, default=30.0)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        self.results = Results()
+        setup = HTTPClient(options['url'], options['timeout'], Results())
+        self.employers = self._login(setup, rng, 'employer', options)
+        self.workers = self._login(setup, rng, 'worker', options)
+        setup.close()
+        self._load_pools(rng)
+
+        deadline = time.monotonic() + options['seconds']
+        threads = [
+            threading.Thread(target=self._worker_loop, args=(options, options['seed'] * 1000 + i, deadline))
+            for i in range(options['threads'])
+        ]
+        started = time.monotonic()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self._report(time.monotonic() - started)
+
+    # --- подготовка ---
+
+    def _login(self, client, rng, role, options):
+        usernames = list(
+            User.objects.filter(username__startswith=options['user_prefix'], profile__role=role)
+            .order_by('id').values_list('username', flat=True)[:options['users'] * 20]
+        )
+        if not usernames:
+            raise CommandError(f'No {role}s with prefix {options["user_prefix"]}; run generate_dataset first')
+        sessions = []
+        for username in rng.sample(usernames, min(options['users'], len(usernames))):
+            status, data = client.request(
+                'POST', '/api/v1/token/', {'username': username, 'password': options['password']}
+            )
+            if status != 200:
+                raise CommandError(f'Login failed for {username}: HTTP {status}')
+            user_id = User.objects.only('id').get(username=username).pk
+            sessions.append({'id': user_id, 'token': data['access']})
+        return sessions
+
+    def _load_pools(self, rng):
+        # id для сценариев берём из БД заранее, чтобы запросы шли в существующие строки
+        self.categories = list(Category.objects.values_list('id', flat=True))
+        self.open_orders = list(
+            Order.objects.filter(status='open').order_by('-created_at').values_list('id', flat=True)[:5000]
+        )
+        employer_ids = [session['id'] for session in self.employers]
+        self.own_orders = defaultdict(list)
+        for order_id, employer_id in Order.objects.filter(employer_id__in=employer_ids).values_list('id', 'employer_id'):
+            self.own_orders[employer_id].append(order_id)
+        self.pending = defaultdict(list)
+        for app_id, employer_id in OrderApplication.objects.filter(
+            order__employer_id__in=employer_ids, status='pending'
+        ).values_list('id', 'order__employer_id')[:50000]:
+            self.pending[employer_id].append(app_id)
+        self.pools_lock = threading.Lock()
+
+    # --- сценарии ---
+
+    def _worker_loop(self, options, seed, deadline):
+        rng = random.Random(seed)
+        client = HTTPClient(options['url'], options['timeout'], self.results)
+        reads = [
+            (self._orderlist, 30), (self._categorylist, 8), (self._stats, 8), (self._search, 8),
+            (self._my_orders, 8), (self._my_applications, 8), (self._applications_by_order, 6),
+            (self._reviews, 6), (self._profile, 6), (self._accepted_orders, 4),
+        ]
+        writes = [(self._create_order, 3), (self._apply, 5), (self._decide, 2)]
+        try:
+            while time.monotonic() < deadline:
+                pool = writes if rng.random() < options['write_ratio'] else reads
+                scenario = rng.choices([item[0] for item in pool], [item[1] for item in pool])[0]
+                scenario(client, rng)
+        finally:
+            client.close()
+
+    def _orderlist(self, client, rng):
+        params = {'page_size': 20}
+        if rng.random() < 0.5:
+            params['category'] = rng.choice(self.categories)
+        if rng.random() < 0.3:
+            params['status'] = 'open'
+        if rng.random() < 0.2:
+            params['budget_min'] = rng.choice([10000, 50000])
+        status, data = client.request('GET', f'/api/v1/orderlist/?{urlencode(params)}')
+        # часть клиентов листает дальше по курсору
+        if data and data.get('next') and rng.random() < 0.3:
+            next_url = urlsplit(data['next'])
+            client.request('GET', f'{next_url.path}?{next_url.query}')
+
+    def _categorylist(self, client, rng):
+        client.request('GET', '/api/v1/categorylist/')
+
+    def _stats(self, client, rng):
+        client.request('GET', '/api/v1/stats/')
+
+    def _search(self, client, rng):
+        client.request('GET', f'/api/v1/ordersearch/?{urlencode({"q": " ".join(rng.sample(DESCRIPTION_WORDS, 2))})}')
+
+    def _my_orders(self, client, rng):
+        client.request('GET', '/api/v1/myorderslist/', token=rng.choice(self.employers)['token'])
+
+    def _my_applications(self, client, rng):
+        client.request('GET', '/api/v1/myapplicationslist/', token=rng.choice(self.workers)['token'])
+
+    def _accepted_orders(self, client, rng):
+        client.request('GET', '/api/v1/myacceptedorders/', token=rng.choice(self.workers)['token'])
+
+    def _applications_by_order(self, client, rng):
+        employer = rng.choice(self.employers)
+        orders = self.own_orders.get(employer['id'])
+        if orders:
+            client.request('GET', f'/api/v1/orders/{rng.choice(orders)}/applications/', token=employer['token'])
+        else:
+            client.request('GET', '/api/v1/applicationlist/', token=employer['token'])
+
+    def _reviews(self, client, rng):
+        session = rng.choice(self.workers + self.employers)
+        client.request('GET', '/api/v1/reviewlist/', token=session['token'])
+
+    def _profile(self, client, rng):
+        client.request('GET', '/api/v1/profile/', token=rng.choice(self.workers + self.employers)['token'])
+
+    def _create_order(self, client, rng):
+        employer = rng.choice(self.employers)
+        status, data = client.request('POST', '/api/v1/ordercreate/', {
+            'title': f'Нагрузка: {" ".join(rng.sample(DESCRIPTION_WORDS, 3))}',
+            'description': ' '.join(rng.choices(DESCRIPTION_WORDS, k=20)),
+            'budget': f'{rng.randrange(5000, 200000)}.00',
+            'category': rng.choice(self.categories),
+        }, token=employer['token'])
+
+    def _apply(self, client, rng):
+        if not self.open_orders:
+            return
+        worker = rng.choice(self.workers)
+        client.request('POST', '/api/v1/applicationcreate/', {
+            'order': rng.choice(self.open_orders), 'cover_letter': 'Готов приступить'
+        }, token=worker['token'])
+
+    def _decide(self, client, rng):
+        employer = rng.choice(self.employers)
+        with self.pools_lock:
+            pending = self.pending.get(employer['id'])
+            if not pending:
+                return
+            app_id = pending.pop(rng.randrange(len(pending)))
+        client.request('POST', '/api/v1/applicationlist/', {
+            'application_id': app_id, 'action': 'accept' if rng.random() < 0.3 else 'reject'
+        }, token=employer['token'])
+
+    # --- отчёт ---
+
+    def _report(self, elapsed):
+        total = sum(len(values) for values in self.results.latencies.values())
+        self.stdout.write(f'elapsed={elapsed:.1f}s requests={total} rps={total / elapsed:.1f}')
+        self.stdout.write(
+            f'{"endpoint":<24}{"count":>8}{"rps":>9}{"p50 ms":>9}{"p95 ms":>9}{"p99 ms":>9}{"max ms":>9}  statuses'
+        )
+        for name in sorted(self.results.latencies, key=lambda key: -len(self.results.latencies[key])):
+            latencies = sorted(self.results.latencies[name])
+            count = len(latencies)
+
+            def percentile(value):
+                return latencies[min(count - 1, int(count * value))] * 1000
+
+            statuses = ' '.join(f'{key}={value}' for key, value in sorted(self.results.statuses[name].items()))
+            self.stdout.write(
+                f'{name:<24}{count:>8}{count / elapsed:>9.1f}{percentile(0.5):>9.1f}{percentile(0.95):>9.1f}'
+                f'{percentile(0.99):>9.1f}{latencies[-1] * 1000:>9.1f}  {statuses}'
+            )
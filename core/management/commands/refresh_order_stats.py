@@ -0,0 +1,26 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from core.services import StatsService
+
+
+class Command(BaseCommand):
+    help = (
+        'Пересчитывает материализованную статистику заказов (core_orderstats) для /api/v1/stats/?by=... '
+        'REFRESH CONCURRENTLY: чтение во время пересчёта не блокируется. Запускать по cron или с --every.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--every', type=float, help='Повторять каждые N секунд, не завершаясь')
+
+    def handle(self, *args, **options):
+        while True:
+            started = time.monotonic()
+            StatsService.refresh_breakdown()
+            self.stdout.write(self.style.SUCCESS(f'core_orderstats refreshed in {time.monotonic() - started:.2f}s'))
+            if not options['every']:
+                return
+            close_old_connections()
+            time.sleep(max(0.0, options['every'] - (time.monotonic() - started)))
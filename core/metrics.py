@@ -0,0 +1,114 @@
+"""
+Метрики по эндпоинтам для Prometheus (/api/v1/metrics).
+
+MetricsMiddleware заводит на запрос RequestStats в contextvar. Обёртка
+execute_wrapper, которая ставится на каждое соединение с БД (сигнал
+connection_created), считает запросы и их время, а serialize_timer меряет
+сериализацию и рендер. contextvar переживает sync_to_async, поэтому запросы
+async-представлений (core.async_views) из других потоков тоже попадают
+в свой запрос.
+
+Под gunicorn с несколькими воркерами задайте PROMETHEUS_MULTIPROC_DIR
+до старта: prometheus_client пишет значения в mmap-файлы, а эндпоинт
+собирает их со всех процессов (см. gunicorn.conf.py).
+"""
+import os
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Histogram, generate_latest
+from prometheus_client import multiprocess
+
+REQUEST_LATENCY = Histogram(
+    'workify_request_duration_seconds', 'Время обработки запроса', ['view', 'method', 'status'],
+)
+DB_QUERIES = Histogram(
+    'workify_db_queries_per_request', 'SQL-запросов на HTTP-запрос', ['view'],
+    buckets=(0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 100, 200),
+)
+DB_QUERY_SECONDS = Histogram(
+    'workify_db_query_duration_seconds', 'Суммарное время SQL на HTTP-запрос', ['view'],
+)
+DB_QUERIES_TOTAL = Counter('workify_db_queries', 'SQL-запросов всего', ['view'])
+SERIALIZE_SECONDS = Histogram(
+    'workify_serialize_duration_seconds', 'RowSerializer и рендер JSON на запрос', ['view'],
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0),
+)
+RESPONSE_BYTES = Histogram(
+    'workify_response_bytes', 'Размер тела ответа', ['view'],
+    buckets=(256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304),
+)
+
+
+class RequestStats:
+    __slots__ = ('queries', 'query_seconds', 'serialize_seconds')
+
+    def __init__(self):
+        self.queries = 0
+        self.query_seconds = 0.0
+        self.serialize_seconds = 0.0
+
+
+_current = ContextVar('workify_request_stats', default=None)
+
+
+def start_request():
+    stats = RequestStats()
+    return stats, _current.set(stats)
+
+
+def end_request(token):
+    _current.reset(token)
+
+
+def record_query(execute, sql, params, many, context):
+    stats = _current.get()
+    if stats is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        stats.queries += 1
+        stats.query_seconds += time.perf_counter() - started
+
+
+def install_query_hook(sender, connection, **kwargs):
+    # connection_created приходит при каждом переподключении того же DatabaseWrapper
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+@contextmanager
+def serialize_timer():
+    stats = _current.get()
+    if stats is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        stats.serialize_seconds += time.perf_counter() - started
+
+
+def observe(view, method, status, duration, stats, size):
+    REQUEST_LATENCY.labels(view, method, status).observe(duration)
+    DB_QUERIES.labels(view).observe(stats.queries)
+    DB_QUERY_SECONDS.labels(view).observe(stats.query_seconds)
+    if stats.queries:
+        DB_QUERIES_TOTAL.labels(view).inc(stats.queries)
+    SERIALIZE_SECONDS.labels(view).observe(stats.serialize_seconds)
+    if size is not None:
+        RESPONSE_BYTES.labels(view).observe(size)
+
+
+def render_latest():
+    """Текст для /api/v1/metrics: сумма по всем воркерам в multiprocess-режиме."""
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry), CONTENT_TYPE_LATEST
@@ -0,0 +1,52 @@
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+
+from . import metrics
+
+
+class MetricsMiddleware:
+    """
+    Задержка, SQL и сериализация по имени URL из core.urls (core.metrics).
+    Работает и в sync, и в async цепочке, чтобы под ASGI не добавлять
+    переход в поток на каждый запрос. У потоковых ответов задержка
+    считается до заголовков, а размер не пишется.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        started = time.perf_counter()
+        stats, token = metrics.start_request()
+        try:
+            response = self.get_response(request)
+        finally:
+            metrics.end_request(token)
+        self._observe(request, response, stats, started)
+        return response
+
+    async def __acall__(self, request):
+        started = time.perf_counter()
+        stats, token = metrics.start_request()
+        try:
+            response = await self.get_response(request)
+        finally:
+            metrics.end_request(token)
+        self._observe(request, response, stats, started)
+        return response
+
+    @staticmethod
+    def _observe(request, response, stats, started):
+        match = getattr(request, 'resolver_match', None)
+        view = match.url_name if match is not None and match.url_name else 'unmatched'
+        size = None if response.streaming else len(response.content)
+        metrics.observe(
+            view, request.method, response.status_code, time.perf_counter() - started, stats, size
+        )
@@ -0,0 +1,35 @@
+# Generated by Django 5.2.7 on 2026-10-17 07:02
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0007_keyset_pagination_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['category', 'status', 'created_at'], name='order_cat_status_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(condition=models.Q(('status', 'open')), fields=['created_at', 'id'], name='order_open_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='orderapplication',
+            index=models.Index(fields=['worker', 'status'], name='application_worker_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='orderapplication',
+            index=models.Index(fields=['order', 'status'], name='application_order_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='review',
+            index=models.Index(fields=['worker', 'created_at'], name='review_worker_created_idx'),
+        ),
+    ]
@@ -0,0 +1,50 @@
+# Generated by Django 5.2.7 on 2026-10-17 07:06
+
+from django.db import migrations, models
+
+
+RECOUNT_SQL = '''
+    UPDATE core_category AS c
+    SET job_count = s.job_count,
+        in_progress_count = s.in_progress_count,
+        completed_count = s.completed_count,
+        cancelled_count = s.cancelled_count
+    FROM (
+        SELECT cat.id,
+               COUNT(o.id) FILTER (WHERE o.status = 'open') AS job_count,
+               COUNT(o.id) FILTER (WHERE o.status = 'in_progress') AS in_progress_count,
+               COUNT(o.id) FILTER (WHERE o.status = 'completed') AS completed_count,
+               COUNT(o.id) FILTER (WHERE o.status = 'cancelled') AS cancelled_count
+        FROM core_category cat
+        LEFT JOIN core_order o ON o.category_id = cat.id
+        GROUP BY cat.id
+    ) AS s
+    WHERE s.id = c.id
+'''
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0009_order_search_vector'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='category',
+            name='cancelled_count',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='category',
+            name='completed_count',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='category',
+            name='in_progress_count',
+            field=models.IntegerField(default=0),
+        ),
+        # 0006 посчитал в job_count все заказы, а не только открытые
+        migrations.RunSQL(RECOUNT_SQL, migrations.RunSQL.noop),
+    ]
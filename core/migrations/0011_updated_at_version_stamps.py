@@ -0,0 +1,41 @@
+# Generated by Django 5.2.7 on 2026-10-17 09:12
+
+from django.db import migrations, models
+
+
+# у существующих строк время изменения неизвестно — берём время создания
+BACKFILL_SQL = '''
+    UPDATE core_category SET updated_at = created_at;
+    UPDATE core_order SET updated_at = created_at;
+    UPDATE core_orderapplication SET updated_at = created_at;
+'''
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0010_category_status_counters'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='category',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddField(
+            model_name='order',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddField(
+            model_name='orderapplication',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.RunSQL(BACKFILL_SQL, migrations.RunSQL.noop),
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['updated_at'], name='order_updated_idx'),
+        ),
+    ]
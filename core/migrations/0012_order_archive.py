@@ -0,0 +1,89 @@
+# Generated by Django 5.2.7 on 2026-10-17 07:55
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0011_updated_at_version_stamps'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedOrder',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('title', models.CharField(max_length=200)),
+                ('description', models.TextField()),
+                ('budget', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('status', models.CharField(choices=[('open', 'Open'), ('in_progress', 'In Progress'), ('completed', 'Completed'), ('cancelled', 'Cancelled')], max_length=20)),
+                ('created_at', models.DateTimeField()),
+                ('updated_at', models.DateTimeField()),
+                ('archived_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='ArchivedOrderApplication',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('cover_letter', models.TextField(blank=True)),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('accepted', 'Accepted'), ('rejected', 'Rejected')], max_length=20)),
+                ('created_at', models.DateTimeField()),
+                ('updated_at', models.DateTimeField()),
+            ],
+        ),
+        migrations.AlterField(
+            model_name='review',
+            name='order',
+            field=models.OneToOneField(db_constraint=False, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='reviews', to='core.order'),
+        ),
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(condition=models.Q(('status__in', ['completed', 'cancelled'])), fields=['updated_at', 'id'], name='order_closed_updated_idx'),
+        ),
+        migrations.AddField(
+            model_name='archivedorder',
+            name='category',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_orders', to='core.category'),
+        ),
+        migrations.AddField(
+            model_name='archivedorder',
+            name='employer',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_orders', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddField(
+            model_name='review',
+            name='archived_order',
+            field=models.ForeignObject(from_fields=['order'], null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='core.archivedorder', to_fields=['id']),
+        ),
+        migrations.AddField(
+            model_name='archivedorderapplication',
+            name='order',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='applications', to='core.archivedorder'),
+        ),
+        migrations.AddField(
+            model_name='archivedorderapplication',
+            name='worker',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_applications', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddIndex(
+            model_name='archivedorder',
+            index=models.Index(fields=['created_at', 'id'], name='archived_order_created_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='archivedorder',
+            index=models.Index(fields=['employer', 'created_at'], name='archived_order_employer_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='archivedorderapplication',
+            index=models.Index(fields=['created_at', 'id'], name='archived_app_created_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='archivedorderapplication',
+            index=models.Index(fields=['worker', 'status'], name='archived_app_worker_status_idx'),
+        ),
+    ]
@@ -0,0 +1,65 @@
+# Generated by Django 5.2.7 on 2026-10-17 07:59
+
+from django.db import migrations, models
+
+
+# Все комбинации категория × город работодателя × статус за один проход
+# (CUBE), медиана точная для каждой ячейки. Уникальный индекс нужен
+# для REFRESH MATERIALIZED VIEW CONCURRENTLY, поэтому «все значения»
+# хранятся как 0 / '' вместо NULL. Представление зависит от колонок
+# core_order, core_archivedorder, core_category и core_profile: менять их
+# типы можно только вместе с пересозданием представления.
+CREATE_SQL = '''
+    CREATE MATERIALIZED VIEW core_orderstats AS
+    WITH orders AS (
+        SELECT category_id, employer_id, status, budget FROM core_order
+        UNION ALL
+        SELECT category_id, employer_id, status, budget FROM core_archivedorder
+    )
+    SELECT
+        COALESCE(o.category_id, 0) AS category_id,
+        COALESCE(c.name, '') AS category_name,
+        COALESCE(COALESCE(NULLIF(p.city, ''), 'unknown'), '') AS city,
+        COALESCE(o.status, '') AS status,
+        COUNT(*) AS order_count,
+        ROUND(AVG(o.budget), 2) AS avg_budget,
+        ROUND((percentile_cont(0.5) WITHIN GROUP (ORDER BY o.budget))::numeric, 2) AS median_budget,
+        now() AS refreshed_at
+    FROM orders o
+    JOIN core_category c ON c.id = o.category_id
+    LEFT JOIN core_profile p ON p.user_id = o.employer_id
+    GROUP BY CUBE ((o.category_id, c.name), COALESCE(NULLIF(p.city, ''), 'unknown'), o.status);
+
+    CREATE UNIQUE INDEX core_orderstats_key ON core_orderstats (category_id, city, status);
+'''
+
+DROP_SQL = 'DROP MATERIALIZED VIEW IF EXISTS core_orderstats;'
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0012_order_archive'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OrderStats',
+            fields=[
+                ('pk', models.CompositePrimaryKey('category_id', 'city', 'status', blank=True, editable=False, primary_key=True, serialize=False)),
+                ('category_id', models.BigIntegerField()),
+                ('category_name', models.CharField(max_length=100)),
+                ('city', models.CharField(max_length=50)),
+                ('status', models.CharField(max_length=20)),
+                ('order_count', models.BigIntegerField()),
+                ('avg_budget', models.DecimalField(decimal_places=2, max_digits=12)),
+                ('median_budget', models.DecimalField(decimal_places=2, max_digits=12)),
+                ('refreshed_at', models.DateTimeField()),
+            ],
+            options={
+                'db_table': 'core_orderstats',
+                'managed': False,
+            },
+        ),
+        migrations.RunSQL(CREATE_SQL, DROP_SQL),
+    ]
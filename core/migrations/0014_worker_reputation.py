@@ -0,0 +1,81 @@
+# Generated by Django 5.2.7 on 2026-10-17 08:04
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+# Первичное заполнение по существующим отзывам и завершённым заказам, копия
+# ReputationService.rebuild() на момент миграции. Дальше строки ведёт apply().
+BACKFILL_SQL = '''
+    WITH orders AS (
+        SELECT id, category_id, status FROM core_order
+        UNION ALL
+        SELECT id, category_id, status FROM core_archivedorder
+    ), accepted AS (
+        SELECT order_id, worker_id FROM core_orderapplication WHERE status = 'accepted'
+        UNION ALL
+        SELECT order_id, worker_id FROM core_archivedorderapplication WHERE status = 'accepted'
+    ), facts AS (
+        SELECT rv.worker_id, o.category_id, rv.rating, 0 AS completed
+        FROM core_review rv JOIN orders o ON o.id = rv.order_id
+        UNION ALL
+        SELECT a.worker_id, o.category_id, NULL, 1
+        FROM accepted a JOIN orders o ON o.id = a.order_id
+        WHERE o.status = 'completed'
+    ), totals AS (
+        SELECT worker_id, category_id, COUNT(rating) AS review_count, COALESCE(SUM(rating), 0) AS rating_sum,
+               COUNT(*) FILTER (WHERE rating = 1) AS rating_1, COUNT(*) FILTER (WHERE rating = 2) AS rating_2,
+               COUNT(*) FILTER (WHERE rating = 3) AS rating_3, COUNT(*) FILTER (WHERE rating = 4) AS rating_4,
+               COUNT(*) FILTER (WHERE rating = 5) AS rating_5, SUM(completed) AS completed_count
+        FROM facts
+        GROUP BY GROUPING SETS ((worker_id, category_id), (worker_id))
+    )
+    INSERT INTO core_workerreputation (
+        worker_id, category_id, city, review_count, rating_sum,
+        rating_1, rating_2, rating_3, rating_4, rating_5,
+        average_rating, completed_count, updated_at
+    )
+    SELECT
+        t.worker_id, t.category_id, p.city, t.review_count, t.rating_sum,
+        t.rating_1, t.rating_2, t.rating_3, t.rating_4, t.rating_5,
+        CASE WHEN t.review_count = 0 THEN 0 ELSE ROUND(t.rating_sum::numeric / t.review_count, 2) END,
+        t.completed_count, now()
+    FROM totals t
+    LEFT JOIN core_profile p ON p.user_id = t.worker_id;
+'''
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0013_order_stats_matview'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='WorkerReputation',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('city', models.CharField(blank=True, choices=[('almaty', 'Алматы'), ('astana', 'Астана'), ('shymkent', 'Шымкент'), ('karaganda', 'Караганда'), ('pavlodar', 'Павлодар'), ('semey', 'Семей'), ('aktau', 'Актау'), ('aktobe', 'Актобе'), ('atyrau', 'Атырау'), ('kostanay', 'Костанай'), ('kokshetau', 'Кокшетау'), ('taraz', 'Тараз'), ('uralsk', 'Уральск'), ('petropavlovsk', 'Петропавловск'), ('temirtau', 'Темиртау'), ('taldykorgan', 'Талдыкорган'), ('jezkazgan', 'Жезказган'), ('ekibastuz', 'Экибастуз'), ('kzylorda', 'Кызылорда'), ('ust-kamenogorsk', 'Усть-Каменогорск'), ('zhanaozen', 'Жанаозен'), ('turan', 'Туран')], max_length=50, null=True)),
+                ('review_count', models.IntegerField(default=0)),
+                ('rating_sum', models.IntegerField(default=0)),
+                ('rating_1', models.IntegerField(default=0)),
+                ('rating_2', models.IntegerField(default=0)),
+                ('rating_3', models.IntegerField(default=0)),
+                ('rating_4', models.IntegerField(default=0)),
+                ('rating_5', models.IntegerField(default=0)),
+                ('average_rating', models.DecimalField(decimal_places=2, default=0, max_digits=3)),
+                ('completed_count', models.IntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('category', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='core.category')),
+                ('worker', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='reputation', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['category', '-average_rating', '-review_count', '-worker'], name='reputation_board_idx'), models.Index(fields=['category', 'city', '-average_rating', '-review_count', '-worker'], name='reputation_city_board_idx')],
+                'constraints': [models.UniqueConstraint(fields=('worker', 'category'), name='reputation_worker_category_uniq', nulls_distinct=False)],
+            },
+        ),
+        migrations.RunSQL(BACKFILL_SQL, migrations.RunSQL.noop),
+    ]
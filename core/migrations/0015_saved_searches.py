@@ -0,0 +1,57 @@
+# Generated by Django 5.2.7 on 2026-10-17 08:13
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0014_worker_reputation'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SavedSearch',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(blank=True, max_length=100)),
+                ('city', models.CharField(blank=True, choices=[('almaty', 'Алматы'), ('astana', 'Астана'), ('shymkent', 'Шымкент'), ('karaganda', 'Караганда'), ('pavlodar', 'Павлодар'), ('semey', 'Семей'), ('aktau', 'Актау'), ('aktobe', 'Актобе'), ('atyrau', 'Атырау'), ('kostanay', 'Костанай'), ('kokshetau', 'Кокшетау'), ('taraz', 'Тараз'), ('uralsk', 'Уральск'), ('petropavlovsk', 'Петропавловск'), ('temirtau', 'Темиртау'), ('taldykorgan', 'Талдыкорган'), ('jezkazgan', 'Жезказган'), ('ekibastuz', 'Экибастуз'), ('kzylorda', 'Кызылорда'), ('ust-kamenogorsk', 'Усть-Каменогорск'), ('zhanaozen', 'Жанаозен'), ('turan', 'Туран')], max_length=50, null=True)),
+                ('min_budget', models.DecimalField(decimal_places=2, default=0, max_digits=10)),
+                ('max_budget', models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True)),
+                ('keywords', models.CharField(blank=True, max_length=200)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('category', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='core.category')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='saved_searches', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='SavedSearchMatch',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('read_at', models.DateTimeField(blank=True, null=True)),
+                ('order', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='core.order')),
+                ('search', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='matches', to='core.savedsearch')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='saved_search_matches', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='savedsearch',
+            index=models.Index(fields=['category', 'city', 'min_budget'], name='saved_search_match_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='savedsearch',
+            index=models.Index(fields=['user', 'created_at'], name='saved_search_user_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='savedsearchmatch',
+            index=models.Index(fields=['user', 'created_at', 'id'], name='saved_search_inbox_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='savedsearchmatch',
+            constraint=models.UniqueConstraint(fields=('user', 'order'), name='saved_search_match_user_order_uniq'),
+        ),
+    ]
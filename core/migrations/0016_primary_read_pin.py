@@ -0,0 +1,23 @@
+# Generated by Django 5.2.7 on 2026-10-17 08:51
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('core', '0015_saved_searches'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PrimaryReadPin',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='+', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('until', models.DateTimeField()),
+            ],
+        ),
+    ]
@@ -1,5 +1,7 @@
 from django.db import models 
 from django.contrib.auth.models import User
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVector, SearchVectorField
 
 ROLE_CHOICES = [
     ('employer', 'Employer'),
@@ -47,10 +49,23 @@ class Profile(models.Model):
    
 
 class Category(models.Model):
+    # счётчик заказов в каждом статусе; job_count — открытые заказы
+    STATUS_COUNTER_FIELDS = {
+        'open': 'job_count',
+        'in_progress': 'in_progress_count',
+        'completed': 'completed_count',
+        'cancelled': 'cancelled_count',
+    }
+
     name = models.CharField(max_length=100)
     description = models.TextField(blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
+    # двигается и при каждом изменении счётчиков (CategoryService)
+    updated_at = models.DateTimeField(auto_now=True)
     job_count = models.IntegerField(default=0)
+    in_progress_count = models.IntegerField(default=0)
+    completed_count = models.IntegerField(default=0)
+    cancelled_count = models.IntegerField(default=0)
 
     class Meta:
         verbose_name_plural = "Categories"
@@ -78,6 +93,41 @@ class Order(models.Model):
     category = models.ForeignKey(Category, on_delete=models.CASCADE, related_name='orders')
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='open')
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    # Поисковый вектор считает сама БД (STORED). 'russian' даёт стемминг,
+    # 'simple' — точные словоформы для казахского, у которого нет словаря.
+    search_vector = models.GeneratedField(
+        expression=(
+            SearchVector('title', config='russian', weight='A')
+            + SearchVector('title', config='simple', weight='A')
+            + SearchVector('description', config='russian', weight='B')
+            + SearchVector('description', config='simple', weight='B')
+        ),
+        output_field=SearchVectorField(),
+        db_persist=True,
+    )
+
+    class Meta:
+        indexes = [
+            # ключ курсорной пагинации (core.pagination.KeysetPagination)
+            models.Index(fields=['created_at', 'id'], name='order_created_id_idx'),
+            models.Index(fields=['category', 'status', 'created_at'], name='order_cat_status_created_idx'),
+            # открытые заказы: счётчик вакансий и лента для воркеров
+            models.Index(
+                fields=['created_at', 'id'],
+                name='order_open_created_idx',
+                condition=models.Q(status='open'),
+            ),
+            GinIndex(fields=['search_vector'], name='order_search_vector_idx'),
+            # MAX(updated_at) для версии списка заказов (ETag)
+            models.Index(fields=['updated_at'], name='order_updated_idx'),
+            # кандидаты в архив (ArchiveService): закрытые заказы по времени закрытия
+            models.Index(
+                fields=['updated_at', 'id'],
+                name='order_closed_updated_idx',
+                condition=models.Q(status__in=['completed', 'cancelled']),
+            ),
+        ]
 
     def __str__(self):
         return f"{self.title} ({self.employer})"
@@ -104,9 +154,15 @@ class OrderApplication(models.Model):
     cover_letter = models.TextField(blank=True)
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         unique_together = ('order', 'worker')  # один воркер = одна заявка на заказ
+        indexes = [
+            models.Index(fields=['created_at', 'id'], name='application_created_id_idx'),
+            models.Index(fields=['worker', 'status'], name='application_worker_status_idx'),
+            models.Index(fields=['order', 'status'], name='application_order_status_idx'),
+        ]
 
     def __str__(self):
         return f"{self.worker} → {self.order.title} ({self.status})"
@@ -120,13 +176,205 @@ class Review(models.Model):
         (5, '⭐⭐⭐⭐⭐'),
     ]
 
-    order = models.OneToOneField(Order, on_delete=models.CASCADE, related_name='reviews')
+    # Отзыв переживает перенос заказа в архив: order_id остаётся прежним,
+    # поэтому внешнего ключа в БД нет, а null=True даёт LEFT JOIN в выборках.
+    # archived_order — та же колонка, но со стороны ArchivedOrder.
+    order = models.OneToOneField(
+        Order, on_delete=models.CASCADE, related_name='reviews', null=True, db_constraint=False
+    )
+    archived_order = models.ForeignObject(
+        'ArchivedOrder', on_delete=models.DO_NOTHING, from_fields=['order'], to_fields=['id'],
+        null=True, related_name='+',
+    )
     reviewer = models.ForeignKey(User, on_delete=models.CASCADE, limit_choices_to={'profile__role': 'employer'})
     worker = models.ForeignKey(User, on_delete=models.CASCADE, related_name='reviews')
     rating = models.IntegerField(choices=RATING_CHOICES)
     comment = models.TextField(blank=True, null=True)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['created_at', 'id'], name='review_created_id_idx'),
+            models.Index(fields=['worker', 'created_at'], name='review_worker_created_idx'),
+        ]
+
     def __str__(self):
         return f"Review by {self.reviewer.username} for {self.worker.username}"
 
+
+class ArchivedOrder(models.Model):
+    """
+    Заказ, закрытый дольше ARCHIVE_AFTER_DAYS и перенесённый из Order
+    (ArchiveService). id сохраняется, поля повторяют Order без поискового
+    вектора, чтобы те же RowSerializer работали и по архиву.
+    """
+    id = models.BigIntegerField(primary_key=True)
+    employer = models.ForeignKey(User, on_delete=models.CASCADE, related_name='archived_orders')
+    title = models.CharField(max_length=200)
+    description = models.TextField()
+    budget = models.DecimalField(max_digits=10, decimal_places=2)
+    category = models.ForeignKey(Category, on_delete=models.CASCADE, related_name='archived_orders')
+    status = models.CharField(max_length=20, choices=Order.STATUS_CHOICES)
+    created_at = models.DateTimeField()
+    updated_at = models.DateTimeField()
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['created_at', 'id'], name='archived_order_created_id_idx'),
+            models.Index(fields=['employer', 'created_at'], name='archived_order_employer_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.title} ({self.employer}, archived)"
+
+
+class ArchivedOrderApplication(models.Model):
+    id = models.BigIntegerField(primary_key=True)
+    order = models.ForeignKey(ArchivedOrder, on_delete=models.CASCADE, related_name='applications')
+    worker = models.ForeignKey(User, on_delete=models.CASCADE, related_name='archived_applications')
+    cover_letter = models.TextField(blank=True)
+    status = models.CharField(max_length=20, choices=OrderApplication.STATUS_CHOICES)
+    created_at = models.DateTimeField()
+    updated_at = models.DateTimeField()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['created_at', 'id'], name='archived_app_created_id_idx'),
+            models.Index(fields=['worker', 'status'], name='archived_app_worker_status_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.worker} → {self.order_id} ({self.status}, archived)"
+
+
+class WorkerReputation(models.Model):
+    """
+    Агрегаты воркера для рейтинга и лидерборда: строка на категорию
+    и итоговая строка с category=NULL. Ведутся инкрементально
+    (ReputationService.apply из create_review и при завершении заказа),
+    город копируется из профиля, чтобы лидерборд по городу шёл по индексу.
+    """
+    worker = models.ForeignKey(User, on_delete=models.CASCADE, related_name='reputation')
+    category = models.ForeignKey(Category, on_delete=models.CASCADE, null=True, blank=True, related_name='+')
+    city = models.CharField(max_length=50, choices=CITY_CHOICES, blank=True, null=True)
+    review_count = models.IntegerField(default=0)
+    rating_sum = models.IntegerField(default=0)
+    rating_1 = models.IntegerField(default=0)
+    rating_2 = models.IntegerField(default=0)
+    rating_3 = models.IntegerField(default=0)
+    rating_4 = models.IntegerField(default=0)
+    rating_5 = models.IntegerField(default=0)
+    average_rating = models.DecimalField(max_digits=3, decimal_places=2, default=0)
+    completed_count = models.IntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            # итоговая строка (category=NULL) тоже одна на воркера
+            models.UniqueConstraint(
+                fields=['worker', 'category'], name='reputation_worker_category_uniq', nulls_distinct=False
+            ),
+        ]
+        indexes = [
+            # лидерборд: ключ курсора (-average_rating, -review_count, -worker)
+            models.Index(
+                fields=['category', '-average_rating', '-review_count', '-worker'], name='reputation_board_idx'
+            ),
+            models.Index(
+                fields=['category', 'city', '-average_rating', '-review_count', '-worker'],
+                name='reputation_city_board_idx',
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.worker} ({self.category or 'all'}): {self.average_rating}"
+
+
+class SavedSearch(models.Model):
+    """
+    Подписка воркера на новые заказы. Пустые category / city значат «любой»,
+    бюджет — интервал [min_budget, max_budget], keywords — все слова должны
+    встретиться в заголовке или описании. Новые заказы сверяются с подписками
+    по индексу saved_search_match_idx (SavedSearchService.match_orders).
+    """
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='saved_searches')
+    name = models.CharField(max_length=100, blank=True)
+    category = models.ForeignKey(Category, on_delete=models.CASCADE, null=True, blank=True, related_name='+')
+    city = models.CharField(max_length=50, choices=CITY_CHOICES, blank=True, null=True)
+    # 0 вместо NULL: нижняя граница всегда участвует в поиске по индексу
+    min_budget = models.DecimalField(max_digits=10, decimal_places=2, default=0)
+    max_budget = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
+    keywords = models.CharField(max_length=200, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            # (категория, город) — ключ инвертированного индекса, min_budget — диапазон внутри ключа
+            models.Index(fields=['category', 'city', 'min_budget'], name='saved_search_match_idx'),
+            models.Index(fields=['user', 'created_at'], name='saved_search_user_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.user}: {self.name or self.keywords or self.pk}"
+
+
+class SavedSearchMatch(models.Model):
+    """Заказ во входящих воркера: один раз на заказ, даже если совпало несколько подписок."""
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='saved_search_matches')
+    search = models.ForeignKey(SavedSearch, on_delete=models.CASCADE, related_name='matches')
+    order = models.ForeignKey(Order, on_delete=models.CASCADE, related_name='+')
+    created_at = models.DateTimeField(auto_now_add=True)
+    read_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'order'], name='saved_search_match_user_order_uniq'),
+        ]
+        indexes = [
+            models.Index(fields=['user', 'created_at', 'id'], name='saved_search_inbox_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.user} <- {self.order_id}"
+
+
+class OrderStats(models.Model):
+    """
+    Строка материализованного представления core_orderstats (миграция 0013):
+    число заказов, средний и медианный бюджет по категории, городу
+    работодателя и статусу, вместе с архивом. Посчитаны все комбинации
+    (GROUP BY CUBE): category_id=0, city='' или status='' значат «все».
+    Город 'unknown' — у работодателя он не указан. Обновляется
+    StatsService.refresh_breakdown (manage.py refresh_order_stats) по
+    расписанию: cron в render.yaml, сервис stats-refresher в docker-compose.yml.
+    """
+    ALL_CATEGORIES = 0
+    ALL = ''
+
+    pk = models.CompositePrimaryKey('category_id', 'city', 'status')
+    category_id = models.BigIntegerField()
+    category_name = models.CharField(max_length=100)
+    city = models.CharField(max_length=50)
+    status = models.CharField(max_length=20)
+    order_count = models.BigIntegerField()
+    avg_budget = models.DecimalField(max_digits=12, decimal_places=2)
+    median_budget = models.DecimalField(max_digits=12, decimal_places=2)
+    refreshed_at = models.DateTimeField()
+
+    class Meta:
+        managed = False
+        db_table = 'core_orderstats'
+
+
+class PrimaryReadPin(models.Model):
+    """
+    До until пользователь читает с default, а не с реплик (core.db_router):
+    после своей записи он видит её, даже если реплика отстаёт. Таблица
+    общая для всех процессов и хостов, читается и пишется только на default.
+    """
+    user = models.OneToOneField(User, on_delete=models.CASCADE, primary_key=True, related_name='+')
+    until = models.DateTimeField()
+
+    def __str__(self):
+        return f"{self.user_id} until {self.until}"
@@ -0,0 +1,171 @@
+import base64
+import binascii
+import json
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """
+    Курсорная пагинация по набору полей (по умолчанию created_at, id).
+
+    Вместо OFFSET страница ищется условием "строго после последней строки",
+    поэтому N-я страница стоит столько же, сколько первая, а вставка новых
+    строк не сдвигает уже выданные страницы. Курсор непрозрачный: base64 от
+    значений ключа последней (или первой) строки и направления.
+    """
+    ordering = ('-created_at', '-id')
+    page_size = api_settings.PAGE_SIZE
+    page_size_query_param = 'page_size'
+    cursor_query_param = 'cursor'
+    invalid_cursor_message = 'Invalid cursor'
+
+    def get_max_page_size(self):
+        return getattr(settings, 'MAX_PAGE_SIZE', 100)
+
+    def get_ordering(self, view):
+        return tuple(getattr(view, 'keyset_ordering', self.ordering))
+
+    def get_page_size(self, request):
+        page_size = self.page_size or self.get_max_page_size()
+        raw = request.query_params.get(self.page_size_query_param)
+        if raw:
+            try:
+                page_size = int(raw)
+            except ValueError:
+                pass
+        return max(1, min(page_size, self.get_max_page_size()))
+
+    def paginate_queryset(self, queryset, request, view=None):
+        queryset, position, reverse = self._prepare(queryset, request, view)
+        return self._finish(list(queryset[:self.page_size + 1]), position, reverse)
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        """То же для async-представлений (core.async_views): страница читается через async ORM."""
+        queryset, position, reverse = self._prepare(queryset, request, view)
+        rows = [row async for row in queryset[:self.page_size + 1]]
+        return self._finish(rows, position, reverse)
+
+    def _prepare(self, queryset, request, view):
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        self.page_size = self.get_page_size(request)
+        self.ordering = self.get_ordering(view)
+        self.fields = [queryset.model._meta.get_field(name.lstrip('-')) for name in self.ordering]
+
+        position, reverse = self.decode_cursor(request)
+        ordering = self._reverse_ordering(self.ordering) if reverse else self.ordering
+
+        queryset = queryset.order_by(*ordering)
+        if position is not None:
+            queryset = queryset.filter(self._seek_filter(ordering, position))
+        return queryset, position, reverse
+
+    def _finish(self, rows, position, reverse):
+        has_more = len(rows) > self.page_size
+        rows = rows[:self.page_size]
+
+        if reverse:
+            rows.reverse()
+            self.has_next = position is not None
+            self.has_previous = has_more
+        else:
+            self.has_next = has_more
+            self.has_previous = position is not None
+
+        self.page = rows
+        return rows
+
+    def get_paginated_response(self, data):
+        return Response(self.get_paginated_data(data))
+
+    def get_paginated_data(self, data):
+        return OrderedDict([
+            ('next', self.get_next_link()),
+            ('previous', self.get_previous_link()),
+            ('results', data),
+        ])
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'previous': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor(self._row_position(self.page[-1]), reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous or not self.page:
+            return None
+        return self.encode_cursor(self._row_position(self.page[0]), reverse=True)
+
+    def encode_cursor(self, position, reverse):
+        payload = {'p': [self._dump_value(value) for value in position]}
+        if reverse:
+            payload['r'] = 1
+        token = base64.urlsafe_b64encode(json.dumps(payload, separators=(',', ':')).encode()).decode()
+        return replace_query_param(self.base_url, self.cursor_query_param, token)
+
+    def decode_cursor(self, request):
+        token = request.query_params.get(self.cursor_query_param)
+        if not token:
+            return None, False
+
+        try:
+            payload = json.loads(base64.urlsafe_b64decode(token.encode()))
+            values = payload['p']
+            if len(values) != len(self.fields):
+                raise ValueError
+            position = [field.to_python(value) for field, value in zip(self.fields, values)]
+        except (TypeError, ValueError, KeyError, binascii.Error, DjangoValidationError):
+            raise NotFound(self.invalid_cursor_message)
+
+        return position, bool(payload.get('r'))
+
+    def _row_position(self, row):
+        # строки бывают моделями или dict из .values() (core.serializers.RowSerializer)
+        if isinstance(row, dict):
+            return [row[field.name] for field in self.fields]
+        return [getattr(row, field.attname) for field in self.fields]
+
+    @staticmethod
+    def _dump_value(value):
+        if hasattr(value, 'isoformat'):
+            return value.isoformat()
+        if isinstance(value, (int, float, str)) or value is None:
+            return value
+        return str(value)
+
+    @staticmethod
+    def _reverse_ordering(ordering):
+        return tuple(name[1:] if name.startswith('-') else f'-{name}' for name in ordering)
+
+    def _seek_filter(self, ordering, position):
+        # (a, b) после (x, y) при сортировке по убыванию: a < x OR (a = x AND b < y)
+        condition = Q()
+        for index, name in enumerate(ordering):
+            lookup = 'lt' if name.startswith('-') else 'gt'
+            branch = Q(**{f'{name.lstrip("-")}__{lookup}': position[index]})
+            for prev_name, prev_value in zip(ordering[:index], position[:index]):
+                branch &= Q(**{prev_name.lstrip('-'): prev_value})
+            condition |= branch
+        return condition
+
+    def get_results(self, data):
+        return data['results']
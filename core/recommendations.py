@@ -0,0 +1,259 @@
+"""
+Рекомендованные открытые заказы для воркера (/api/v1/orders/recommended/).
+
+Открытые заказы лежат в памяти процесса столбцами numpy (OpenOrderMatrix):
+id, категория, город работодателя, log(бюджет) и время создания. Матрица
+дочитывается по индексу order_updated_idx: раз в RECOMMENDATIONS_REFRESH_INTERVAL
+берутся заказы с updated_at не старше последнего увиденного (с запасом на
+транзакции, закоммиченные позже), удаление и уход из open видны по сумме
+счётчиков категорий. Если сумма не сошлась или прошло RECOMMENDATIONS_FULL_RELOAD
+секунд — матрица перечитывается целиком.
+
+Признаки воркера (WorkerFeatures) — вес категорий по его заявкам (принятые
+весят больше), город из профиля и типичный бюджет — кэшируются на
+RECOMMENDATIONS_FEATURES_TTL. Оценка всех заказов — несколько векторных
+операций, топ берётся argpartition, так что ранжирование 100k заказов
+занимает единицы миллисекунд. Заказы, на которые воркер уже откликнулся,
+исключаются при каждом запросе.
+"""
+import math
+import threading
+import time
+from datetime import timedelta
+
+import numpy as np
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+from django.db.models import Sum
+from django.utils import timezone
+
+from .models import CITY_CHOICES, Category, Order, OrderApplication, Profile
+
+# 0 — город не указан
+CITY_CODES = {code: index for index, (code, _) in enumerate(CITY_CHOICES, start=1)}
+
+WEIGHTS = {
+    'category': 3.0,
+    'city': 1.0,
+    'budget': 1.0,
+    'recency': 1.0,
+}
+RECENCY_HALF_LIFE = timedelta(days=3).total_seconds()
+# заявки, по которым считаются признаки воркера
+HISTORY_SIZE = 200
+# минимальный разброс log(бюджета): иначе при одной заявке подходит только точно такой бюджет
+MIN_BUDGET_SPREAD = 0.35
+# запас назад от последнего updated_at: строки транзакций, закоммиченных позже
+REFRESH_OVERLAP = timedelta(seconds=5)
+
+
+def _log_budget(budget):
+    return math.log(max(float(budget), 1.0))
+
+
+class OpenOrders:
+    """Неизменяемый снимок открытых заказов; матрица подменяет его целиком."""
+
+    def __init__(self, ids, category, city, log_budget, created):
+        self.ids = ids
+        self.category = category
+        self.city = city
+        self.log_budget = log_budget
+        self.created = created
+
+    @classmethod
+    def from_rows(cls, rows):
+        """rows: (id, category_id, город работодателя, бюджет, created_at)."""
+        return cls(
+            np.fromiter((row[0] for row in rows), dtype=np.int64, count=len(rows)),
+            np.fromiter((row[1] for row in rows), dtype=np.int64, count=len(rows)),
+            np.fromiter((CITY_CODES.get(row[2], 0) for row in rows), dtype=np.int16, count=len(rows)),
+            np.fromiter((_log_budget(row[3]) for row in rows), dtype=np.float64, count=len(rows)),
+            np.fromiter((row[4].timestamp() for row in rows), dtype=np.float64, count=len(rows)),
+        )
+
+    def replace(self, changed_ids, rows):
+        """Новый снимок: строки changed_ids убраны, rows (открытые из них) добавлены."""
+        keep = ~np.isin(self.ids, np.fromiter(changed_ids, dtype=np.int64, count=len(changed_ids)))
+        added = OpenOrders.from_rows(rows)
+        return OpenOrders(*(
+            np.concatenate((getattr(self, name)[keep], getattr(added, name)))
+            for name in ('ids', 'category', 'city', 'log_budget', 'created')
+        ))
+
+    def __len__(self):
+        return len(self.ids)
+
+
+class OpenOrderMatrix:
+    """
+    Открытые заказы процесса с инкрементальным дочитыванием (см. модуль).
+    Читает всегда с default: дочитывание по updated_at с отстающей реплики
+    теряло бы строки (core.db_router).
+    """
+    columns = ('id', 'category_id', 'employer__profile__city', 'budget', 'created_at')
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        self.snapshot = None
+        self._watermark = None
+        # расхождение счётчиков категорий с матрицей сразу после полной загрузки
+        self._counter_offset = 0
+        self._checked_at = 0.0
+        self._loaded_at = 0.0
+
+    def get(self):
+        now = time.monotonic()
+        if self.snapshot is not None and now - self._checked_at < settings.RECOMMENDATIONS_REFRESH_INTERVAL:
+            return self.snapshot
+        # обновляет один поток, остальные берут текущий снимок
+        if not self._lock.acquire(blocking=self.snapshot is None):
+            return self.snapshot
+        try:
+            if self.snapshot is None or now - self._loaded_at >= settings.RECOMMENDATIONS_FULL_RELOAD:
+                self._load()
+            elif time.monotonic() - self._checked_at >= settings.RECOMMENDATIONS_REFRESH_INTERVAL:
+                self._refresh()
+            return self.snapshot
+        finally:
+            self._lock.release()
+
+    @staticmethod
+    def _open_counter():
+        return Category.objects.using(DEFAULT_DB_ALIAS).aggregate(total=Sum('job_count'))['total'] or 0
+
+    def _load(self):
+        started_at = timezone.now()
+        rows = list(Order.objects.using(DEFAULT_DB_ALIAS).filter(status='open').values_list(*self.columns))
+        self.snapshot = OpenOrders.from_rows(rows)
+        self._watermark = started_at
+        self._counter_offset = self._open_counter() - len(self.snapshot)
+        self._loaded_at = self._checked_at = time.monotonic()
+
+    def _refresh(self):
+        changes = list(
+            Order.objects.using(DEFAULT_DB_ALIAS).filter(updated_at__gte=self._watermark - REFRESH_OVERLAP)
+            .values_list('status', 'updated_at', *self.columns)
+        )
+        if changes:
+            self._watermark = max(self._watermark, max(row[1] for row in changes))
+            self.snapshot = self.snapshot.replace(
+                {row[2] for row in changes}, [row[2:] for row in changes if row[0] == 'open']
+            )
+        if self._open_counter() - len(self.snapshot) != self._counter_offset:
+            # удалённые заказы дочитыванием не видны
+            self._load()
+        self._checked_at = time.monotonic()
+
+
+class WorkerFeatures:
+
+    def __init__(self, category_weights, city, budget_mean, budget_spread):
+        self.category_weights = category_weights
+        self.city = city
+        self.budget_mean = budget_mean
+        self.budget_spread = budget_spread
+
+    @classmethod
+    def load(cls, worker_id):
+        history = list(
+            OrderApplication.objects.filter(worker_id=worker_id)
+            .order_by('-created_at')
+            .values_list('order__category_id', 'status', 'order__budget')[:HISTORY_SIZE]
+        )
+        city = Profile.objects.filter(user_id=worker_id).values_list('city', flat=True).first()
+        weights = {}
+        for category_id, status, _ in history:
+            weights[category_id] = weights.get(category_id, 0) + (3 if status == 'accepted' else 1)
+        top = max(weights.values(), default=1)
+
+        budgets = np.array([_log_budget(budget) for _, _, budget in history], dtype=np.float64)
+        budget_mean = float(budgets.mean()) if len(budgets) else None
+        budget_spread = max(float(budgets.std()), MIN_BUDGET_SPREAD) if len(budgets) else None
+        return cls(
+            {category_id: weight / top for category_id, weight in weights.items()},
+            CITY_CODES.get(city, 0), budget_mean, budget_spread,
+        )
+
+
+class WorkerFeatureCache:
+    """Признаки воркеров с TTL; при переполнении вытесняются самые старые."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries = {}
+
+    def get(self, worker_id):
+        entry = self._entries.get(worker_id)
+        if entry is not None and time.monotonic() < entry[0]:
+            return entry[1]
+        features = WorkerFeatures.load(worker_id)
+        with self._lock:
+            self._entries.pop(worker_id, None)
+            while len(self._entries) >= settings.RECOMMENDATIONS_FEATURES_CACHE_SIZE:
+                self._entries.pop(next(iter(self._entries)))
+            self._entries[worker_id] = (time.monotonic() + settings.RECOMMENDATIONS_FEATURES_TTL, features)
+        return features
+
+    def invalidate(self, worker_id=None):
+        with self._lock:
+            if worker_id is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(worker_id, None)
+
+
+def score(orders, features, now=None):
+    """Оценка каждого заказа снимка для воркера, float64 той же длины."""
+    now = time.time() if now is None else now
+    scores = np.zeros(len(orders), dtype=np.float64)
+    if not len(orders):
+        return scores
+
+    if features.category_weights:
+        affinity = np.zeros(int(orders.category.max()) + 1, dtype=np.float64)
+        for category_id, weight in features.category_weights.items():
+            if category_id < len(affinity):
+                affinity[category_id] = weight
+        scores += WEIGHTS['category'] * affinity[orders.category]
+    if features.city:
+        scores += WEIGHTS['city'] * (orders.city == features.city)
+    if features.budget_mean is not None:
+        distance = (orders.log_budget - features.budget_mean) / features.budget_spread
+        scores += WEIGHTS['budget'] * np.exp(-0.5 * distance * distance)
+    age = np.maximum(now - orders.created, 0.0)
+    scores += WEIGHTS['recency'] * np.exp2(-age / RECENCY_HALF_LIFE)
+    return scores
+
+
+def top_orders(orders, scores, limit, exclude=()):
+    """(id, оценка) лучших limit заказов, при равной оценке новее — выше."""
+    if exclude:
+        scores = scores.copy()
+        scores[np.isin(orders.ids, np.fromiter(exclude, dtype=np.int64, count=len(exclude)))] = -np.inf
+    candidates = np.flatnonzero(np.isfinite(scores))
+    if len(candidates) > limit:
+        candidates = candidates[np.argpartition(-scores[candidates], limit - 1)[:limit]]
+    ranked = candidates[np.lexsort((-orders.ids[candidates], -scores[candidates]))]
+    return [(int(orders.ids[index]), float(scores[index])) for index in ranked]
+
+
+open_orders = OpenOrderMatrix()
+worker_features = WorkerFeatureCache()
+
+
+def recommend(worker_id, limit):
+    """Лучшие открытые заказы для воркера: [(order_id, оценка)], по убыванию оценки."""
+    orders = open_orders.get()
+    applied = set(
+        OrderApplication.objects.filter(worker_id=worker_id, order__status='open').values_list('order_id', flat=True)
+    )
+    return top_orders(orders, score(orders, worker_features.get(worker_id)), limit, applied)
+
+
+def reset():
+    open_orders.reset()
+    worker_features.invalidate()
@@ -0,0 +1,79 @@
+import datetime
+import decimal
+
+import orjson
+from django.http import StreamingHttpResponse
+from django.utils.functional import Promise
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+
+from .metrics import serialize_timer
+
+ORJSON_OPTIONS = orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS
+
+
+def _default(obj):
+    # то, чего orjson не умеет сам; поведение как у rest_framework.utils.encoders.JSONEncoder
+    if isinstance(obj, Promise):
+        return str(obj)
+    if isinstance(obj, decimal.Decimal):
+        return float(obj)
+    if isinstance(obj, datetime.timedelta):
+        return str(obj.total_seconds())
+    if isinstance(obj, bytes):
+        return obj.decode()
+    if hasattr(obj, 'tolist'):
+        return obj.tolist()
+    if hasattr(obj, '__iter__'):
+        return list(obj)
+    raise TypeError(f'Object of type {type(obj).__name__} is not JSON serializable')
+
+
+def dumps(data):
+    return orjson.dumps(data, default=_default, option=ORJSON_OPTIONS)
+
+
+class ORJSONRenderer(JSONRenderer):
+    """JSONRenderer на orjson: Decimal, datetime и ленивые строки без json.JSONEncoder."""
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        option = ORJSON_OPTIONS
+        if self.get_indent(accepted_media_type, renderer_context or {}):
+            option |= orjson.OPT_INDENT_2
+        with serialize_timer():
+            return orjson.dumps(data, default=_default, option=option)
+
+
+class ORJSONParser(JSONParser):
+    renderer_class = ORJSONRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        try:
+            return orjson.loads(stream.read())
+        except orjson.JSONDecodeError as exc:
+            raise ParseError(f'JSON parse error - {exc}')
+
+
+def iter_json_array(rows, chunk_size=500):
+    """Отдаёт JSON-массив кусками по chunk_size элементов, не держа весь ответ в памяти."""
+    yield b'['
+    separator = b''
+    chunk = []
+    for row in rows:
+        chunk.append(dumps(row))
+        if len(chunk) >= chunk_size:
+            yield separator + b','.join(chunk)
+            separator = b','
+            chunk = []
+    if chunk:
+        yield separator + b','.join(chunk)
+    yield b']'
+
+
+class JSONArrayStreamingResponse(StreamingHttpResponse):
+    def __init__(self, rows, chunk_size=500, **kwargs):
+        kwargs.setdefault('content_type', 'application/json')
+        super().__init__(iter_json_array(rows, chunk_size), **kwargs)
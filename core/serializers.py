@@ -1,7 +1,13 @@
 from rest_framework import serializers
+from django.conf import settings
 from django.contrib.auth.models import User
-from .models import Profile, Order, OrderApplication, Category, ROLE_CHOICES, Review
+from django.db.models import F
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+from .metrics import serialize_timer
+from .models import Profile, Order, OrderApplication, Category, ROLE_CHOICES, CITY_CHOICES, Review, WorkerReputation, SavedSearch
 from django.contrib.auth.password_validation import validate_password
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
 
 
 class RegisterSerializer(serializers.ModelSerializer):
@@ -25,6 +31,20 @@ class RegisterSerializer(serializers.ModelSerializer):
         Profile.objects.create(user=user, role=role)
         return user
     
+class WorkifyTokenObtainPairSerializer(TokenObtainPairSerializer):
+    """Кладёт роль и id профиля в токен, чтобы чтение обходилось без запросов к профилю."""
+
+    @classmethod
+    def get_token(cls, user):
+        token = super().get_token(user)
+        profile = Profile.objects.filter(user=user).only('id', 'role').first()
+        token['username'] = user.username
+        token['is_staff'] = user.is_staff
+        token['role'] = profile.role if profile else None
+        token['profile_id'] = profile.id if profile else None
+        return token
+
+
 class CategorySerializer(serializers.ModelSerializer):
     class Meta:
         model = Category
@@ -42,6 +62,74 @@ class OrderSerializer(serializers.ModelSerializer):
         read_only_fields = ('status', 'created_at')
 
 
+class BulkOrderRowSerializer(serializers.Serializer):
+    """
+    Строка массового создания заказов. Без запросов в БД: категории
+    проверяются пачкой в core.importers.
+    """
+    title = serializers.CharField(max_length=200)
+    description = serializers.CharField()
+    budget = serializers.DecimalField(max_digits=10, decimal_places=2)
+    category = serializers.IntegerField(min_value=1)
+
+
+class OrderFilterSerializer(serializers.Serializer):
+    """Параметры фильтрации /orderlist/ из query string."""
+    category = serializers.IntegerField(required=False)
+    status = serializers.ChoiceField(choices=Order.STATUS_CHOICES, required=False)
+    city = serializers.ChoiceField(choices=CITY_CHOICES, required=False)
+    budget_min = serializers.DecimalField(max_digits=10, decimal_places=2, required=False)
+    budget_max = serializers.DecimalField(max_digits=10, decimal_places=2, required=False)
+    created_after = serializers.DateTimeField(required=False)
+    created_before = serializers.DateTimeField(required=False)
+
+
+class StatsBreakdownSerializer(serializers.Serializer):
+    """Параметры разбивки /stats/: by=category,city,status и фильтры по тем же измерениям."""
+    DIMENSIONS = ('category', 'city', 'status')
+
+    by = serializers.CharField(required=False, allow_blank=True)
+    category = serializers.IntegerField(min_value=1, required=False)
+    city = serializers.ChoiceField(choices=CITY_CHOICES + [('unknown', 'Не указан')], required=False)
+    status = serializers.ChoiceField(choices=Order.STATUS_CHOICES, required=False)
+
+    def validate_by(self, value):
+        dimensions = [item.strip() for item in value.split(',') if item.strip()]
+        unknown = [item for item in dimensions if item not in self.DIMENSIONS]
+        if unknown:
+            raise serializers.ValidationError(f'Unknown dimensions: {", ".join(unknown)}')
+        return tuple(dict.fromkeys(dimensions))
+
+
+class LeaderboardFilterSerializer(serializers.Serializer):
+    category = serializers.IntegerField(min_value=1, required=False)
+    city = serializers.ChoiceField(choices=CITY_CHOICES, required=False)
+
+
+class BulkApplicationActionSerializer(serializers.Serializer):
+    action = serializers.ChoiceField(choices=['accept', 'reject'])
+    application_ids = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        allow_empty=False,
+        max_length=1000,
+    )
+
+
+class BatchItemSerializer(serializers.Serializer):
+    id = serializers.CharField(max_length=100, required=False)
+    method = serializers.ChoiceField(choices=['GET', 'POST', 'PUT', 'PATCH', 'DELETE'], default='GET')
+    path = serializers.RegexField(r'^/api/v1/', max_length=2000)
+    headers = serializers.DictField(child=serializers.CharField(max_length=200), required=False)
+    body = serializers.JSONField(required=False)
+
+
+class BatchSerializer(serializers.Serializer):
+    requests = serializers.ListField(
+        child=BatchItemSerializer(), allow_empty=False, max_length=settings.BATCH_MAX_REQUESTS
+    )
+    parallel = serializers.BooleanField(default=False)
+
+
 class OrderApplicationSerializerForEmployer(serializers.ModelSerializer):
     worker_username = serializers.CharField(source='worker.username', read_only=True)
     worker_email = serializers.CharField(source='worker.email', read_only=True)
@@ -69,6 +157,35 @@ class ProfileSerializer(serializers.ModelSerializer):
         model = Profile
         fields = '__all__'
 
+class SavedSearchSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = SavedSearch
+        fields = ['id', 'name', 'category', 'city', 'min_budget', 'max_budget', 'keywords', 'created_at']
+        read_only_fields = ('created_at',)
+
+    def validate(self, attrs):
+        max_budget = attrs.get('max_budget')
+        if max_budget is not None and max_budget < attrs.get('min_budget', 0):
+            raise serializers.ValidationError({'max_budget': 'Must not be less than min_budget'})
+        return attrs
+
+
+class InboxReadSerializer(serializers.Serializer):
+    # без ids — отметить прочитанными все входящие
+    ids = serializers.ListField(child=serializers.IntegerField(min_value=1), required=False, max_length=1000)
+
+
+class WorkerReputationSerializer(serializers.ModelSerializer):
+    worker_username = serializers.CharField(source='worker.username', read_only=True)
+
+    class Meta:
+        model = WorkerReputation
+        fields = [
+            'worker', 'worker_username', 'category', 'city', 'average_rating', 'review_count',
+            'rating_1', 'rating_2', 'rating_3', 'rating_4', 'rating_5', 'completed_count',
+        ]
+
+
 class ReviewSerializer(serializers.ModelSerializer):
     reviewer_username = serializers.CharField(source='reviewer.username', read_only=True)
     worker_username = serializers.CharField(source='worker.username', read_only=True)
@@ -100,3 +217,162 @@ class ReviewSerializer(serializers.ModelSerializer):
             raise serializers.ValidationError({'rating': 'Rating must be between 1 and 5.'})
         
         return attrs
+
+
+def _decimal_to_str(value, tz):
+    return None if value is None else format(value, 'f')
+
+
+def _datetime_to_str(value, tz):
+    # как DRF DateTimeField: в текущую таймзону, ISO 8601, UTC как 'Z'
+    if value is None:
+        return None
+    value = value.astimezone(tz).isoformat()
+    if value.endswith('+00:00'):
+        value = value[:-6] + 'Z'
+    return value
+
+
+class RowSerializer:
+    """
+    Быстрый путь для списков: строки читаются через .values() без создания
+    моделей, а dict ответа собирает функция, скомпилированная один раз на
+    класс. Формат совпадает с соответствующим ModelSerializer
+    (см. RowSerializerParityTestCase).
+
+    fields — кортеж (имя в ответе, путь в ORM или выражение, конвертер или None).
+    Конвертер получает значение и текущую таймзону, которая берётся один
+    раз на serialize(): timezone.get_current_timezone() на каждую строку
+    стоит дороже самой конвертации.
+    """
+    fields = ()
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls.to_dict = staticmethod(cls._compile(cls.fields))
+
+    @staticmethod
+    def _compile(fields):
+        namespace = {}
+        items = []
+        for index, (name, path, converter) in enumerate(fields):
+            if converter is None:
+                items.append(f'{name!r}: row[{name!r}]')
+            else:
+                namespace[f'_convert{index}'] = converter
+                items.append(f'{name!r}: _convert{index}(row[{name!r}], tz)')
+        source = 'def to_dict(row, tz):\n    return {' + ', '.join(items) + '}\n'
+        exec(source, namespace)
+        return namespace['to_dict']
+
+    @classmethod
+    def project(cls, queryset):
+        plain = [name for name, path, _ in cls.fields if name == path]
+        aliased = {
+            name: F(path) if isinstance(path, str) else path
+            for name, path, _ in cls.fields if name != path
+        }
+        return queryset.prefetch_related(None).values(*plain, **aliased)
+
+    @classmethod
+    def serialize(cls, rows):
+        to_dict = cls.to_dict
+        tz = timezone.get_current_timezone()
+        with serialize_timer():
+            return [to_dict(row, tz) for row in rows]
+
+    @classmethod
+    def iter_serialize(cls, rows):
+        to_dict = cls.to_dict
+        tz = timezone.get_current_timezone()
+        for row in rows:
+            yield to_dict(row, tz)
+
+
+class OrderRowSerializer(RowSerializer):
+    fields = (
+        ('id', 'id', None),
+        ('employer_username', 'employer__username', None),
+        ('title', 'title', None),
+        ('description', 'description', None),
+        ('budget', 'budget', _decimal_to_str),
+        ('category', 'category', None),
+        ('category_name', 'category__name', None),
+        ('status', 'status', None),
+        ('created_at', 'created_at', _datetime_to_str),
+    )
+
+
+class OrderApplicationRowSerializerForEmployer(RowSerializer):
+    fields = (
+        ('id', 'id', None),
+        ('order', 'order', None),
+        ('order_title', 'order__title', None),
+        ('worker', 'worker', None),
+        ('worker_username', 'worker__username', None),
+        ('worker_email', 'worker__email', None),
+        ('cover_letter', 'cover_letter', None),
+        ('status', 'status', None),
+        ('created_at', 'created_at', _datetime_to_str),
+    )
+
+
+class OrderApplicationRowSerializer(RowSerializer):
+    fields = (
+        ('id', 'id', None),
+        ('order', 'order', None),
+        ('order_title', 'order__title', None),
+        ('order_budget', 'order__budget', _decimal_to_str),
+        ('employer_username', 'order__employer__username', None),
+        ('cover_letter', 'cover_letter', None),
+        ('status', 'status', None),
+        ('created_at', 'created_at', _datetime_to_str),
+    )
+
+
+class ReviewRowSerializer(RowSerializer):
+    fields = (
+        ('id', 'id', None),
+        ('order', 'order', None),
+        # у отзыва на заказ из архива строки в core_order уже нет
+        ('order_title', Coalesce('order__title', 'archived_order__title'), None),
+        ('reviewer', 'reviewer', None),
+        ('reviewer_username', 'reviewer__username', None),
+        ('worker', 'worker', None),
+        ('worker_username', 'worker__username', None),
+        ('rating', 'rating', None),
+        ('comment', 'comment', None),
+        ('created_at', 'created_at', _datetime_to_str),
+    )
+
+
+class WorkerReputationRowSerializer(RowSerializer):
+    fields = (
+        ('worker', 'worker', None),
+        ('worker_username', 'worker__username', None),
+        ('category', 'category', None),
+        ('city', 'city', None),
+        ('average_rating', 'average_rating', _decimal_to_str),
+        ('review_count', 'review_count', None),
+        ('rating_1', 'rating_1', None),
+        ('rating_2', 'rating_2', None),
+        ('rating_3', 'rating_3', None),
+        ('rating_4', 'rating_4', None),
+        ('rating_5', 'rating_5', None),
+        ('completed_count', 'completed_count', None),
+    )
+
+
+class SavedSearchMatchRowSerializer(RowSerializer):
+    fields = (
+        ('id', 'id', None),
+        ('order', 'order', None),
+        ('order_title', 'order__title', None),
+        ('order_budget', 'order__budget', _decimal_to_str),
+        ('order_status', 'order__status', None),
+        ('category', 'order__category', None),
+        ('search', 'search', None),
+        ('search_name', 'search__name', None),
+        ('created_at', 'created_at', _datetime_to_str),
+        ('read_at', 'read_at', _datetime_to_str),
+    )
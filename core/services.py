@@ -1,8 +1,28 @@
+import time
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
 from django.contrib.auth.models import User
-from django.db import transaction
-from django.db.models import F
+from django.contrib.postgres.search import SearchQuery, SearchRank
+from django.db import connection, connections, transaction
+from django.db.models import Case, CharField, Count, F, IntegerField, Max, Sum, Value, When
+from django.utils import timezone
 from rest_framework.exceptions import ValidationError
-from .models import Order, OrderApplication, Profile, Review, Category
+from . import events
+from .cache import SingleFlightCache
+from .models import (
+    ArchivedOrder, ArchivedOrderApplication, Category, Order, OrderApplication, OrderStats, Profile, Review,
+    SavedSearch, SavedSearchMatch, WorkerReputation
+)
+
+# Корзины бюджета для фасетов: (ключ, от включительно, до не включительно)
+BUDGET_BUCKETS = [
+    ('0-10000', 0, 10000),
+    ('10000-50000', 10000, 50000),
+    ('50000-100000', 50000, 100000),
+    ('100000+', 100000, None),
+]
 
 
 class UserService:
@@ -25,27 +45,141 @@ class OrderService:
         return queryset
     
     @staticmethod
-    def get_user_orders(user):
-        return Order.objects.filter(employer=user).select_related('employer', 'category')
+    def get_filtered_orders(filters):
+        queryset = OrderService.get_orders_by_category(filters.get('category'))
+
+        if filters.get('status'):
+            queryset = queryset.filter(status=filters['status'])
+        if filters.get('city'):
+            queryset = queryset.filter(employer__profile__city=filters['city'])
+        if filters.get('budget_min') is not None:
+            queryset = queryset.filter(budget__gte=filters['budget_min'])
+        if filters.get('budget_max') is not None:
+            queryset = queryset.filter(budget__lte=filters['budget_max'])
+        if filters.get('created_after'):
+            queryset = queryset.filter(created_at__gte=filters['created_after'])
+        if filters.get('created_before'):
+            queryset = queryset.filter(created_at__lt=filters['created_before'])
+
+        return queryset
+
+    @staticmethod
+    def get_order_facets(queryset):
+        """Счётчики по категориям, городам и корзинам бюджета одним запросом (GROUPING SETS)."""
+        bucket = Case(
+            *[
+                When(budget__gte=low, then=Value(name)) if high is None
+                else When(budget__gte=low, budget__lt=high, then=Value(name))
+                for name, low, high in BUDGET_BUCKETS
+            ],
+            output_field=CharField(),
+        )
+        inner_sql, params = queryset.order_by().values_list(
+            'category_id', 'employer__profile__city', bucket
+        ).query.sql_with_params()
+
+        sql = f'''
+            SELECT GROUPING(category_id), GROUPING(city), category_id, city, bucket, COUNT(*)
+            FROM ({inner_sql}) AS facet_rows (category_id, city, bucket)
+            GROUP BY GROUPING SETS ((category_id), (city), (bucket))
+            ORDER BY COUNT(*) DESC
+        '''
+        facets = {'category': [], 'city': [], 'budget': []}
+        # тем же соединением, что и сам список (реплика в GET-запросах, core.db_router)
+        with connections[queryset.db].cursor() as cursor:
+            cursor.execute(sql, params)
+            for no_category, no_city, category_id, city, bucket_name, count in cursor.fetchall():
+                if not no_category:
+                    facets['category'].append({'value': category_id, 'count': count})
+                elif not no_city:
+                    facets['city'].append({'value': city, 'count': count})
+                else:
+                    facets['budget'].append({'value': bucket_name, 'count': count})
+        return facets
+
+    @staticmethod
+    def search_orders(query, category=None):
+        # русская конфигурация ловит словоформы, simple — казахские слова как есть
+        search_query = (
+            SearchQuery(query, config='russian', search_type='websearch')
+            | SearchQuery(query, config='simple', search_type='websearch')
+        )
+        queryset = Order.objects.filter(search_vector=search_query).select_related('employer', 'category')
+        if category:
+            queryset = queryset.filter(category=category)
+        return queryset.annotate(
+            rank=SearchRank(F('search_vector'), search_query)
+        ).order_by('-rank', '-created_at', '-id')
+
+    @staticmethod
+    def get_user_orders(user, archived=False):
+        model = ArchivedOrder if archived else Order
+        return model.objects.filter(employer_id=user.pk).select_related('employer', 'category')
     
     @staticmethod
     @transaction.atomic
     def create_order(validated_data):
         order = Order.objects.create(**validated_data)
-        Category.objects.filter(id=order.category.id).update(job_count=F('job_count') + 1)
+        CategoryService.apply_status_change(order.category_id, new_status=order.status)
+        SavedSearchService.match_orders([order.pk])
+        transaction.on_commit(StatsService.invalidate)
         return order
     
+    @staticmethod
+    @transaction.atomic
+    def bulk_create_orders(employer, rows, batch_size=1000):
+        """
+        Пакетная версия create_order для уже проверенных строк (title,
+        description, budget, category_id): INSERT пачками по batch_size и один
+        UPDATE счётчиков категорий на весь вызов.
+        """
+        orders = Order.objects.bulk_create(
+            [Order(employer=employer, status='open', **row) for row in rows], batch_size=batch_size
+        )
+        deltas = defaultdict(int)
+        for order in orders:
+            deltas[(order.category_id, order.status)] += 1
+        CategoryService.apply_status_deltas(deltas)
+        SavedSearchService.match_orders([order.pk for order in orders])
+        transaction.on_commit(StatsService.invalidate)
+        return orders
+
     @staticmethod
     @transaction.atomic
     def delete_order(order, user):
         if order.employer != user:
             raise ValidationError('You do not have permission to delete this order')
         
-        category_id = order.category.id
+        category_id, old_status = order.category_id, order.status
+        # отзывы и выполнение уходят вместе с заказом — вычитаем их из WorkerReputation
+        reviews = list(Review.objects.filter(order=order).values_list('worker_id', 'rating'))
+        completed = []
+        if old_status == 'completed':
+            completed = list(
+                OrderApplication.objects.filter(order=order, status='accepted').values_list('worker_id', flat=True)
+            )
         order.delete()
-        Category.objects.filter(id=category_id).update(job_count=F('job_count') - 1)
+        for worker_id, rating in reviews:
+            ReputationService.apply(worker_id, category_id, rating=rating, sign=-1)
+        for worker_id in completed:
+            ReputationService.apply(worker_id, category_id, completed=1, sign=-1)
+        CategoryService.apply_status_change(category_id, old_status=old_status)
+        transaction.on_commit(StatsService.invalidate)
 
     @staticmethod
+    def _transition_status(order, new_status):
+        # compare-and-set: счётчики двигаются только если переход действительно произошёл
+        old_status = order.status
+        updated = Order.objects.filter(pk=order.pk, status=old_status).update(status=new_status, updated_at=timezone.now())
+        if not updated:
+            raise ValidationError('Order status was changed by another request, reload and try again')
+        order.status = new_status
+        CategoryService.apply_status_change(order.category_id, old_status, new_status)
+        transaction.on_commit(StatsService.invalidate)
+        return order
+
+    @staticmethod
+    @transaction.atomic
     def update_order_status(order, new_status, user):
         if order.employer != user:
             raise ValidationError('You do not have permission to manage this order')
@@ -67,42 +201,243 @@ class OrderService:
                 f'Valid transitions: {valid_transitions.get(order.status, [])}'
             )
         
-        order.status = new_status
-        order.save()
+        OrderService._transition_status(order, new_status)
+        workers = list(
+            OrderApplication.objects.filter(order=order, status='accepted').values_list('worker_id', flat=True)
+        )
+        if new_status == 'completed':
+            for worker_id in workers:
+                ReputationService.apply(worker_id, order.category_id, completed=1)
+        events.publish([OrderService._status_event(order, [order.employer_id, *workers])])
         return order
+
+    @staticmethod
+    def _status_event(order, user_ids):
+        return user_ids, 'order.status', {'order': order.pk, 'status': order.status}
     
     @staticmethod
-    def get_worker_accepted_orders(user):
-        return Order.objects.filter(
-            applications__worker=user,
+    def get_worker_accepted_orders(user, archived=False):
+        model = ArchivedOrder if archived else Order
+        return model.objects.filter(
+            applications__worker_id=user.pk,
             applications__status='accepted'
         ).distinct().select_related('employer', 'category')
 
+    @staticmethod
+    def get_orders_version():
+        """
+        Версия всей ленты заказов без прохода по таблице: MAX(updated_at)
+        по индексу и сумма счётчиков категорий вместо COUNT(*). Создание,
+        удаление и смена статуса заказа двигают и счётчики, и updated_at
+        категории, поэтому фильтрованные выдачи тоже покрываются этой версией.
+        Перенос в архив счётчики не меняет, но тоже двигает updated_at категорий.
+        """
+        last_order = Order.objects.aggregate(last_modified=Max('updated_at'))['last_modified']
+        categories = Category.objects.aggregate(
+            count=Sum(sum((F(field) for field in Category.STATUS_COUNTER_FIELDS.values()), Value(0))),
+            categories=Count('id'),
+            last_modified=Max('updated_at'),
+        )
+        stamps = [stamp for stamp in (last_order, categories['last_modified']) if stamp]
+        return {
+            'count': categories['count'] or 0,
+            'categories': categories['categories'],
+            'last_modified': max(stamps) if stamps else None,
+        }
+
     @staticmethod
     def get_total_job_count():
         return Order.objects.filter(status='open').count()
 
 
+class StatsService:
+    @staticmethod
+    def _load_job_stats():
+        return {
+            'total_jobs': OrderService.get_total_job_count(),
+            'total_categories': Category.objects.count(),
+        }
+
+    @staticmethod
+    def get_job_stats():
+        return _job_stats_cache.get()
+
+    @staticmethod
+    def invalidate():
+        _job_stats_cache.invalidate()
+
+    BREAKDOWN_DIMENSIONS = (
+        # (параметр, колонка OrderStats, значение «все»)
+        ('category', 'category_id', OrderStats.ALL_CATEGORIES),
+        ('city', 'city', OrderStats.ALL),
+        ('status', 'status', OrderStats.ALL),
+    )
+
+    @staticmethod
+    def get_breakdown(by=(), category=None, city=None, status=None):
+        """
+        Разбивка из готового core_orderstats одним запросом по уникальному
+        индексу: измерения из by идут строками, остальные берутся из
+        строк «все значения» (или фиксируются фильтром).
+        """
+        values = {'category': category, 'city': city, 'status': status}
+        queryset = OrderStats.objects.all()
+        for name, column, all_value in StatsService.BREAKDOWN_DIMENSIONS:
+            if values[name] is not None:
+                queryset = queryset.filter(**{column: values[name]})
+            elif name in by:
+                queryset = queryset.exclude(**{column: all_value})
+            else:
+                queryset = queryset.filter(**{column: all_value})
+
+        results, refreshed_at = [], None
+        for row in queryset.order_by('-order_count', 'category_id', 'city', 'status'):
+            item = {}
+            if 'category' in by:
+                item['category'] = row.category_id
+                item['category_name'] = row.category_name
+            if 'city' in by:
+                item['city'] = row.city
+            if 'status' in by:
+                item['status'] = row.status
+            item['count'] = row.order_count
+            item['avg_budget'] = format(row.avg_budget, 'f')
+            item['median_budget'] = format(row.median_budget, 'f')
+            results.append(item)
+            refreshed_at = row.refreshed_at
+        if refreshed_at is None:
+            # фильтр ничего не нашёл, но возраст данных всё равно нужен клиенту
+            refreshed_at = OrderStats.objects.values_list('refreshed_at', flat=True).first()
+        # представление обновляет refresh_order_stats по расписанию (render.yaml, docker-compose.yml)
+        age = round((timezone.now() - refreshed_at).total_seconds(), 1) if refreshed_at else None
+        return {'by': list(by), 'refreshed_at': refreshed_at, 'age_seconds': age, 'results': results}
+
+    @staticmethod
+    def refresh_breakdown():
+        """Пересчёт core_orderstats; CONCURRENTLY не блокирует чтение разбивки."""
+        with connection.cursor() as cursor:
+            cursor.execute(f'REFRESH MATERIALIZED VIEW CONCURRENTLY {OrderStats._meta.db_table}')
+
+
+_job_stats_cache = SingleFlightCache(StatsService._load_job_stats, settings.STATS_CACHE_TTL)
+
+
 class CategoryService:
     @staticmethod
     def get_all_categories():
         return Category.objects.all()
 
     @staticmethod
-    @transaction.atomic
+    def apply_status_change(category_id, old_status=None, new_status=None):
+        """Переносит заказ между счётчиками категории одним UPDATE."""
+        if old_status == new_status:
+            return
+        changes = {}
+        if old_status:
+            field = Category.STATUS_COUNTER_FIELDS[old_status]
+            changes[field] = F(field) - 1
+        if new_status:
+            field = Category.STATUS_COUNTER_FIELDS[new_status]
+            changes[field] = F(field) + 1
+        Category.objects.filter(id=category_id).update(updated_at=timezone.now(), **changes)
+
+    @staticmethod
+    def apply_status_deltas(deltas):
+        """
+        Пакетная версия apply_status_change: {(category_id, status): изменение}
+        применяется одним UPDATE с CASE по категориям.
+        """
+        per_field = defaultdict(dict)
+        for (category_id, status), delta in deltas.items():
+            if delta:
+                per_field[Category.STATUS_COUNTER_FIELDS[status]][category_id] = delta
+        if not per_field:
+            return
+
+        changes = {
+            field: F(field) + Case(
+                *[When(id=category_id, then=Value(delta)) for category_id, delta in per_category.items()],
+                default=Value(0),
+                output_field=IntegerField(),
+            )
+            for field, per_category in per_field.items()
+        }
+        category_ids = {category_id for per_category in per_field.values() for category_id in per_category}
+        Category.objects.filter(id__in=category_ids).update(updated_at=timezone.now(), **changes)
+
+    @staticmethod
+    def _status_counts_sql(where=''):
+        columns = ', '.join(
+            f"COUNT(o.id) FILTER (WHERE o.status = '{status}') AS {field}"
+            for status, field in Category.STATUS_COUNTER_FIELDS.items()
+        )
+        # счётчики — за всё время, поэтому заказы из архива тоже считаются
+        return f'''
+            SELECT cat.id, {columns}
+            FROM {Category._meta.db_table} cat
+            LEFT JOIN (
+                SELECT id, category_id, status FROM {Order._meta.db_table}
+                UNION ALL
+                SELECT id, category_id, status FROM {ArchivedOrder._meta.db_table}
+            ) o ON o.category_id = cat.id
+            {where}
+            GROUP BY cat.id
+        '''
+
+    @staticmethod
     def sync_category_job_counts():
-        categories = Category.objects.all()
-        for category in categories:
-            count = Order.objects.filter(category=category, status='open').count()
-            Category.objects.filter(id=category.id).update(job_count=count)
+        """Полный пересчёт всех счётчиков одним UPDATE ... FROM (SELECT ... GROUP BY)."""
+        fields = list(Category.STATUS_COUNTER_FIELDS.values())
+        assignments = ', '.join(f'{field} = s.{field}' for field in fields)
+        # трогаем только разошедшиеся строки, чтобы не сбрасывать ETag списка категорий
+        mismatch = ' OR '.join(f'c.{field} <> s.{field}' for field in fields)
+        with connection.cursor() as cursor:
+            cursor.execute(f'''
+                UPDATE {Category._meta.db_table} AS c
+                SET {assignments}, updated_at = clock_timestamp()
+                FROM ({CategoryService._status_counts_sql()}) AS s
+                WHERE s.id = c.id AND ({mismatch})
+            ''')
+        StatsService.invalidate()
         return Category.objects.all()
 
+    @staticmethod
+    def find_counter_drift(category_ids=None):
+        """
+        Сравнивает сохранённые счётчики с фактом и возвращает расхождения.
+        Запускается по требованию (админ-эндпоинт, manage.py check_category_counters),
+        а не на каждом запросе; можно ограничить списком категорий.
+        """
+        fields = list(Category.STATUS_COUNTER_FIELDS.values())
+        where, params = '', []
+        if category_ids:
+            where, params = 'WHERE cat.id = ANY(%s)', [list(category_ids)]
+        mismatch = ' OR '.join(f'c.{field} <> s.{field}' for field in fields)
+        with connection.cursor() as cursor:
+            cursor.execute(f'''
+                SELECT c.id, {', '.join(f'c.{field}, s.{field}' for field in fields)}
+                FROM {Category._meta.db_table} c
+                JOIN ({CategoryService._status_counts_sql(where)}) AS s ON s.id = c.id
+                WHERE {mismatch}
+                ORDER BY c.id
+            ''', params)
+            rows = cursor.fetchall()
+
+        drift = []
+        for row in rows:
+            for index, status in enumerate(Category.STATUS_COUNTER_FIELDS):
+                stored, actual = row[1 + index * 2], row[2 + index * 2]
+                if stored != actual:
+                    drift.append({'category': row[0], 'status': status, 'stored': stored, 'actual': actual})
+        return drift
+
 
 class OrderApplicationService:
     @staticmethod
-    def get_employer_applications(user, order_id=None):
-        queryset = OrderApplication.objects.filter(
-            order__employer=user
+    def get_employer_applications(user, order_id=None, archived=False):
+        model = ArchivedOrderApplication if archived else OrderApplication
+        queryset = model.objects.filter(
+            order__employer_id=user.pk
         ).select_related('order', 'worker').prefetch_related('order__category')
         
         if order_id:
@@ -111,61 +446,262 @@ class OrderApplicationService:
         return queryset
     
     @staticmethod
-    def get_applications_by_order(order_id, user):
-        return OrderApplication.objects.filter(
+    def get_applications_by_order(order_id, user, archived=False):
+        model = ArchivedOrderApplication if archived else OrderApplication
+        return model.objects.filter(
             order_id=order_id,
-            order__employer=user
+            order__employer_id=user.pk
         ).select_related('order', 'worker').prefetch_related('order__category')
     
     @staticmethod
-    def get_worker_applications(user):
-        return OrderApplication.objects.filter(
-            worker=user
+    def get_worker_applications(user, archived=False):
+        model = ArchivedOrderApplication if archived else OrderApplication
+        return model.objects.filter(
+            worker_id=user.pk
         ).select_related('order', 'order__employer').prefetch_related('order__category')
     
+    @staticmethod
+    def _lock_order(order_id, skip_locked=False):
+        """
+        Блокирует строку заказа до конца транзакции (FOR NO KEY UPDATE).
+        Блокировка берётся только на этот заказ, так что работа с другими
+        заказами не сериализуется. С skip_locked=True занятый заказ не ждём
+        и возвращаем None.
+        """
+        return Order.objects.select_for_update(
+            no_key=True, skip_locked=skip_locked
+        ).filter(pk=order_id).first()
+
     @staticmethod
     @transaction.atomic
-    def accept_application(application, user):
-        order = application.order
+    def accept_application(application, user, skip_locked=False):
+        order = OrderApplicationService._lock_order(application.order_id, skip_locked)
+        if order is None:
+            raise ValidationError('This order is being processed by another request, try again')
         
-        if order.employer != user:
+        if order.employer_id != user.pk:
             raise ValidationError('You do not have permission to manage this application')
         
+        # статус перечитан под блокировкой: второй параллельный accept увидит in_progress
         if order.status != 'open':
             raise ValidationError('This order is no longer open for applications')
         
-        order.status = 'in_progress'
-        order.save()
+        # compare-and-set: отклонённую или уже принятую заявку не принимаем
+        updated = OrderApplication.objects.filter(
+            pk=application.pk, order_id=order.pk, status='pending'
+        ).update(status='accepted', updated_at=timezone.now())
+        if not updated:
+            raise ValidationError('Can only accept pending applications')
         
+        OrderService._transition_status(order, 'in_progress')
         application.status = 'accepted'
-        application.save()
+        application.order = order
         
-        OrderApplication.objects.filter(order=order).exclude(pk=application.pk).update(status='rejected')
+        # новые заявки не появятся: create_application ждёт нашу блокировку заказа
+        rejected = list(
+            OrderApplication.objects.filter(order=order, status='pending')
+            .exclude(pk=application.pk).values_list('id', 'worker_id')
+        )
+        OrderApplication.objects.filter(id__in=[pk for pk, _ in rejected]).update(
+            status='rejected', updated_at=timezone.now()
+        )
+
+        events.publish([
+            OrderApplicationService._status_event(application.pk, order, application.worker_id, 'accepted'),
+            *[
+                OrderApplicationService._status_event(pk, order, worker_id, 'rejected')
+                for pk, worker_id in rejected
+            ],
+            OrderService._status_event(order, [order.employer_id, application.worker_id]),
+        ])
         
         return application, order
     
     @staticmethod
+    @transaction.atomic
     def reject_application(application, user):
-        order = application.order
+        locked = OrderApplication.objects.select_for_update(
+            no_key=True, of=('self',)
+        ).select_related('order').get(pk=application.pk)
         
-        if order.employer != user:
+        if locked.order.employer_id != user.pk:
             raise ValidationError('You do not have permission to manage this application')
         
-        if application.status != 'pending':
+        if locked.status != 'pending':
             raise ValidationError('Can only reject pending applications')
         
+        OrderApplication.objects.filter(pk=application.pk).update(status='rejected', updated_at=timezone.now())
         application.status = 'rejected'
-        application.save()
+        events.publish([
+            OrderApplicationService._status_event(locked.pk, locked.order, locked.worker_id, 'rejected')
+        ])
         
         return application
+
+    @staticmethod
+    def _status_event(application_id, order, worker_id, status):
+        return (
+            [worker_id, order.employer_id],
+            'application.status',
+            {'application': application_id, 'order': order.pk, 'status': status},
+        )
     
     @staticmethod
+    @transaction.atomic
+    def bulk_update_applications(application_ids, action, user):
+        """
+        Принимает или отклоняет пачку заявок работодателя.
+
+        Владение проверяется одним запросом на все id. Заказы и отклоняемые
+        заявки, занятые другой транзакцией, пропускаются (SKIP LOCKED)
+        и попадают в результат как ошибки. Принятый заказ переходит
+        в in_progress через OrderService._transition_status, как при
+        одиночном accept; остальные заявки на него отклоняются одним
+        UPDATE, который, как и в accept_application, может недолго ждать
+        параллельный reject той же заявки. Возвращает результат по каждому
+        id в порядке запроса.
+        """
+        if action not in ('accept', 'reject'):
+            raise ValidationError('Invalid action. Use "accept" or "reject"')
+
+        application_ids = list(dict.fromkeys(application_ids))
+        rows = {
+            app_id: (order_id, app_status, employer_id, worker_id)
+            for app_id, order_id, app_status, employer_id, worker_id in
+            OrderApplication.objects.filter(id__in=application_ids).values_list(
+                'id', 'order_id', 'status', 'order__employer_id', 'worker_id'
+            )
+        }
+
+        results = {}
+        candidates = []
+        for app_id in application_ids:
+            if app_id not in rows:
+                results[app_id] = 'Application not found'
+            elif rows[app_id][2] != user.pk:
+                results[app_id] = 'You do not have permission to manage this application'
+            else:
+                candidates.append(app_id)
+
+        if action == 'reject':
+            pending = [app_id for app_id in candidates if rows[app_id][1] == 'pending']
+            locked = set(
+                OrderApplication.objects.select_for_update(no_key=True, skip_locked=True)
+                .filter(id__in=pending, status='pending').values_list('id', flat=True)
+            )
+            for app_id in candidates:
+                if rows[app_id][1] != 'pending':
+                    results[app_id] = 'Can only reject pending applications'
+                elif app_id not in locked:
+                    results[app_id] = 'Application is being processed by another request, try again'
+                else:
+                    results[app_id] = None
+            if locked:
+                OrderApplication.objects.filter(id__in=locked).update(status='rejected', updated_at=timezone.now())
+                events.publish([
+                    (
+                        [rows[app_id][3], user.pk],
+                        'application.status',
+                        {'application': app_id, 'order': rows[app_id][0], 'status': 'rejected'},
+                    )
+                    for app_id in locked
+                ])
+        else:
+            winners = {}
+            for app_id in candidates:
+                order_id = rows[app_id][0]
+                if rows[app_id][1] != 'pending':
+                    results[app_id] = 'Can only accept pending applications'
+                elif order_id in winners:
+                    results[app_id] = 'Another application for this order is accepted in this request'
+                else:
+                    winners[order_id] = app_id
+
+            locked_orders = {
+                order.pk: order for order in
+                Order.objects.select_for_update(no_key=True, skip_locked=True).filter(id__in=list(winners))
+            }
+            # статус заявки перепроверяется под её блокировкой: параллельный reject мог успеть раньше
+            pending = set(
+                OrderApplication.objects.select_for_update(no_key=True, skip_locked=True)
+                .filter(id__in=list(winners.values()), status='pending').values_list('id', flat=True)
+            )
+            accepted = {}
+            for order_id, app_id in winners.items():
+                order = locked_orders.get(order_id)
+                if order is None:
+                    results[app_id] = 'This order is being processed by another request, try again'
+                elif order.status != 'open':
+                    results[app_id] = 'This order is no longer open for applications'
+                elif app_id not in pending:
+                    results[app_id] = 'Application is no longer pending or is being processed by another request'
+                else:
+                    results[app_id] = None
+                    accepted[order_id] = app_id
+
+            if accepted:
+                for order_id in accepted:
+                    OrderService._transition_status(locked_orders[order_id], 'in_progress')
+                now = timezone.now()
+                OrderApplication.objects.filter(id__in=accepted.values()).update(status='accepted', updated_at=now)
+                rejected = list(
+                    OrderApplication.objects.filter(order_id__in=list(accepted), status='pending')
+                    .exclude(id__in=accepted.values()).values_list('id', 'order_id', 'worker_id')
+                )
+                OrderApplication.objects.filter(id__in=[app_id for app_id, _, _ in rejected]).update(
+                    status='rejected', updated_at=now
+                )
+
+                notifications = []
+                for order_id, app_id in accepted.items():
+                    order, worker_id = locked_orders[order_id], rows[app_id][3]
+                    notifications.append(OrderApplicationService._status_event(app_id, order, worker_id, 'accepted'))
+                    notifications.append(OrderService._status_event(order, [order.employer_id, worker_id]))
+                notifications.extend(
+                    OrderApplicationService._status_event(app_id, locked_orders[order_id], worker_id, 'rejected')
+                    for app_id, order_id, worker_id in rejected
+                )
+                events.publish(notifications)
+
+        done_status = 'accepted' if action == 'accept' else 'rejected'
+        return [
+            {'id': app_id, 'status': done_status} if results[app_id] is None
+            else {'id': app_id, 'status': 'error', 'detail': results[app_id]}
+            for app_id in application_ids
+        ]
+
+    @staticmethod
+    @transaction.atomic
     def create_application(validated_data):
-        return OrderApplication.objects.create(**validated_data)
+        # FOR SHARE: заявки на один заказ не мешают друг другу, но конфликтуют
+        # с accept (FOR NO KEY UPDATE), так что заявка не попадёт в уже занятый заказ
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'SELECT status, employer_id FROM {Order._meta.db_table} WHERE id = %s FOR SHARE',
+                [validated_data['order'].pk]
+            )
+            row = cursor.fetchone()
+        
+        if row is None or row[0] != 'open':
+            raise ValidationError('This order is no longer open for applications')
+        
+        application = OrderApplication.objects.create(**validated_data)
+        events.publish([(
+            [row[1]],
+            'application.created',
+            {
+                'application': application.pk,
+                'order': application.order_id,
+                'worker': application.worker_id,
+                'status': application.status,
+            },
+        )])
+        return application
 
 
 class ReviewService:
     @staticmethod
+    @transaction.atomic
     def create_review(validated_data, reviewer):
         order = validated_data['order']
         
@@ -180,7 +716,9 @@ class ReviewService:
         validated_data['reviewer'] = reviewer
         validated_data['worker'] = worker
         
-        return Review.objects.create(**validated_data)
+        review = Review.objects.create(**validated_data)
+        ReputationService.apply(worker.pk, order.category_id, rating=review.rating)
+        return review
     
     @staticmethod
     def get_user_reviews(user, order_id=None, worker_id=None):
@@ -189,9 +727,11 @@ class ReviewService:
         ).prefetch_related('order__category')
         
         if user.profile.role == 'employer':
-            queryset = queryset.filter(order__employer=user)
+            # отзыв оставляет только работодатель заказа (ReviewSerializer.validate);
+            # фильтр по reviewer не зависит от того, лежит ли заказ в архиве
+            queryset = queryset.filter(reviewer_id=user.pk)
         else:
-            queryset = queryset.filter(worker=user)
+            queryset = queryset.filter(worker_id=user.pk)
         
         if order_id:
             queryset = queryset.filter(order_id=order_id)
@@ -201,15 +741,319 @@ class ReviewService:
         return queryset
 
 
+class ReputationService:
+    """
+    Денормализованный рейтинг воркеров (WorkerReputation). apply() меняет
+    строку категории и итоговую одним INSERT ... ON CONFLICT в транзакции
+    вызывающего, rebuild() пересчитывает всё по отзывам и заказам
+    (в том числе из архива) — после массовой загрузки или для сверки.
+    """
+    _UPSERT_SQL = f'''
+        INSERT INTO {WorkerReputation._meta.db_table} AS r (
+            worker_id, category_id, city, review_count, rating_sum,
+            rating_1, rating_2, rating_3, rating_4, rating_5,
+            average_rating, completed_count, updated_at
+        )
+        SELECT
+            %(worker)s, c.category_id, (SELECT city FROM {Profile._meta.db_table} WHERE user_id = %(worker)s),
+            %(reviews)s, %(rating)s, %(r1)s, %(r2)s, %(r3)s, %(r4)s, %(r5)s,
+            %(rating)s, %(completed)s, clock_timestamp()
+        -- сначала строка категории, потом итоговая: одинаковый порядок блокировок
+        FROM (VALUES (%(category)s::bigint, 1), (NULL::bigint, 2)) AS c(category_id, position)
+        ORDER BY c.position
+        ON CONFLICT (worker_id, category_id) DO UPDATE SET
+            review_count = r.review_count + EXCLUDED.review_count,
+            rating_sum = r.rating_sum + EXCLUDED.rating_sum,
+            rating_1 = r.rating_1 + EXCLUDED.rating_1,
+            rating_2 = r.rating_2 + EXCLUDED.rating_2,
+            rating_3 = r.rating_3 + EXCLUDED.rating_3,
+            rating_4 = r.rating_4 + EXCLUDED.rating_4,
+            rating_5 = r.rating_5 + EXCLUDED.rating_5,
+            average_rating = CASE
+                WHEN r.review_count + EXCLUDED.review_count = 0 THEN 0
+                ELSE ROUND((r.rating_sum + EXCLUDED.rating_sum)::numeric / (r.review_count + EXCLUDED.review_count), 2)
+            END,
+            completed_count = r.completed_count + EXCLUDED.completed_count,
+            updated_at = EXCLUDED.updated_at
+    '''
+
+    @staticmethod
+    def get_leaderboard(category=None, city=None):
+        """Порядок задаёт keyset_ordering представления, он совпадает с индексами reputation_*board_idx."""
+        queryset = WorkerReputation.objects.filter(
+            review_count__gte=settings.LEADERBOARD_MIN_REVIEWS
+        ).select_related('worker')
+        if category:
+            queryset = queryset.filter(category_id=category)
+        else:
+            queryset = queryset.filter(category__isnull=True)
+        if city:
+            queryset = queryset.filter(city=city)
+        return queryset
+
+    @staticmethod
+    def get_worker_reputation(worker_id):
+        return WorkerReputation.objects.filter(worker_id=worker_id).select_related('worker', 'category')
+
+    @staticmethod
+    def sync_city(profile):
+        WorkerReputation.objects.filter(worker_id=profile.user_id).exclude(city=profile.city).update(
+            city=profile.city, updated_at=timezone.now()
+        )
+
+    @staticmethod
+    def apply(worker_id, category_id, rating=None, completed=0, sign=1):
+        """sign=-1 вычитает отзыв / выполнение (удаление заказа)."""
+        params = {
+            'worker': worker_id,
+            'category': category_id,
+            'reviews': sign if rating else 0,
+            'rating': sign * (rating or 0),
+            'completed': sign * completed,
+        }
+        for value in range(1, 6):
+            params[f'r{value}'] = sign if rating == value else 0
+        with connection.cursor() as cursor:
+            cursor.execute(ReputationService._UPSERT_SQL, params)
+
+    @staticmethod
+    @transaction.atomic
+    def rebuild():
+        histogram = ', '.join(f'COUNT(*) FILTER (WHERE rating = {value}) AS rating_{value}' for value in range(1, 6))
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {WorkerReputation._meta.db_table}')
+            cursor.execute(f'''
+                WITH orders AS (
+                    SELECT id, category_id, status FROM {Order._meta.db_table}
+                    UNION ALL
+                    SELECT id, category_id, status FROM {ArchivedOrder._meta.db_table}
+                ), accepted AS (
+                    SELECT order_id, worker_id FROM {OrderApplication._meta.db_table} WHERE status = 'accepted'
+                    UNION ALL
+                    SELECT order_id, worker_id FROM {ArchivedOrderApplication._meta.db_table} WHERE status = 'accepted'
+                ), facts AS (
+                    SELECT rv.worker_id, o.category_id, rv.rating, 0 AS completed
+                    FROM {Review._meta.db_table} rv JOIN orders o ON o.id = rv.order_id
+                    UNION ALL
+                    SELECT a.worker_id, o.category_id, NULL, 1
+                    FROM accepted a JOIN orders o ON o.id = a.order_id
+                    WHERE o.status = 'completed'
+                ), totals AS (
+                    SELECT worker_id, category_id, COUNT(rating) AS review_count,
+                           COALESCE(SUM(rating), 0) AS rating_sum, {histogram}, SUM(completed) AS completed_count
+                    FROM facts
+                    GROUP BY GROUPING SETS ((worker_id, category_id), (worker_id))
+                )
+                INSERT INTO {WorkerReputation._meta.db_table} (
+                    worker_id, category_id, city, review_count, rating_sum,
+                    rating_1, rating_2, rating_3, rating_4, rating_5,
+                    average_rating, completed_count, updated_at
+                )
+                SELECT
+                    t.worker_id, t.category_id, p.city, t.review_count, t.rating_sum,
+                    t.rating_1, t.rating_2, t.rating_3, t.rating_4, t.rating_5,
+                    CASE WHEN t.review_count = 0 THEN 0 ELSE ROUND(t.rating_sum::numeric / t.review_count, 2) END,
+                    t.completed_count, clock_timestamp()
+                FROM totals t
+                LEFT JOIN {Profile._meta.db_table} p ON p.user_id = t.worker_id
+            ''')
+
+
+class SavedSearchService:
+    """
+    Сохранённые поиски воркеров и их входящие. Новый заказ сверяется
+    с подписками одним запросом: для каждого заказа четыре ключа индекса
+    saved_search_match_idx — (категория, город), (категория, любой город),
+    (любая категория, город), (любая, любой) — и внутри ключа диапазон
+    min_budget <= бюджет. Верхняя граница и ключевые слова проверяются
+    уже на этих кандидатах, а не на всех подписках.
+    """
+    _MATCH_KEYS = (
+        's.category_id = o.category_id AND s.city = o.city',
+        's.category_id = o.category_id AND s.city IS NULL',
+        's.category_id IS NULL AND s.city = o.city',
+        's.category_id IS NULL AND s.city IS NULL',
+    )
+    _MATCH_BRANCHES = '\n                UNION ALL\n                '.join(
+        f'SELECT id, user_id, keywords, max_budget FROM {SavedSearch._meta.db_table} s '
+        f'WHERE {key} AND s.min_budget <= o.budget'
+        for key in _MATCH_KEYS
+    )
+    _MATCH_SQL = f'''
+        WITH new_orders AS (
+            SELECT o.id, o.category_id, p.city, o.budget, o.employer_id, o.search_vector
+            FROM {Order._meta.db_table} o
+            LEFT JOIN {Profile._meta.db_table} p ON p.user_id = o.employer_id
+            WHERE o.id = ANY(%(orders)s)
+        ), candidates AS (
+            SELECT s.id, s.user_id, s.keywords, s.max_budget, o.id AS order_id, o.budget, o.employer_id, o.search_vector
+            FROM new_orders o
+            CROSS JOIN LATERAL (
+                {_MATCH_BRANCHES}
+            ) s
+        )
+        INSERT INTO {SavedSearchMatch._meta.db_table} (user_id, search_id, order_id, created_at)
+        SELECT DISTINCT ON (c.user_id, c.order_id) c.user_id, c.id, c.order_id, clock_timestamp()
+        FROM candidates c
+        WHERE (c.max_budget IS NULL OR c.max_budget >= c.budget)
+          AND c.user_id <> c.employer_id
+          -- как в OrderService.search_orders: словоформы по-русски и слова как есть
+          AND (c.keywords = '' OR c.search_vector @@ (
+              websearch_to_tsquery('russian', c.keywords) || websearch_to_tsquery('simple', c.keywords)
+          ))
+        ORDER BY c.user_id, c.order_id, c.id
+        ON CONFLICT (user_id, order_id) DO NOTHING
+        RETURNING user_id, order_id
+    '''
+    # сколько id заказов класть в одно событие
+    EVENT_ORDERS = 50
+
+    @staticmethod
+    def get_user_saved_searches(user):
+        return SavedSearch.objects.filter(user_id=user.pk).order_by('-created_at', '-id')
+
+    @staticmethod
+    def create_saved_search(user, validated_data):
+        if SavedSearch.objects.filter(user_id=user.pk).count() >= settings.SAVED_SEARCHES_PER_USER:
+            raise ValidationError(f'You can have at most {settings.SAVED_SEARCHES_PER_USER} saved searches')
+        return SavedSearch.objects.create(user=user, **validated_data)
+
+    @staticmethod
+    def delete_saved_search(user, search_id):
+        deleted, _ = SavedSearch.objects.filter(pk=search_id, user_id=user.pk).delete()
+        return bool(deleted)
+
+    @staticmethod
+    def match_orders(order_ids):
+        """Кладёт новые заказы во входящие подходящих подписчиков; вызывать в транзакции создания."""
+        if not order_ids:
+            return []
+        with connection.cursor() as cursor:
+            cursor.execute(SavedSearchService._MATCH_SQL, {'orders': list(order_ids)})
+            matches = cursor.fetchall()
+
+        by_user = defaultdict(list)
+        for user_id, order_id in matches:
+            by_user[user_id].append(order_id)
+        events.publish([
+            (
+                [user_id],
+                'saved_search.match',
+                {'orders': sorted(orders)[:SavedSearchService.EVENT_ORDERS], 'count': len(orders)},
+            )
+            for user_id, orders in by_user.items()
+        ])
+        return matches
+
+    @staticmethod
+    def get_inbox(user, unread=False):
+        queryset = SavedSearchMatch.objects.filter(user_id=user.pk).select_related('order', 'search')
+        if unread:
+            queryset = queryset.filter(read_at__isnull=True)
+        return queryset
+
+    @staticmethod
+    def mark_read(user, match_ids=None):
+        queryset = SavedSearchMatch.objects.filter(user_id=user.pk, read_at__isnull=True)
+        if match_ids is not None:
+            queryset = queryset.filter(id__in=match_ids)
+        return queryset.update(read_at=timezone.now())
+
+
 class ProfileService:
     @staticmethod
     def get_user_profile(user):
-        return Profile.objects.get(user=user)
+        return Profile.objects.get(user_id=user.pk)
+
+    @staticmethod
+    def get_profile_version(user):
+        return Profile.objects.filter(user_id=user.pk).aggregate(
+            count=Count('id'), last_modified=Max('updated_at')
+        )
     
     @staticmethod
+    @transaction.atomic
     def update_user_profile(user, validated_data):
         profile = Profile.objects.get(user=user)
         for attr, value in validated_data.items():
             setattr(profile, attr, value)
         profile.save()
+        if profile.role == 'worker' and 'city' in validated_data:
+            # город в лидерборде берётся из копии в WorkerReputation
+            ReputationService.sync_city(profile)
         return profile
+
+
+class ArchiveService:
+    """
+    Перенос заказов, закрытых дольше ARCHIVE_AFTER_DAYS, вместе с заявками
+    в ArchivedOrder / ArchivedOrderApplication. Каждая пачка — одна короткая
+    транзакция с одним запросом: строки берутся FOR UPDATE SKIP LOCKED, так
+    что занятый кем-то заказ просто уедет в следующий прогон, а таблица
+    целиком не блокируется. Отзывы остаются на месте (см. Review.order),
+    счётчики категорий считают заказы за всё время и не меняются.
+    """
+    CLOSED_STATUSES = ('completed', 'cancelled')
+
+    @staticmethod
+    def archive_closed_orders(older_than_days=None, batch_size=500, max_batches=None, pause=0):
+        if older_than_days is None:
+            older_than_days = settings.ARCHIVE_AFTER_DAYS
+        cutoff = timezone.now() - timedelta(days=older_than_days)
+        totals = {'orders': 0, 'applications': 0, 'batches': 0}
+        while max_batches is None or totals['batches'] < max_batches:
+            orders, applications = ArchiveService.archive_batch(cutoff, batch_size)
+            if not orders:
+                break
+            totals['orders'] += orders
+            totals['applications'] += applications
+            totals['batches'] += 1
+            if pause:
+                # даём репликам и autovacuum догнать
+                time.sleep(pause)
+        return totals
+
+    @staticmethod
+    @transaction.atomic
+    def archive_batch(cutoff, batch_size):
+        order_columns = 'id, employer_id, title, description, budget, category_id, status, created_at, updated_at'
+        application_columns = 'id, order_id, worker_id, cover_letter, status, created_at, updated_at'
+        # статусы литералом: так планировщик берёт частичный индекс order_closed_updated_idx
+        statuses = ', '.join(f"'{status}'" for status in ArchiveService.CLOSED_STATUSES)
+        with connection.cursor() as cursor:
+            cursor.execute(f'''
+                WITH picked AS (
+                    SELECT id FROM {Order._meta.db_table}
+                    WHERE status IN ({statuses}) AND updated_at < %s
+                    ORDER BY updated_at, id
+                    LIMIT %s
+                    FOR UPDATE SKIP LOCKED
+                ), moved_orders AS (
+                    DELETE FROM {Order._meta.db_table} o USING picked p WHERE o.id = p.id
+                    RETURNING {', '.join(f'o.{column}' for column in order_columns.split(', '))}
+                ), moved_applications AS (
+                    DELETE FROM {OrderApplication._meta.db_table} a USING moved_orders m WHERE a.order_id = m.id
+                    RETURNING {', '.join(f'a.{column}' for column in application_columns.split(', '))}
+                ), dropped_matches AS (
+                    -- входящие по закрытым заказам больше не нужны
+                    DELETE FROM {SavedSearchMatch._meta.db_table} s USING moved_orders m WHERE s.order_id = m.id
+                ), archived_orders AS (
+                    INSERT INTO {ArchivedOrder._meta.db_table} ({order_columns}, archived_at)
+                    SELECT {order_columns}, clock_timestamp() FROM moved_orders
+                    RETURNING category_id
+                ), archived_applications AS (
+                    INSERT INTO {ArchivedOrderApplication._meta.db_table} ({application_columns})
+                    SELECT {application_columns} FROM moved_applications
+                    RETURNING 1
+                )
+                SELECT
+                    (SELECT COUNT(*) FROM archived_orders),
+                    (SELECT COUNT(*) FROM archived_applications),
+                    (SELECT COALESCE(array_agg(DISTINCT category_id), '{{}}') FROM archived_orders)
+            ''', [cutoff, batch_size])
+            orders, applications, category_ids = cursor.fetchone()
+
+        if orders:
+            # заказы ушли из ленты: сдвигаем версию (OrderService.get_orders_version)
+            Category.objects.filter(id__in=category_ids).update(updated_at=timezone.now())
+        return orders, applications
@@ -1,4 +1,4 @@
-from django.test import TestCase
+from django.test import TestCase, TransactionTestCase
 from django.contrib.auth.models import User
 from rest_framework.exceptions import ValidationError
 from decimal import Decimal
@@ -373,6 +373,16 @@ class OrderApplicationServiceTestCase(TestCase):
         
         self.assertIn('no longer open', str(context.exception).lower())
     
+    def test_accept_application_must_be_pending(self):
+        OrderApplicationService.reject_application(self.application, self.employer)
+        
+        with self.assertRaises(ValidationError) as context:
+            OrderApplicationService.accept_application(self.application, self.employer)
+        
+        self.assertIn('pending', str(context.exception).lower())
+        self.order.refresh_from_db()
+        self.assertEqual(self.order.status, 'open')
+    
     def test_reject_application(self):
         application = OrderApplicationService.reject_application(
             self.application, 
@@ -665,4 +675,2089 @@ class ModelTestCase(TestCase):
                 worker=worker,
                 rating=4,
                 comment='Good!'
-            )
\ No newline at end of file
+            )
+
+class KeysetPaginationTestCase(TestCase):
+
+    def setUp(self):
+        from rest_framework.test import APIClient
+        self.client = APIClient()
+
+        self.employer = User.objects.create_user(
+            username='employer',
+            email='employer@example.com',
+            password='pass123'
+        )
+        Profile.objects.create(user=self.employer, role='employer')
+        self.category = Category.objects.create(name='Programming')
+
+        for i in range(7):
+            Order.objects.create(
+                employer=self.employer,
+                title=f'Order {i}',
+                description='Description',
+                budget=Decimal('1000.00'),
+                category=self.category
+            )
+
+    def _collect(self, url):
+        ids = []
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            ids.extend(item['id'] for item in response.data['results'])
+            url = response.data['next']
+        return ids
+
+    def test_pages_cover_all_orders_in_order(self):
+        ids = self._collect('/api/v1/orderlist/?page_size=3')
+        expected = list(Order.objects.order_by('-created_at', '-id').values_list('id', flat=True))
+        self.assertEqual(ids, expected)
+
+    def test_inserts_do_not_shift_next_page(self):
+        first = self.client.get('/api/v1/orderlist/?page_size=3').data
+        Order.objects.create(
+            employer=self.employer,
+            title='Fresh order',
+            description='Description',
+            budget=Decimal('500.00'),
+            category=self.category
+        )
+        second = self.client.get(first['next']).data
+        seen = {item['id'] for item in first['results']}
+        self.assertFalse(seen & {item['id'] for item in second['results']})
+        self.assertEqual(len(second['results']), 3)
+
+    def test_previous_link_returns_previous_page(self):
+        first = self.client.get('/api/v1/orderlist/?page_size=3').data
+        second = self.client.get(first['next']).data
+        back = self.client.get(second['previous']).data
+        self.assertEqual(
+            [item['id'] for item in back['results']],
+            [item['id'] for item in first['results']]
+        )
+        self.assertIsNone(back['previous'])
+
+    def test_page_size_is_capped(self):
+        with self.settings(MAX_PAGE_SIZE=2):
+            response = self.client.get('/api/v1/orderlist/?page_size=1000')
+        self.assertEqual(len(response.data['results']), 2)
+
+    def test_invalid_cursor(self):
+        response = self.client.get('/api/v1/orderlist/?cursor=garbage')
+        self.assertEqual(response.status_code, 404)
+
+
+class QueryPlanTestCase(TestCase):
+    """
+    EXPLAIN для горячих запросов сервисного слоя на засеянных данных.
+    Таблицы маленькие, поэтому seq scan запрещается (enable_seqscan = off).
+    Этого мало: без нужного индекса планировщик пройдёт другой индекс
+    целиком с Filter. Поэтому проверяется, что индекс используется с Index
+    Cond по фильтруемой колонке, а проверяемые пользователь и категория
+    редкие (каждая 49-я строка), чтобы такой проход был дороже.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        from django.db import connection
+
+        employers = [User(username=f'employer{i}', email=f'e{i}@example.com') for i in range(5)]
+        workers = [User(username=f'worker{i}', email=f'w{i}@example.com') for i in range(20)]
+        User.objects.bulk_create(employers + workers)
+        Profile.objects.bulk_create(
+            [Profile(user=user, role='employer') for user in employers]
+            + [Profile(user=user, role='worker') for user in workers]
+        )
+
+        categories = Category.objects.bulk_create([Category(name=f'Category {i}') for i in range(10)])
+        statuses = ['open', 'open', 'in_progress', 'completed', 'cancelled']
+        # нулевые работодатель, категория и воркер — на каждой 49-й строке
+        rare = lambda items, i: items[0] if i % 49 == 0 else items[1 + i % (len(items) - 1)]
+        orders = Order.objects.bulk_create([
+            Order(
+                employer=rare(employers, i),
+                title=f'Order {i}',
+                description='Description',
+                budget=Decimal(1000 + i),
+                category=rare(categories, i),
+                status=statuses[i % len(statuses)],
+            )
+            for i in range(2000)
+        ])
+        OrderApplication.objects.bulk_create([
+            OrderApplication(
+                order=order,
+                worker=rare(workers, i) if j == 0 else workers[1 + (i + j) % (len(workers) - 1)],
+                status='accepted' if order.status in ('in_progress', 'completed') and j == 0 else 'pending',
+            )
+            for i, order in enumerate(orders)
+            for j in range(3)
+        ])
+        Review.objects.bulk_create([
+            Review(order=order, reviewer=order.employer, worker=rare(workers, i), rating=5)
+            for i, order in enumerate(orders)
+            if order.status == 'completed'
+        ])
+
+        cls.employer = employers[0]
+        cls.worker = workers[0]
+        cls.category = categories[0]
+        cls.order = orders[49 * 3]
+
+        with connection.cursor() as cursor:
+            for model in (User, Profile, Category, Order, OrderApplication, Review):
+                cursor.execute(f'ANALYZE {model._meta.db_table}')
+
+    def setUp(self):
+        from django.db import connection
+        if connection.vendor != 'postgresql':
+            self.skipTest('EXPLAIN checks require PostgreSQL')
+        with connection.cursor() as cursor:
+            cursor.execute('SET LOCAL enable_seqscan = off')
+
+    @staticmethod
+    def _page(queryset):
+        return queryset.order_by('-created_at', '-id')[:21]
+
+    def _index_scans(self, node):
+        scans = []
+        if 'Index Name' in node:
+            scans.append((node['Index Name'], node.get('Index Cond') or ''))
+        for child in node.get('Plans', []):
+            scans.extend(self._index_scans(child))
+        return scans
+
+    def assertIndexCond(self, queryset, column, index=None):
+        """Есть скан индекса (index, если задан) с Index Cond по column."""
+        import json
+        plan = json.loads(queryset.explain(format='json'))[0]['Plan']
+        scans = self._index_scans(plan)
+        self.assertTrue(
+            any(f'{column} ' in cond and index in (None, name) for name, cond in scans),
+            f'No index scan with Index Cond on {column} ({index or "any index"}) in {scans}:\n{queryset.query}'
+        )
+
+    def assertIndexScan(self, queryset, index):
+        """Скан по частичному индексу или ключу сортировки — Index Cond у него может не быть."""
+        import json
+        plan = json.loads(queryset.explain(format='json'))[0]['Plan']
+        scans = self._index_scans(plan)
+        self.assertIn(index, [name for name, _ in scans], f'{index} is not used in {scans}:\n{queryset.query}')
+
+    def test_order_service_queries(self):
+        self.assertIndexScan(self._page(OrderService.get_orders_by_category()), 'order_created_id_idx')
+        self.assertIndexCond(self._page(OrderService.get_orders_by_category(self.category.id)), 'category_id')
+        self.assertIndexCond(
+            self._page(OrderService.get_filtered_orders({'category': self.category.id, 'status': 'open'})),
+            'category_id', 'order_cat_status_created_idx'
+        )
+        self.assertIndexCond(self._page(OrderService.get_user_orders(self.employer)), 'employer_id')
+        self.assertIndexCond(
+            self._page(OrderService.get_worker_accepted_orders(self.worker)), 'worker_id', 'application_worker_status_idx'
+        )
+        self.assertIndexScan(self._page(Order.objects.filter(status='open')), 'order_open_created_idx')
+        self.assertIndexCond(OrderService.search_orders('1999')[:21], 'search_vector', 'order_search_vector_idx')
+
+    def test_order_application_service_queries(self):
+        # у заявки нет колонки работодателя: страница идёт по ключу сортировки, заказ — по pkey
+        self.assertIndexScan(
+            self._page(OrderApplicationService.get_employer_applications(self.employer)), 'application_created_id_idx'
+        )
+        self.assertIndexCond(
+            self._page(OrderApplicationService.get_employer_applications(self.employer, self.order.id)), 'order_id'
+        )
+        self.assertIndexCond(
+            self._page(OrderApplicationService.get_applications_by_order(self.order.id, self.employer)), 'order_id'
+        )
+        self.assertIndexCond(self._page(OrderApplicationService.get_worker_applications(self.worker)), 'worker_id')
+
+    def test_review_service_queries(self):
+        self.assertIndexCond(
+            OrderApplication.objects.filter(order=self.order, status='accepted'), 'order_id', 'application_order_status_idx'
+        )
+        self.assertIndexCond(self._page(ReviewService.get_user_reviews(self.employer)), 'reviewer_id')
+        self.assertIndexCond(self._page(ReviewService.get_user_reviews(self.worker)), 'worker_id')
+        self.assertIndexCond(self._page(ReviewService.get_user_reviews(self.employer, order_id=self.order.id)), 'order_id')
+
+
+class OrderSearchTestCase(TestCase):
+
+    def setUp(self):
+        from rest_framework.test import APIClient
+        self.client = APIClient()
+
+        self.employer = User.objects.create_user(
+            username='employer',
+            email='employer@example.com',
+            password='pass123'
+        )
+        Profile.objects.create(user=self.employer, role='employer')
+        self.category = Category.objects.create(name='Ремонт')
+
+        self.title_match = Order.objects.create(
+            employer=self.employer,
+            title='Ремонт квартиры',
+            description='Покраска стен и замена плитки',
+            budget=Decimal('50000.00'),
+            category=self.category
+        )
+        self.description_match = Order.objects.create(
+            employer=self.employer,
+            title='Помощь по дому',
+            description='Небольшой ремонт квартиры после переезда',
+            budget=Decimal('20000.00'),
+            category=self.category
+        )
+        self.kazakh = Order.objects.create(
+            employer=self.employer,
+            title='Үй жөндеу',
+            description='Жөндеу жұмыстары',
+            budget=Decimal('30000.00'),
+            category=self.category
+        )
+
+    def test_search_matches_russian_word_forms(self):
+        results = OrderService.search_orders('квартира')
+        self.assertEqual(
+            [order.id for order in results],
+            [self.title_match.id, self.description_match.id]
+        )
+
+    def test_search_matches_kazakh_text(self):
+        results = OrderService.search_orders('жөндеу')
+        self.assertEqual([order.id for order in results], [self.kazakh.id])
+
+    def test_search_vector_follows_updates(self):
+        Order.objects.filter(id=self.kazakh.id).update(title='Сантехника')
+        self.assertEqual(OrderService.search_orders('сантехник').count(), 1)
+
+    def test_search_endpoint(self):
+        response = self.client.get('/api/v1/ordersearch/', {'q': 'ремонт', 'limit': 1})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([item['id'] for item in response.data], [self.title_match.id])
+
+    def test_search_endpoint_requires_query(self):
+        response = self.client.get('/api/v1/ordersearch/')
+        self.assertEqual(response.status_code, 400)
+
+
+class OrderFacetTestCase(TestCase):
+
+    def setUp(self):
+        from rest_framework.test import APIClient
+        self.client = APIClient()
+
+        self.almaty_employer = User.objects.create_user(
+            username='almaty',
+            email='almaty@example.com',
+            password='pass123'
+        )
+        Profile.objects.create(user=self.almaty_employer, role='employer', city='almaty')
+        self.astana_employer = User.objects.create_user(
+            username='astana',
+            email='astana@example.com',
+            password='pass123'
+        )
+        Profile.objects.create(user=self.astana_employer, role='employer', city='astana')
+
+        self.programming = Category.objects.create(name='Programming')
+        self.design = Category.objects.create(name='Design')
+
+        for employer, category, budget, order_status in [
+            (self.almaty_employer, self.programming, '5000.00', 'open'),
+            (self.almaty_employer, self.programming, '20000.00', 'open'),
+            (self.almaty_employer, self.design, '150000.00', 'completed'),
+            (self.astana_employer, self.design, '60000.00', 'open'),
+        ]:
+            Order.objects.create(
+                employer=employer,
+                title='Order',
+                description='Description',
+                budget=Decimal(budget),
+                category=category,
+                status=order_status
+            )
+
+    def test_filtered_orders(self):
+        orders = OrderService.get_filtered_orders({
+            'city': 'almaty',
+            'status': 'open',
+            'budget_min': Decimal('10000'),
+        })
+        self.assertEqual(orders.count(), 1)
+        self.assertEqual(orders.first().budget, Decimal('20000.00'))
+
+    def test_facets_in_single_query(self):
+        with self.assertNumQueries(1):
+            facets = OrderService.get_order_facets(OrderService.get_filtered_orders({}))
+
+        self.assertEqual(
+            {item['value']: item['count'] for item in facets['category']},
+            {self.programming.id: 2, self.design.id: 2}
+        )
+        self.assertEqual(
+            {item['value']: item['count'] for item in facets['city']},
+            {'almaty': 3, 'astana': 1}
+        )
+        self.assertEqual(
+            {item['value']: item['count'] for item in facets['budget']},
+            {'0-10000': 1, '10000-50000': 1, '50000-100000': 1, '100000+': 1}
+        )
+
+    def test_orderlist_returns_facets_for_filtered_set(self):
+        response = self.client.get('/api/v1/orderlist/', {'category': self.design.id})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data['results']), 2)
+        self.assertEqual(
+            {item['value']: item['count'] for item in response.data['facets']['city']},
+            {'almaty': 1, 'astana': 1}
+        )
+
+    def test_orderlist_rejects_invalid_filter(self):
+        response = self.client.get('/api/v1/orderlist/', {'city': 'moscow'})
+        self.assertEqual(response.status_code, 400)
+
+
+class CategoryCounterTestCase(TestCase):
+
+    def setUp(self):
+        self.employer = User.objects.create_user(
+            username='employer',
+            email='employer@example.com',
+            password='pass123'
+        )
+        Profile.objects.create(user=self.employer, role='employer')
+        self.worker = User.objects.create_user(
+            username='worker',
+            email='worker@example.com',
+            password='pass123'
+        )
+        Profile.objects.create(user=self.worker, role='worker')
+        self.category = Category.objects.create(name='Programming')
+
+    def _create_order(self):
+        return OrderService.create_order({
+            'employer': self.employer,
+            'title': 'Order',
+            'description': 'Description',
+            'budget': Decimal('1000.00'),
+            'category': self.category
+        })
+
+    def _counts(self):
+        self.category.refresh_from_db()
+        return {
+            status: getattr(self.category, field)
+            for status, field in Category.STATUS_COUNTER_FIELDS.items()
+        }
+
+    def test_counters_follow_every_transition(self):
+        completed = self._create_order()
+        cancelled = self._create_order()
+        accepted = self._create_order()
+        self._create_order()
+
+        OrderService.update_order_status(completed, 'in_progress', self.employer)
+        OrderService.update_order_status(completed, 'completed', self.employer)
+        OrderService.update_order_status(cancelled, 'cancelled', self.employer)
+        application = OrderApplication.objects.create(order=accepted, worker=self.worker)
+        OrderApplicationService.accept_application(application, self.employer)
+
+        self.assertEqual(self._counts(), {'open': 1, 'in_progress': 1, 'completed': 1, 'cancelled': 1})
+        self.assertEqual(CategoryService.find_counter_drift(), [])
+
+        OrderService.delete_order(cancelled, self.employer)
+        self.assertEqual(self._counts()['cancelled'], 0)
+
+    def test_stale_status_does_not_move_counters(self):
+        order = self._create_order()
+        stale = Order.objects.get(pk=order.pk)
+        OrderService.update_order_status(order, 'cancelled', self.employer)
+
+        with self.assertRaises(ValidationError):
+            OrderService.update_order_status(stale, 'in_progress', self.employer)
+
+        self.assertEqual(self._counts(), {'open': 0, 'in_progress': 0, 'completed': 0, 'cancelled': 1})
+
+    def test_drift_detection_and_set_based_recount(self):
+        order = self._create_order()
+        Order.objects.filter(pk=order.pk).update(status='completed')
+
+        drift = CategoryService.find_counter_drift([self.category.id])
+        self.assertEqual(
+            {(item['status'], item['stored'], item['actual']) for item in drift},
+            {('open', 1, 0), ('completed', 0, 1)}
+        )
+
+        with self.assertNumQueries(1):
+            CategoryService.sync_category_job_counts()
+        self.assertEqual(self._counts(), {'open': 0, 'in_progress': 0, 'completed': 1, 'cancelled': 0})
+        self.assertEqual(CategoryService.find_counter_drift(), [])
+
+
+class SingleFlightCacheTestCase(TestCase):
+
+    def test_cold_cache_loads_once_for_concurrent_readers(self):
+        import threading
+        import time
+        from .cache import SingleFlightCache
+
+        calls = []
+
+        def loader():
+            calls.append(1)
+            time.sleep(0.05)
+            return {'value': len(calls)}
+
+        cache = SingleFlightCache(loader, ttl=60)
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(cache.get())) for _ in range(20)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(results, [{'value': 1}] * 20)
+
+    def test_invalidate_forces_reload(self):
+        from .cache import SingleFlightCache
+
+        values = iter([1, 2])
+        cache = SingleFlightCache(lambda: next(values), ttl=60)
+        self.assertEqual(cache.get(), 1)
+        self.assertEqual(cache.get(), 1)
+        cache.invalidate()
+        self.assertEqual(cache.get(), 2)
+
+
+class JobStatsCacheTestCase(TestCase):
+
+    def setUp(self):
+        from rest_framework.test import APIClient
+        from .services import _job_stats_cache
+        self.client = APIClient()
+        _job_stats_cache.clear()
+        self.addCleanup(_job_stats_cache.clear)
+
+        self.employer = User.objects.create_user(
+            username='employer',
+            email='employer@example.com',
+            password='pass123'
+        )
+        Profile.objects.create(user=self.employer, role='employer')
+        self.category = Category.objects.create(name='Programming')
+
+    def test_stats_served_from_memory(self):
+        self.assertEqual(self.client.get('/api/v1/stats/').data, {'total_jobs': 0, 'total_categories': 1})
+        with self.assertNumQueries(0):
+            self.client.get('/api/v1/stats/')
+
+    def test_order_mutations_invalidate_stats(self):
+        self.client.get('/api/v1/stats/')
+        with self.captureOnCommitCallbacks(execute=True):
+            order = OrderService.create_order({
+                'employer': self.employer,
+                'title': 'Order',
+                'description': 'Description',
+                'budget': Decimal('1000.00'),
+                'category': self.category
+            })
+        self.assertEqual(self.client.get('/api/v1/stats/').data['total_jobs'], 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            OrderService.update_order_status(order, 'cancelled', self.employer)
+        self.assertEqual(self.client.get('/api/v1/stats/').data['total_jobs'], 0)
+
+
+class JWTClaimsTestCase(TestCase):
+
+    def setUp(self):
+        from rest_framework.test import APIClient
+        self.client = APIClient()
+
+        self.employer = User.objects.create_user(
+            username='employer',
+            email='employer@example.com',
+            password='pass123'
+        )
+        self.profile = Profile.objects.create(user=self.employer, role='employer')
+        self.worker = User.objects.create_user(
+            username='worker',
+            email='worker@example.com',
+            password='pass123'
+        )
+        Profile.objects.create(user=self.worker, role='worker')
+
+    def _token(self, username):
+        response = self.client.post('/api/v1/token/', {'username': username, 'password': 'pass123'})
+        self.assertEqual(response.status_code, 200)
+        return response.data['access']
+
+    def test_token_contains_role_claims(self):
+        from rest_framework_simplejwt.tokens import AccessToken
+        token = AccessToken(self._token('employer'))
+        self.assertEqual(token['role'], 'employer')
+        self.assertEqual(token['profile_id'], self.profile.id)
+
+    def test_authenticated_get_needs_no_auth_queries(self):
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {self._token("employer")}')
+        # версия списка для ETag и сама страница заказов, без запросов за пользователем
+        with self.assertNumQueries(2):
+            response = self.client.get('/api/v1/myorderslist/')
+        self.assertEqual(response.status_code, 200)
+
+    def test_role_permission_uses_claims(self):
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {self._token("worker")}')
+        self.assertEqual(self.client.get('/api/v1/applicationlist/').status_code, 403)
+        self.assertEqual(self.client.get('/api/v1/myapplicationslist/').status_code, 200)
+
+    def test_token_without_claims_falls_back_to_database(self):
+        from rest_framework_simplejwt.tokens import AccessToken
+        token = AccessToken.for_user(self.worker)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+        self.assertEqual(self.client.get('/api/v1/myapplicationslist/').status_code, 200)
+
+
+class ApplicationLockingTestCase(TransactionTestCase):
+
+    def setUp(self):
+        self.employer = User.objects.create_user(
+            username='employer',
+            email='employer@example.com',
+            password='pass123'
+        )
+        Profile.objects.create(user=self.employer, role='employer')
+        self.category = Category.objects.create(name='Programming')
+        self.order = OrderService.create_order({
+            'employer': self.employer,
+            'title': 'Hot order',
+            'description': 'Description',
+            'budget': Decimal('1000.00'),
+            'category': self.category
+        })
+        self.applications = []
+        for i in range(4):
+            worker = User.objects.create(username=f'worker{i}')
+            Profile.objects.create(user=worker, role='worker')
+            self.applications.append(OrderApplication.objects.create(order=self.order, worker=worker))
+
+    def test_concurrent_accepts_only_one_wins(self):
+        import threading
+        from django.db import connection
+
+        barrier = threading.Barrier(len(self.applications))
+        outcomes = []
+
+        def accept(application):
+            try:
+                barrier.wait()
+                OrderApplicationService.accept_application(application, self.employer)
+                outcomes.append('accepted')
+            except ValidationError:
+                outcomes.append('conflict')
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=accept, args=(app,)) for app in self.applications]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(sorted(outcomes), ['accepted', 'conflict', 'conflict', 'conflict'])
+        self.assertEqual(OrderApplication.objects.filter(order=self.order, status='accepted').count(), 1)
+        self.category.refresh_from_db()
+        self.assertEqual((self.category.job_count, self.category.in_progress_count), (0, 1))
+
+    def test_apply_to_taken_order_is_rejected(self):
+        OrderApplicationService.accept_application(self.applications[0], self.employer)
+        late = User.objects.create(username='late')
+        Profile.objects.create(user=late, role='worker')
+
+        with self.assertRaises(ValidationError):
+            OrderApplicationService.create_application({'order': self.order, 'worker': late})
+
+    def test_skip_locked_accept_does_not_wait(self):
+        import threading
+        from django.db import connection, transaction
+
+        locked = threading.Event()
+        release = threading.Event()
+
+        def hold_lock():
+            with transaction.atomic():
+                Order.objects.select_for_update().get(pk=self.order.pk)
+                locked.set()
+                release.wait(5)
+            connection.close()
+
+        holder = threading.Thread(target=hold_lock)
+        holder.start()
+        locked.wait(5)
+        try:
+            with self.assertRaises(ValidationError) as context:
+                OrderApplicationService.accept_application(
+                    self.applications[0], self.employer, skip_locked=True
+                )
+            self.assertIn('another request', str(context.exception))
+        finally:
+            release.set()
+            holder.join()
+
+
+class BulkApplicationActionTestCase(TestCase):
+
+    def setUp(self):
+        from rest_framework.test import APIClient
+        self.client = APIClient()
+
+        self.employer = User.objects.create_user(
+            username='employer',
+            email='employer@example.com',
+            password='pass123'
+        )
+        Profile.objects.create(user=self.employer, role='employer')
+        self.other_employer = User.objects.create(username='other')
+        Profile.objects.create(user=self.other_employer, role='employer')
+        self.category = Category.objects.create(name='Programming')
+
+        self.workers = []
+        for i in range(5):
+            worker = User.objects.create(username=f'worker{i}')
+            Profile.objects.create(user=worker, role='worker')
+            self.workers.append(worker)
+
+        self.orders = [self._order(self.employer) for _ in range(3)]
+        self.foreign_order = self._order(self.other_employer)
+
+    def _order(self, employer):
+        return OrderService.create_order({
+            'employer': employer,
+            'title': 'Order',
+            'description': 'Description',
+            'budget': Decimal('1000.00'),
+            'category': self.category
+        })
+
+    def _apply(self, order, worker, **kwargs):
+        return OrderApplication.objects.create(order=order, worker=worker, **kwargs)
+
+    def test_bulk_reject_reports_per_item(self):
+        pending = [self._apply(self.orders[0], worker) for worker in self.workers[:3]]
+        decided = self._apply(self.orders[1], self.workers[0], status='accepted')
+        foreign = self._apply(self.foreign_order, self.workers[0])
+        ids = [app.id for app in pending] + [decided.id, foreign.id, 999999]
+
+        results = OrderApplicationService.bulk_update_applications(ids, 'reject', self.employer)
+
+        self.assertEqual([item['status'] for item in results], ['rejected'] * 3 + ['error'] * 3)
+        self.assertIn('pending', results[3]['detail'])
+        self.assertIn('permission', results[4]['detail'])
+        self.assertIn('not found', results[5]['detail'])
+        self.assertEqual(OrderApplication.objects.filter(status='rejected').count(), 3)
+
+    def test_bulk_accept_one_per_order(self):
+        first = self._apply(self.orders[0], self.workers[0])
+        same_order = self._apply(self.orders[0], self.workers[1])
+        second = self._apply(self.orders[1], self.workers[0])
+        bystander = self._apply(self.orders[1], self.workers[2])
+
+        results = OrderApplicationService.bulk_update_applications(
+            [first.id, same_order.id, second.id], 'accept', self.employer
+        )
+
+        self.assertEqual([item['status'] for item in results], ['accepted', 'error', 'accepted'])
+        bystander.refresh_from_db()
+        same_order.refresh_from_db()
+        self.assertEqual((bystander.status, same_order.status), ('rejected', 'rejected'))
+        self.assertEqual(
+            set(Order.objects.filter(id__in=[self.orders[0].id, self.orders[1].id]).values_list('status', flat=True)),
+            {'in_progress'}
+        )
+        self.category.refresh_from_db()
+        self.assertEqual((self.category.job_count, self.category.in_progress_count), (2, 2))
+        self.assertEqual(CategoryService.find_counter_drift(), [])
+
+    def test_bulk_accept_requires_pending_application(self):
+        rejected = self._apply(self.orders[0], self.workers[0], status='rejected')
+        pending = self._apply(self.orders[0], self.workers[1])
+
+        results = OrderApplicationService.bulk_update_applications([rejected.id, pending.id], 'accept', self.employer)
+
+        # отклонённая заявка не занимает место принятой для заказа
+        self.assertEqual([item['status'] for item in results], ['error', 'accepted'])
+        self.assertIn('pending', results[0]['detail'])
+        rejected.refresh_from_db()
+        self.assertEqual(rejected.status, 'rejected')
+        self.assertEqual(OrderApplication.objects.filter(order=self.orders[0], status='accepted').count(), 1)
+
+    def test_statement_count_does_not_grow_with_batch(self):
+        for order in self.orders:
+            for worker in self.workers:
+                self._apply(order, worker)
+        ids = list(OrderApplication.objects.values_list('id', flat=True))
+
+        with self.assertNumQueries(4 + 2):  # savepoint + select + lock + update + pg_notify + release
+            OrderApplicationService.bulk_update_applications(ids, 'reject', self.employer)
+
+    def test_bulk_endpoint(self):
+        application = self._apply(self.orders[2], self.workers[0])
+        self.client.force_authenticate(self.employer)
+        response = self.client.post(
+            '/api/v1/applications/bulk/',
+            {'action': 'accept', 'application_ids': [application.id]},
+            format='json'
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual((response.data['succeeded'], response.data['failed']), (1, 0))
+
+        response = self.client.post(
+            '/api/v1/applications/bulk/', {'action': 'archive', 'application_ids': [1]}, format='json'
+        )
+        self.assertEqual(response.status_code, 400)
+
+
+class RowSerializerParityTestCase(TestCase):
+
+    def setUp(self):
+        self.employer = User.objects.create_user(
+            username='employer',
+            email='employer@example.com',
+            password='pass123'
+        )
+        Profile.objects.create(user=self.employer, role='employer')
+        self.worker = User.objects.create_user(
+            username='worker',
+            email='worker@example.com',
+            password='pass123'
+        )
+        Profile.objects.create(user=self.worker, role='worker')
+        category = Category.objects.create(name='Programming')
+
+        for i, budget in enumerate(['1000.00', '0.50', '99999999.99']):
+            order = Order.objects.create(
+                employer=self.employer,
+                title=f'Order {i}',
+                description='Описание',
+                budget=Decimal(budget),
+                category=category,
+                status='completed'
+            )
+            OrderApplication.objects.create(order=order, worker=self.worker, status='accepted')
+            Review.objects.create(
+                order=order,
+                reviewer=self.employer,
+                worker=self.worker,
+                rating=4,
+                comment=None if i else 'Хорошо'
+            )
+
+    def assertSameOutput(self, serializer_class, row_serializer_class, queryset):
+        from django.test import RequestFactory
+        request = RequestFactory().get('/')
+        request.user = self.employer
+        expected = serializer_class(queryset, many=True, context={'request': request}).data
+        actual = row_serializer_class.serialize(row_serializer_class.project(queryset))
+        self.assertEqual([list(item.items()) for item in actual], [list(item.items()) for item in expected])
+
+    def test_order_rows(self):
+        from .serializers import OrderSerializer, OrderRowSerializer
+        self.assertSameOutput(OrderSerializer, OrderRowSerializer, OrderService.get_user_orders(self.employer))
+
+    def test_application_rows(self):
+        from .serializers import (
+            OrderApplicationSerializer, OrderApplicationSerializerForEmployer,
+            OrderApplicationRowSerializer, OrderApplicationRowSerializerForEmployer
+        )
+        self.assertSameOutput(
+            OrderApplicationSerializerForEmployer, OrderApplicationRowSerializerForEmployer,
+            OrderApplicationService.get_employer_applications(self.employer)
+        )
+        self.assertSameOutput(
+            OrderApplicationSerializer, OrderApplicationRowSerializer,
+            OrderApplicationService.get_worker_applications(self.worker)
+        )
+
+    def test_review_rows(self):
+        from .serializers import ReviewSerializer, ReviewRowSerializer
+        # без order_by порядок строк зависит от плана запроса, а планы у двух путей разные
+        self.assertSameOutput(
+            ReviewSerializer, ReviewRowSerializer, ReviewService.get_user_reviews(self.employer).order_by('id')
+        )
+
+
+class ORJSONRendererTestCase(TestCase):
+
+    def test_renders_decimal_datetime_and_lazy_strings(self):
+        import datetime
+        import json
+        from django.utils.translation import gettext_lazy
+        from .renderers import ORJSONRenderer
+
+        payload = {
+            'budget': Decimal('1500.50'),
+            'created_at': datetime.datetime(2025, 1, 2, 3, 4, 5, tzinfo=datetime.timezone.utc),
+            'label': gettext_lazy('Open'),
+            1: 'non-str key',
+        }
+        rendered = json.loads(ORJSONRenderer().render(payload))
+        self.assertEqual(rendered, {
+            'budget': 1500.5,
+            'created_at': '2025-01-02T03:04:05Z',
+            'label': 'Open',
+            '1': 'non-str key',
+        })
+
+    def test_parser_rejects_invalid_json(self):
+        from rest_framework.test import APIClient
+        employer = User.objects.create(username='employer')
+        Profile.objects.create(user=employer, role='employer')
+        client = APIClient()
+        client.force_authenticate(employer)
+
+        response = client.post('/api/v1/applications/bulk/', b'{"action": ', content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+
+    def test_stream_matches_pages_and_requires_auth(self):
+        import json
+        from django.test import override_settings
+        from rest_framework.test import APIClient
+        employer = User.objects.create(username='employer')
+        Profile.objects.create(user=employer, role='employer')
+        category = Category.objects.create(name='Programming')
+        for i in range(5):
+            Order.objects.create(
+                employer=employer,
+                title=f'Order {i}',
+                description='Description',
+                budget=Decimal('1000.00'),
+                category=category
+            )
+
+        client = APIClient()
+        self.assertEqual(client.get('/api/v1/orderlist/', {'stream': '1'}).status_code, 401)
+
+        client.force_authenticate(employer)
+        response = client.get('/api/v1/orderlist/', {'stream': '1', 'page_size': 2})
+        self.assertTrue(response.streaming)
+        rows = json.loads(b''.join(response.streaming_content))
+        self.assertEqual(
+            [row['id'] for row in rows],
+            list(Order.objects.order_by('-created_at', '-id').values_list('id', flat=True))
+        )
+        self.assertEqual(rows[0]['budget'], '1000.00')
+        # те же строки и те же метки времени, что и в постраничной выдаче
+        self.assertEqual(rows, json.loads(client.get('/api/v1/orderlist/', {'page_size': 5}).content)['results'])
+
+        # больше STREAM_MAX_ROWS — ошибка до начала потока, а не обрезанный массив
+        with override_settings(STREAM_MAX_ROWS=4):
+            response = client.get('/api/v1/orderlist/', {'stream': '1'})
+            self.assertEqual(response.status_code, 400)
+            self.assertIn('/api/v1/export/', response.json()['stream'][0])
+        with override_settings(STREAM_MAX_ROWS=5):
+            response = client.get('/api/v1/orderlist/', {'stream': '1'})
+            self.assertEqual(len(json.loads(b''.join(response.streaming_content))), 5)
+
+    def test_iter_json_array_chunks(self):
+        import json
+        from .renderers import iter_json_array
+
+        chunks = list(iter_json_array(({'n': i} for i in range(5)), chunk_size=2))
+        self.assertEqual(len(chunks), 5)  # '[', 3 куска, ']'
+        self.assertEqual(json.loads(b''.join(chunks)), [{'n': i} for i in range(5)])
+        self.assertEqual(b''.join(iter_json_array([])), b'[]')
+
+
+class ConditionalGetTestCase(TestCase):
+
+    def setUp(self):
+        from rest_framework.test import APIClient
+        self.client = APIClient()
+
+        self.employer = User.objects.create(username='employer')
+        Profile.objects.create(user=self.employer, role='employer')
+        self.worker = User.objects.create(username='worker')
+        Profile.objects.create(user=self.worker, role='worker')
+        self.category = Category.objects.create(name='Programming')
+        self.order = self._create_order()
+
+    def _create_order(self):
+        return OrderService.create_order({
+            'employer': self.employer,
+            'title': 'Django backend',
+            'description': 'REST API',
+            'budget': Decimal('1000.00'),
+            'category': self.category,
+        })
+
+    def test_orderlist_not_modified_skips_list_queries(self):
+        response = self.client.get('/api/v1/orderlist/')
+        self.assertEqual(response.status_code, 200)
+        etag = response['ETag']
+
+        # только версия: MAX(updated_at) заказов и агрегат по категориям
+        with self.assertNumQueries(2):
+            response = self.client.get('/api/v1/orderlist/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], etag)
+
+        self._create_order()
+        response = self.client.get('/api/v1/orderlist/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_orderlist_etag_depends_on_query_string(self):
+        first = self.client.get('/api/v1/orderlist/')
+        filtered = self.client.get('/api/v1/orderlist/', {'status': 'open'}, HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(filtered.status_code, 200)
+        self.assertNotEqual(filtered['ETag'], first['ETag'])
+
+    def test_status_change_changes_etag(self):
+        application = OrderApplicationService.create_application({
+            'order': self.order, 'worker': self.worker, 'cover_letter': 'Hi'
+        })
+        self.client.force_authenticate(self.worker)
+        etag = self.client.get('/api/v1/myapplicationslist/')['ETag']
+        self.assertEqual(self.client.get('/api/v1/myapplicationslist/', HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        OrderApplicationService.reject_application(application, self.employer)
+        response = self.client.get('/api/v1/myapplicationslist/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['results'][0]['status'], 'rejected')
+
+    def test_delete_without_newer_updated_at_changes_etag(self):
+        from django.utils.http import http_date
+
+        self.client.force_authenticate(self.employer)
+        newer = self._create_order()
+        # оба заказа изменены в одну и ту же микросекунду
+        Order.objects.update(updated_at=self.order.updated_at)
+        response = self.client.get('/api/v1/myorderslist/')
+        etag = response['ETag']
+        self.assertFalse(response.has_header('Last-Modified'))
+
+        # MAX(updated_at) не сдвигается, меняется только число строк
+        OrderService.delete_order(newer, self.employer)
+        response = self.client.get('/api/v1/myorderslist/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data['results']), 1)
+
+        # без If-None-Match If-Modified-Since не даёт 304
+        response = self.client.get('/api/v1/myorderslist/', HTTP_IF_MODIFIED_SINCE=http_date(2 ** 32))
+        self.assertEqual(response.status_code, 200)
+
+    def test_profile_etag_changes_after_update(self):
+        self.client.force_authenticate(self.worker)
+        etag = self.client.get('/api/v1/profile/')['ETag']
+        self.assertEqual(self.client.get('/api/v1/profile/', HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        self.client.patch('/api/v1/profile/', {'bio': 'Python developer'}, format='json')
+        response = self.client.get('/api/v1/profile/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['bio'], 'Python developer')
+
+
+class AsyncReadViewsTestCase(TestCase):
+
+    def setUp(self):
+        from rest_framework.test import APIClient
+        from rest_framework_simplejwt.tokens import RefreshToken
+        from .serializers import WorkifyTokenObtainPairSerializer
+        self.client = APIClient()
+
+        self.employer = User.objects.create(username='employer')
+        Profile.objects.create(user=self.employer, role='employer')
+        self.worker = User.objects.create(username='worker')
+        Profile.objects.create(user=self.worker, role='worker')
+        self.category = Category.objects.create(name='Programming')
+        for i in range(3):
+            order = OrderService.create_order({
+                'employer': self.employer,
+                'title': f'Order {i}',
+                'description': 'Description',
+                'budget': Decimal('1000.00') + i,
+                'category': self.category,
+            })
+            Review.objects.create(order=order, reviewer=self.employer, worker=self.worker, rating=5)
+
+        self.token = str(WorkifyTokenObtainPairSerializer.get_token(self.employer).access_token)
+        self.legacy_token = str(RefreshToken.for_user(self.employer).access_token)
+
+    async def _call(self, view_class, path, data=None, **headers):
+        from django.test import AsyncRequestFactory
+        request = AsyncRequestFactory().get(path, data or {}, headers=headers)
+        return await view_class.as_view()(request)
+
+    async def test_orderlist_matches_sync_view(self):
+        import json
+        from asgiref.sync import sync_to_async
+        from .async_views import AsyncOrderListView
+
+        params = {'page_size': 2, 'status': 'open'}
+        response = await self._call(AsyncOrderListView, '/api/v1/orderlist/', params)
+        expected = await sync_to_async(self.client.get)('/api/v1/orderlist/', params)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(json.loads(response.content), json.loads(expected.content))
+        self.assertEqual(response['ETag'], expected['ETag'])
+
+    async def test_categorylist_matches_sync_view(self):
+        import json
+        from asgiref.sync import sync_to_async
+        from .async_views import AsyncCategoryListView
+
+        for i in range(2):
+            await Category.objects.acreate(name=f'Category {i}')
+        params = {'page_size': 2}
+        response = await self._call(AsyncCategoryListView, '/api/v1/categorylist/', params)
+        expected = await sync_to_async(self.client.get)('/api/v1/categorylist/', params)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(json.loads(response.content), json.loads(expected.content))
+        self.assertIsNotNone(json.loads(response.content)['next'])
+
+    async def test_orderlist_rejects_stream(self):
+        from .async_views import AsyncOrderListView
+
+        response = await self._call(AsyncOrderListView, '/api/v1/orderlist/', {'stream': '1'})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('stream', response.content.decode())
+
+    async def test_orderlist_not_modified_and_invalid_filter(self):
+        from .async_views import AsyncOrderListView
+
+        etag = (await self._call(AsyncOrderListView, '/api/v1/orderlist/'))['ETag']
+        response = await self._call(AsyncOrderListView, '/api/v1/orderlist/', if_none_match=etag)
+        self.assertEqual(response.status_code, 304)
+
+        response = await self._call(AsyncOrderListView, '/api/v1/orderlist/', {'status': 'unknown'})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('status', response.content.decode())
+
+    async def test_reviews_require_token_and_read_claims(self):
+        import json
+        from .async_views import AsyncReviewListView
+
+        response = await self._call(AsyncReviewListView, '/api/v1/reviewlist/')
+        self.assertEqual(response.status_code, 401)
+
+        for token in (self.token, self.legacy_token):
+            response = await self._call(
+                AsyncReviewListView, '/api/v1/reviewlist/', authorization=f'Bearer {token}'
+            )
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(len(json.loads(response.content)['results']), 3)
+
+    async def test_categories_and_stats(self):
+        import json
+        from .async_views import AsyncCategoryListView, AsyncJobStatsView
+
+        categories = json.loads((await self._call(AsyncCategoryListView, '/api/v1/categorylist/')).content)
+        self.assertEqual(categories['results'][0]['job_count'], 3)
+        stats = json.loads((await self._call(AsyncJobStatsView, '/api/v1/stats/')).content)
+        self.assertEqual(stats, {'total_jobs': 3, 'total_categories': 1})
+
+
+class EventBrokerTestCase(TransactionTestCase):
+
+    def setUp(self):
+        self.employer = User.objects.create(username='employer')
+        Profile.objects.create(user=self.employer, role='employer')
+        self.worker = User.objects.create(username='worker')
+        Profile.objects.create(user=self.worker, role='worker')
+        self.category = Category.objects.create(name='Programming')
+        self.order = OrderService.create_order({
+            'employer': self.employer,
+            'title': 'Django backend',
+            'description': 'REST API',
+            'budget': Decimal('1000.00'),
+            'category': self.category,
+        })
+
+    def _with_broker(self, scenario):
+        import asyncio
+        from asgiref.sync import async_to_sync
+        from .events import EventBroker
+
+        async def run():
+            broker = EventBroker()
+            employer = broker.subscribe(self.employer.pk)
+            worker = broker.subscribe(self.worker.pk)
+            try:
+                await asyncio.wait_for(broker.listening.wait(), 5)
+                await scenario(employer, worker)
+            finally:
+                await broker.stop()
+
+        async_to_sync(run)()
+
+    def test_committed_mutations_reach_subscribers(self):
+        from asgiref.sync import sync_to_async
+
+        async def scenario(employer, worker):
+            application = await sync_to_async(OrderApplicationService.create_application)({
+                'order': self.order, 'worker': self.worker, 'cover_letter': 'Hi'
+            })
+            self.assertEqual(await employer.get(5), ('application.created', {
+                'application': application.pk, 'order': self.order.pk, 'worker': self.worker.pk, 'status': 'pending'
+            }))
+
+            await sync_to_async(OrderApplicationService.accept_application)(application, self.employer)
+            received = [await worker.get(5), await worker.get(5)]
+            self.assertIn(
+                ('application.status', {'application': application.pk, 'order': self.order.pk, 'status': 'accepted'}),
+                received
+            )
+            self.assertIn(('order.status', {'order': self.order.pk, 'status': 'in_progress'}), received)
+
+        self._with_broker(scenario)
+
+    def test_rolled_back_mutation_is_not_delivered(self):
+        from asgiref.sync import sync_to_async
+        from django.db import transaction
+
+        def apply_and_rollback():
+            with transaction.atomic():
+                OrderApplicationService.create_application({
+                    'order': self.order, 'worker': self.worker, 'cover_letter': 'Hi'
+                })
+                transaction.set_rollback(True)
+
+        async def scenario(employer, worker):
+            await sync_to_async(apply_and_rollback)()
+            self.assertIsNone(await employer.get(0.5))
+
+        self._with_broker(scenario)
+
+
+class EventStreamTestCase(TestCase):
+
+    def test_stream_sends_heartbeat_events_and_resync_on_overflow(self):
+        from asgiref.sync import async_to_sync
+        from .events import EventBroker, Subscription, event_stream
+
+        async def run():
+            broker = EventBroker()
+            subscription = Subscription(broker, user_id=1, maxsize=2)
+            broker.subscribers[1].add(subscription)
+            stream = event_stream(subscription, heartbeat=0.01)
+
+            self.assertEqual(await stream.__anext__(), 'retry: 3000\n\n')
+            self.assertEqual(await stream.__anext__(), ': ping\n\n')
+
+            broker.dispatch('{"u": [1, 2], "e": "order.status", "d": {"order": 5, "status": "completed"}}')
+            self.assertEqual(
+                await stream.__anext__(),
+                'event: order.status\ndata: {"order":5,"status":"completed"}\n\n'
+            )
+
+            for i in range(3):
+                broker.dispatch(f'{{"u": [1], "e": "application.created", "d": {{"application": {i}}}}}')
+            chunks = [chunk async for chunk in stream]
+            self.assertEqual(len(chunks), 3)
+            self.assertTrue(chunks[-1].startswith('event: resync'))
+            # поток закрыт — подписка снята
+            self.assertNotIn(1, broker.subscribers)
+
+        async_to_sync(run)()
+
+    def test_event_stream_view_auth(self):
+        from asgiref.sync import async_to_sync
+        from django.test import AsyncRequestFactory
+        from rest_framework_simplejwt.tokens import AccessToken
+        from .async_views import EventStreamView
+        from .events import get_broker
+
+        user = User.objects.create(username='worker')
+        token = str(AccessToken.for_user(user))
+
+        async def run():
+            factory = AsyncRequestFactory()
+            response = await EventStreamView.as_view()(factory.get('/api/v1/events/'))
+            self.assertEqual(response.status_code, 401)
+
+            response = await EventStreamView.as_view()(factory.get('/api/v1/events/', {'token': token}))
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response['Content-Type'], 'text/event-stream')
+            broker = get_broker()
+            self.assertIn(user.pk, broker.subscribers)
+            await broker.stop()
+
+        async_to_sync(run)()
+
+
+class MetricsTestCase(TestCase):
+
+    def setUp(self):
+        from rest_framework.test import APIClient
+        self.client = APIClient()
+        employer = User.objects.create(username='employer')
+        Profile.objects.create(user=employer, role='employer')
+        category = Category.objects.create(name='Programming')
+        OrderService.create_order({
+            'employer': employer,
+            'title': 'Django backend',
+            'description': 'REST API',
+            'budget': Decimal('1000.00'),
+            'category': category,
+        })
+
+    @staticmethod
+    def _sample(name, **labels):
+        from prometheus_client import REGISTRY
+        return REGISTRY.get_sample_value(name, labels) or 0
+
+    def test_request_recorded_per_url_name(self):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+
+        requests_before = self._sample(
+            'workify_request_duration_seconds_count', view='orderlist', method='GET', status='200'
+        )
+        queries_before = self._sample('workify_db_queries_total', view='orderlist')
+        bytes_before = self._sample('workify_response_bytes_sum', view='orderlist')
+
+        with CaptureQueriesContext(connection) as captured:
+            response = self.client.get('/api/v1/orderlist/')
+
+        self.assertEqual(
+            self._sample('workify_request_duration_seconds_count', view='orderlist', method='GET', status='200'),
+            requests_before + 1
+        )
+        self.assertEqual(self._sample('workify_db_queries_total', view='orderlist'), queries_before + len(captured))
+        self.assertEqual(self._sample('workify_response_bytes_sum', view='orderlist'), bytes_before + len(response.content))
+
+        body = self.client.get('/api/v1/metrics').content.decode()
+        self.assertIn('workify_request_duration_seconds_bucket{le="0.005",method="GET",status="200",view="orderlist"}', body)
+        self.assertIn('workify_serialize_duration_seconds_count{view="orderlist"}', body)
+
+    def test_async_chain_counts_queries_from_sync_to_async(self):
+        from asgiref.sync import async_to_sync
+        from django.http import HttpResponse
+        from django.test import RequestFactory
+        from .middleware import MetricsMiddleware
+
+        async def view(request):
+            await Category.objects.acount()
+            await Order.objects.acount()
+            return HttpResponse(b'ok')
+
+        before = self._sample('workify_db_queries_total', view='unmatched')
+        response = async_to_sync(MetricsMiddleware(view))(RequestFactory().get('/nowhere/'))
+        self.assertEqual(response.content, b'ok')
+        self.assertEqual(self._sample('workify_db_queries_total', view='unmatched'), before + 2)
+
+    def test_metrics_token(self):
+        from django.test import override_settings
+        with override_settings(METRICS_TOKEN='secret'):
+            self.assertEqual(self.client.get('/api/v1/metrics').status_code, 403)
+            response = self.client.get('/api/v1/metrics', HTTP_AUTHORIZATION='Bearer secret')
+            self.assertEqual(response.status_code, 200)
+            self.assertTrue(response['Content-Type'].startswith('text/plain'))
+
+
+class GenerateDatasetTestCase(TestCase):
+
+    def _generate(self, seed):
+        from io import StringIO
+        from django.core.management import call_command
+        call_command(
+            'generate_dataset', employers=3, workers=10, orders=50, applications=200, reviews=10,
+            seed=seed, batch=20, stdout=StringIO()
+        )
+
+    def test_reproducible_and_counters_in_sync(self):
+        self._generate(5)
+        orders = Order.objects.filter(employer__username__startswith='gen5-')
+        self.assertEqual(orders.count(), 50)
+        self.assertEqual(User.objects.filter(username__startswith='gen5-worker').count(), 10)
+        snapshot = list(orders.order_by('id').values_list('title', 'budget', 'status'))
+
+        for category in Category.objects.all():
+            self.assertEqual(category.job_count, category.orders.filter(status='open').count())
+        # заявки уникальны по (order, worker), у каждого занятого заказа ровно один принятый
+        for order in orders.filter(status__in=['in_progress', 'completed']).prefetch_related('applications'):
+            statuses = [application.status for application in order.applications.all()]
+            self.assertLessEqual(statuses.count('accepted'), 1)
+
+        # тот же seed повторно не пишет поверх, а новый датасет с ним совпадает
+        from django.core.management.base import CommandError
+        with self.assertRaises(CommandError):
+            self._generate(5)
+        User.objects.filter(username__startswith='gen5-').delete()
+        self._generate(5)
+        self.assertEqual(
+            list(Order.objects.filter(employer__username__startswith='gen5-').order_by('id')
+                 .values_list('title', 'budget', 'status')),
+            snapshot
+        )
+
+
+class ExportTestCase(TestCase):
+
+    def setUp(self):
+        from rest_framework.test import APIClient
+        self.client = APIClient()
+
+        self.employer = User.objects.create(username='employer')
+        Profile.objects.create(user=self.employer, role='employer')
+        self.other_employer = User.objects.create(username='other')
+        Profile.objects.create(user=self.other_employer, role='employer')
+        self.worker = User.objects.create(username='worker')
+        Profile.objects.create(user=self.worker, role='worker')
+        self.category = Category.objects.create(name='Programming')
+
+        self.orders = [self._create_order(self.employer, f'Заказ, "{i}"') for i in range(5)]
+        self.foreign_order = self._create_order(self.other_employer, 'Чужой')
+        for order in self.orders[:3] + [self.foreign_order]:
+            OrderApplication.objects.create(order=order, worker=self.worker, cover_letter='строка\nвторая')
+
+    def _create_order(self, employer, title):
+        return OrderService.create_order({
+            'employer': employer,
+            'title': title,
+            'description': 'REST API',
+            'budget': Decimal('1000.00'),
+            'category': self.category,
+        })
+
+    def _download(self, url, user):
+        self.client.force_authenticate(user)
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return b''.join(response.streaming_content).decode()
+
+    def test_csv_orders_only_own_and_round_trip(self):
+        import csv
+        import io
+        body = self._download('/api/v1/export/orders.csv', self.employer)
+        rows = list(csv.DictReader(io.StringIO(body)))
+        self.assertEqual([int(row['id']) for row in rows], [order.pk for order in self.orders])
+        self.assertEqual(rows[0]['title'], 'Заказ, "0"')
+        self.assertEqual(rows[0]['budget'], '1000.00')
+
+    def test_ndjson_applications_follow_ownership(self):
+        import json
+        lines = self._download('/api/v1/export/applications.ndjson', self.employer).splitlines()
+        self.assertEqual(len(lines), 3)
+        self.assertEqual(json.loads(lines[0])['cover_letter'], 'строка\nвторая')
+        self.assertIn('worker_email', json.loads(lines[0]))
+
+        lines = self._download('/api/v1/export/applications.ndjson', self.worker).splitlines()
+        self.assertEqual(len(lines), 4)
+        self.assertNotIn('worker_email', json.loads(lines[0]))
+
+        lines = self._download(f'/api/v1/export/applications.ndjson?order={self.orders[0].pk}', self.employer).splitlines()
+        self.assertEqual(len(lines), 1)
+
+    def test_chunks_and_bad_requests(self):
+        from . import exports
+        chunks = list(exports.iter_export('orders', 'ndjson', self.employer, chunk_size=2))
+        self.assertEqual([chunk.count(b'\n') for chunk in chunks], [2, 2, 1])
+
+        self.client.force_authenticate(self.employer)
+        self.assertEqual(self.client.get('/api/v1/export/orders.xml').status_code, 404)
+        self.assertEqual(self.client.get('/api/v1/export/reviews.csv?order=x').status_code, 400)
+        self.client.force_authenticate(None)
+        self.assertEqual(self.client.get('/api/v1/export/orders.csv').status_code, 401)
+
+    def test_command_exports_everything_without_user(self):
+        import os
+        import tempfile
+        from io import StringIO
+        from django.core.management import call_command
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'orders.ndjson')
+            call_command('export_data', 'orders', format='ndjson', output=path, stderr=StringIO())
+            with open(path, 'rb') as exported:
+                self.assertEqual(len(exported.read().splitlines()), 6)
+
+        out = StringIO()
+        call_command('export_data', 'applications', user='worker', stdout=out, stderr=StringIO())
+        self.assertEqual(out.getvalue().splitlines()[0].split(',')[:2], ['id', 'order'])
+
+
+class BulkOrderImportTestCase(TestCase):
+
+    def setUp(self):
+        from rest_framework.test import APIClient
+        self.client = APIClient()
+        self.employer = User.objects.create(username='employer')
+        Profile.objects.create(user=self.employer, role='employer')
+        self.category = Category.objects.create(name='Programming')
+        self.other = Category.objects.create(name='Design')
+        self.client.force_authenticate(self.employer)
+
+    def test_json_batch_one_counter_update_per_batch(self):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        from . import importers
+
+        rows = [
+            {'title': f'Заказ {i}', 'description': 'Описание', 'budget': '100.50',
+             'category': self.category.pk if i % 2 else self.other.pk}
+            for i in range(10)
+        ]
+        rows[3] = {'title': '', 'description': 'x', 'budget': 'abc', 'category': self.category.pk}
+        rows[7]['category'] = 999999
+
+        with CaptureQueriesContext(connection) as captured:
+            report = importers.import_orders(self.employer, enumerate(rows, 1), batch_size=4)
+        updates = [q['sql'] for q in captured if q['sql'].startswith('UPDATE')]
+        self.assertEqual(len(updates), 3)
+
+        self.assertEqual(report['created'], 8)
+        self.assertEqual(report['failed'], 2)
+        self.assertEqual([error['row'] for error in report['errors']], [4, 8])
+        self.assertIn('budget', report['errors'][0]['errors'])
+        self.assertIn('category', report['errors'][1]['errors'])
+
+        self.category.refresh_from_db()
+        self.other.refresh_from_db()
+        self.assertEqual(self.category.job_count, Order.objects.filter(category=self.category).count())
+        self.assertEqual(self.other.job_count, 5)
+        self.assertEqual(set(report['ids']), set(Order.objects.values_list('id', flat=True)))
+
+    def test_endpoint_csv_and_ndjson(self):
+        csv_body = (
+            'title,description,budget,category\n'
+            f'"Сайт, срочно","многострочное\nописание",1500.00,{self.category.pk}\n'
+            f'Плохой,описание,-,{self.category.pk}\n'
+        ).encode()
+        response = self.client.generic('POST', '/api/v1/orders/bulk/', csv_body, content_type='text/csv')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual((response.data['created'], response.data['failed']), (1, 1))
+        order = Order.objects.get(pk=response.data['ids'][0])
+        self.assertEqual((order.title, order.description, order.status), ('Сайт, срочно', 'многострочное\nописание', 'open'))
+
+        ndjson_body = b'{"title": "A", "description": "d", "budget": 1, "category": %d}\n\nnot json\n' % self.other.pk
+        response = self.client.generic('POST', '/api/v1/orders/bulk/', ndjson_body, content_type='application/x-ndjson')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['errors'][0]['row'], 2)
+
+    def test_endpoint_rejects(self):
+        from django.test import override_settings
+        response = self.client.post('/api/v1/orders/bulk/', {'orders': []}, format='json')
+        self.assertEqual(response.status_code, 400)
+
+        bad = [{'title': 'x', 'description': 'd', 'budget': '1', 'category': 999999}]
+        response = self.client.post('/api/v1/orders/bulk/', bad, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data['created'], 0)
+
+        rows = [{'title': 'x', 'description': 'd', 'budget': '1', 'category': self.category.pk}] * 3
+        with override_settings(BULK_ORDER_MAX_ROWS=2):
+            response = self.client.post('/api/v1/orders/bulk/', {'orders': rows}, format='json')
+        self.assertEqual((response.data['created'], response.data['failed']), (2, 1))
+
+        worker = User.objects.create(username='worker')
+        Profile.objects.create(user=worker, role='worker')
+        self.client.force_authenticate(worker)
+        self.assertEqual(self.client.post('/api/v1/orders/bulk/', rows, format='json').status_code, 403)
+
+
+class ArchiveTestCase(TestCase):
+
+    def setUp(self):
+        from datetime import timedelta
+        from django.utils import timezone
+        from rest_framework.test import APIClient
+        from .models import ArchivedOrder
+        self.client = APIClient()
+
+        self.employer = User.objects.create(username='employer')
+        Profile.objects.create(user=self.employer, role='employer')
+        self.worker = User.objects.create(username='worker')
+        Profile.objects.create(user=self.worker, role='worker')
+        self.category = Category.objects.create(name='Programming')
+
+        self.old_completed = self._order('completed')
+        self.old_cancelled = self._order('cancelled')
+        self.recent_completed = self._order('completed')
+        self.old_open = self._order('open')
+        for order in (self.old_completed, self.old_cancelled, self.recent_completed, self.old_open):
+            OrderApplication.objects.create(
+                order=order, worker=self.worker,
+                status='accepted' if order.status == 'completed' else 'pending'
+            )
+        self.review = Review.objects.create(
+            order=self.old_completed, reviewer=self.employer, worker=self.worker, rating=5
+        )
+        long_ago = timezone.now() - timedelta(days=100)
+        Order.objects.exclude(pk=self.recent_completed.pk).update(updated_at=long_ago)
+        self.ArchivedOrder = ArchivedOrder
+
+    def _order(self, status):
+        order = OrderService.create_order({
+            'employer': self.employer,
+            'title': f'Заказ {status}',
+            'description': 'REST API',
+            'budget': Decimal('1000.00'),
+            'category': self.category,
+        })
+        OrderService._transition_status(order, status)
+        return order
+
+    def _ids(self, url, user):
+        self.client.force_authenticate(user)
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return sorted(item['id'] for item in response.data['results'])
+
+    def test_moves_old_closed_orders_with_applications(self):
+        from .services import ArchiveService
+        counters_before = Category.objects.values_list('job_count', 'completed_count', 'cancelled_count').get()
+
+        totals = ArchiveService.archive_closed_orders(older_than_days=30, batch_size=1)
+        self.assertEqual((totals['orders'], totals['applications'], totals['batches']), (2, 2, 2))
+
+        archived_ids = sorted([self.old_completed.pk, self.old_cancelled.pk])
+        self.assertEqual(sorted(self.ArchivedOrder.objects.values_list('id', flat=True)), archived_ids)
+        self.assertFalse(Order.objects.filter(pk__in=archived_ids).exists())
+        self.assertFalse(OrderApplication.objects.filter(order_id__in=archived_ids).exists())
+        # счётчики — за всё время: перенос их не меняет, а пересчёт учитывает архив
+        self.assertEqual(
+            Category.objects.values_list('job_count', 'completed_count', 'cancelled_count').get(), counters_before
+        )
+        self.assertEqual(CategoryService.find_counter_drift(), [])
+
+        self.assertEqual(ArchiveService.archive_closed_orders(older_than_days=30)['orders'], 0)
+
+    def test_history_views_and_reviews_read_archive(self):
+        from .services import ArchiveService
+        ArchiveService.archive_closed_orders(older_than_days=30)
+
+        self.assertEqual(self._ids('/api/v1/myorderslist/', self.employer),
+                         sorted([self.recent_completed.pk, self.old_open.pk]))
+        self.assertEqual(self._ids('/api/v1/myorderslist/?archived=1', self.employer),
+                         sorted([self.old_completed.pk, self.old_cancelled.pk]))
+        self.assertEqual(len(self._ids('/api/v1/myapplicationslist/?archived=1', self.worker)), 2)
+        self.assertEqual(self._ids('/api/v1/myacceptedorders/?archived=1', self.worker), [self.old_completed.pk])
+        self.assertEqual(len(self._ids(f'/api/v1/orders/{self.old_cancelled.pk}/applications/?archived=1', self.employer)), 1)
+
+        for user in (self.employer, self.worker):
+            self.client.force_authenticate(user)
+            reviews = self.client.get('/api/v1/reviewlist/').data['results']
+            self.assertEqual(len(reviews), 1)
+            self.assertEqual(reviews[0]['order'], self.old_completed.pk)
+            self.assertEqual(reviews[0]['order_title'], 'Заказ completed')
+
+    def test_orderlist_etag_changes_after_archiving(self):
+        from .services import ArchiveService
+        etag = self.client.get('/api/v1/orderlist/')['ETag']
+        ArchiveService.archive_closed_orders(older_than_days=30)
+        response = self.client.get('/api/v1/orderlist/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data['results']), 2)
+
+
+class StatsBreakdownTestCase(TestCase):
+
+    def setUp(self):
+        from rest_framework.test import APIClient
+        from .services import StatsService
+        self.client = APIClient()
+        # /stats/ без параметров кладёт числа в кэш процесса, а откат транзакции его не сбрасывает
+        self.addCleanup(StatsService.invalidate)
+        self.programming = Category.objects.create(name='Programming')
+        self.design = Category.objects.create(name='Design')
+        almaty = User.objects.create(username='almaty')
+        Profile.objects.create(user=almaty, role='employer', city='almaty')
+        astana = User.objects.create(username='astana')
+        Profile.objects.create(user=astana, role='employer', city='astana')
+        nowhere = User.objects.create(username='nowhere')
+        Profile.objects.create(user=nowhere, role='employer')
+
+        for employer, category, budget in (
+            (almaty, self.programming, '100'), (almaty, self.programming, '200'), (astana, self.programming, '900'),
+            (astana, self.design, '50'), (nowhere, self.design, '70'),
+        ):
+            OrderService.create_order({
+                'employer': employer, 'title': 'x', 'description': 'y',
+                'budget': Decimal(budget), 'category': category,
+            })
+        cancelled = Order.objects.get(budget=Decimal('70'))
+        OrderService._transition_status(cancelled, 'cancelled')
+        StatsService.refresh_breakdown()
+
+    def test_breakdowns_with_exact_medians(self):
+        from .services import StatsService
+        by_category = StatsService.get_breakdown(by=('category',), status='open')['results']
+        self.assertEqual(by_category, [
+            {'category': self.programming.pk, 'category_name': 'Programming', 'count': 3,
+             'avg_budget': '400.00', 'median_budget': '200.00'},
+            {'category': self.design.pk, 'category_name': 'Design', 'count': 1,
+             'avg_budget': '50.00', 'median_budget': '50.00'},
+        ])
+
+        by_city = StatsService.get_breakdown(by=('city', 'status'))['results']
+        self.assertEqual(
+            [(row['city'], row['status'], row['count']) for row in by_city],
+            [('almaty', 'open', 2), ('astana', 'open', 2), ('unknown', 'cancelled', 1)]
+        )
+        total = StatsService.get_breakdown()['results']
+        self.assertEqual((total[0]['count'], total[0]['median_budget']), (5, '100.00'))
+
+    def test_endpoint_is_one_query_and_keeps_plain_stats(self):
+        with self.assertNumQueries(1):
+            response = self.client.get('/api/v1/stats/', {'by': 'city', 'category': self.programming.pk})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['by'], ['city'])
+        self.assertEqual([row['city'] for row in response.data['results']], ['almaty', 'astana'])
+        self.assertGreaterEqual(response.data['age_seconds'], 0)
+
+        # пустая выборка тоже сообщает, насколько устарели данные
+        response = self.client.get('/api/v1/stats/', {'by': 'city', 'city': 'shymkent'})
+        self.assertEqual(response.data['results'], [])
+        self.assertIsNotNone(response.data['refreshed_at'])
+
+        self.assertEqual(self.client.get('/api/v1/stats/', {'by': 'employer'}).status_code, 400)
+        self.assertEqual(set(self.client.get('/api/v1/stats/').data), {'total_jobs', 'total_categories'})
+
+    async def test_async_view_serves_breakdown(self):
+        import json
+        from django.test import AsyncRequestFactory
+        from .async_views import AsyncJobStatsView
+        request = AsyncRequestFactory().get('/api/v1/stats/', {'by': 'category', 'status': 'open'})
+        response = await AsyncJobStatsView.as_view()(request)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([row['count'] for row in json.loads(response.content)['results']], [3, 1])
+
+        request = AsyncRequestFactory().get('/api/v1/stats/', {'status': 'lost'})
+        self.assertEqual((await AsyncJobStatsView.as_view()(request)).status_code, 400)
+
+
+class WorkerReputationTestCase(TestCase):
+
+    def setUp(self):
+        from rest_framework.test import APIClient
+        self.client = APIClient()
+        self.employer = User.objects.create(username='employer')
+        Profile.objects.create(user=self.employer, role='employer')
+        self.workers = []
+        for index, city in enumerate(('almaty', 'almaty', 'astana')):
+            worker = User.objects.create(username=f'worker{index}')
+            Profile.objects.create(user=worker, role='worker', city=city)
+            self.workers.append(worker)
+        self.programming = Category.objects.create(name='Programming')
+        self.design = Category.objects.create(name='Design')
+
+    def _complete(self, worker, category, rating=None):
+        order = OrderService.create_order({
+            'employer': self.employer, 'title': 'x', 'description': 'y',
+            'budget': Decimal('100.00'), 'category': category,
+        })
+        application = OrderApplication.objects.create(order=order, worker=worker)
+        _, order = OrderApplicationService.accept_application(application, self.employer)
+        OrderService.update_order_status(order, 'completed', self.employer)
+        if rating:
+            ReviewService.create_review({'order': order, 'rating': rating, 'comment': ''}, self.employer)
+        return order
+
+    def _snapshot(self):
+        from .models import WorkerReputation
+        return {
+            (row.worker_id, row.category_id): (
+                row.city, row.review_count, row.rating_sum, row.rating_1, row.rating_2, row.rating_3,
+                row.rating_4, row.rating_5, row.average_rating, row.completed_count,
+            )
+            for row in WorkerReputation.objects.all()
+        }
+
+    def test_incremental_updates_match_rebuild(self):
+        from .services import ReputationService
+        first, second, third = self.workers
+        for rating in (5, 4, 4):
+            self._complete(first, self.programming, rating)
+        self._complete(first, self.design, 2)
+        self._complete(first, self.design)
+        self._complete(second, self.design, 5)
+
+        snapshot = self._snapshot()
+        self.assertEqual(snapshot[(first.pk, None)], ('almaty', 4, 15, 0, 1, 0, 2, 1, Decimal('3.75'), 5))
+        self.assertEqual(snapshot[(first.pk, self.programming.pk)][8], Decimal('4.33'))
+        self.assertEqual(snapshot[(first.pk, self.design.pk)][-1], 2)
+        self.assertNotIn((third.pk, None), snapshot)
+
+        ReputationService.rebuild()
+        self.assertEqual(self._snapshot(), snapshot)
+
+    def test_delete_order_reverts_reputation(self):
+        from .services import ReputationService
+        first = self.workers[0]
+        self._complete(first, self.programming, 5)
+        deleted = self._complete(first, self.programming, 2)
+
+        OrderService.delete_order(deleted, self.employer)
+        snapshot = self._snapshot()
+        self.assertEqual(snapshot[(first.pk, None)], ('almaty', 1, 5, 0, 0, 0, 0, 1, Decimal('5.00'), 1))
+        ReputationService.rebuild()
+        self.assertEqual(self._snapshot(), snapshot)
+
+    def test_leaderboard_is_keyset_paginated_by_category_and_city(self):
+        first, second, third = self.workers
+        for worker, ratings in ((first, (5, 4, 4)), (second, (5, 5, 5)), (third, (3, 3, 3))):
+            for rating in ratings:
+                self._complete(worker, self.programming, rating)
+        self._complete(third, self.design, 5)
+
+        with self.assertNumQueries(2):
+            response = self.client.get('/api/v1/workers/leaderboard/', {'page_size': 2})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([row['worker_username'] for row in response.data['results']], ['worker1', 'worker0'])
+        self.assertEqual(response.data['results'][0]['average_rating'], '5.00')
+        response = self.client.get(response.data['next'])
+        self.assertEqual([row['worker'] for row in response.data['results']], [third.pk])
+
+        # в дизайне у третьего один отзыв — меньше LEADERBOARD_MIN_REVIEWS
+        response = self.client.get('/api/v1/workers/leaderboard/', {'category': self.design.pk})
+        self.assertEqual(response.data['results'], [])
+        response = self.client.get('/api/v1/workers/leaderboard/', {'category': self.programming.pk, 'city': 'almaty'})
+        self.assertEqual([row['worker'] for row in response.data['results']], [second.pk, first.pk])
+        self.assertEqual(self.client.get('/api/v1/workers/leaderboard/', {'city': 'moscow'}).status_code, 400)
+
+        response = self.client.get(f'/api/v1/workers/{third.pk}/reputation/')
+        self.assertEqual((response.data['overall']['review_count'], response.data['overall']['rating_5']), (4, 1))
+        self.assertEqual([row['category'] for row in response.data['categories']], sorted([self.programming.pk, self.design.pk]))
+        self.assertEqual(self.client.get(f'/api/v1/workers/{self.employer.pk}/reputation/').status_code, 404)
+
+    def test_profile_city_change_moves_worker_between_city_boards(self):
+        first = self.workers[0]
+        for rating in (5, 5, 5):
+            self._complete(first, self.programming, rating)
+
+        self.client.force_authenticate(first)
+        response = self.client.patch('/api/v1/profile/', {'city': 'astana'}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['city'], 'astana')
+
+        board = self.client.get('/api/v1/workers/leaderboard/', {'city': 'astana'}).data['results']
+        self.assertEqual([row['worker'] for row in board], [first.pk])
+        self.assertEqual(self.client.get('/api/v1/workers/leaderboard/', {'city': 'almaty'}).data['results'], [])
+
+
+class RecommendationTestCase(TestCase):
+
+    def setUp(self):
+        from rest_framework.test import APIClient
+        from . import recommendations
+        recommendations.reset()
+        self.addCleanup(recommendations.reset)
+        self.recommendations = recommendations
+        self.client = APIClient()
+
+        self.almaty_employer = User.objects.create(username='almaty_employer')
+        Profile.objects.create(user=self.almaty_employer, role='employer', city='almaty')
+        self.astana_employer = User.objects.create(username='astana_employer')
+        Profile.objects.create(user=self.astana_employer, role='employer', city='astana')
+        self.worker = User.objects.create(username='worker')
+        Profile.objects.create(user=self.worker, role='worker', city='almaty')
+        self.programming = Category.objects.create(name='Programming')
+        self.design = Category.objects.create(name='Design')
+
+        # история воркера: программирование в районе 1000
+        for budget in ('900', '1100'):
+            past = self._order(self.astana_employer, self.programming, budget)
+            OrderApplication.objects.create(order=past, worker=self.worker)
+
+    def _order(self, employer, category, budget):
+        return OrderService.create_order({
+            'employer': employer, 'title': f'{category.name} {budget}', 'description': 'y',
+            'budget': Decimal(budget), 'category': category,
+        })
+
+    def test_ranks_by_category_city_and_budget(self):
+        best = self._order(self.almaty_employer, self.programming, '1000')
+        far_budget = self._order(self.astana_employer, self.programming, '50000')
+        other_city = self._order(self.astana_employer, self.programming, '1000')
+        other_category = self._order(self.almaty_employer, self.design, '1000')
+
+        self.client.force_authenticate(self.worker)
+        response = self.client.get('/api/v1/orders/recommended/', {'limit': 4})
+        self.assertEqual(response.status_code, 200)
+        # заказы из истории уже с откликом и в выдачу не попадают
+        self.assertEqual(
+            [row['id'] for row in response.data['results']],
+            [best.pk, other_city.pk, far_budget.pk, other_category.pk]
+        )
+        scores = [row['score'] for row in response.data['results']]
+        self.assertEqual(scores, sorted(scores, reverse=True))
+
+        self.client.force_authenticate(self.almaty_employer)
+        self.assertEqual(self.client.get('/api/v1/orders/recommended/').status_code, 403)
+
+    def test_open_order_matrix_follows_changes(self):
+        from django.test import override_settings
+        matrix = self.recommendations.open_orders
+        kept = self._order(self.almaty_employer, self.design, '500')
+        cancelled = self._order(self.almaty_employer, self.design, '600')
+        deleted = self._order(self.almaty_employer, self.design, '700')
+
+        with override_settings(RECOMMENDATIONS_REFRESH_INTERVAL=0):
+            initial = set(matrix.get().ids.tolist())
+            loaded_at = matrix._loaded_at
+            self.assertIn(kept.pk, initial)
+
+            added = self._order(self.astana_employer, self.design, '800')
+            OrderService._transition_status(cancelled, 'cancelled')
+            self.assertEqual(set(matrix.get().ids.tolist()), initial - {cancelled.pk} | {added.pk})
+            # дочитывание, а не полная загрузка
+            self.assertEqual(matrix._loaded_at, loaded_at)
+
+            OrderService.delete_order(deleted, self.almaty_employer)
+            self.assertNotIn(deleted.pk, set(matrix.get().ids.tolist()))
+
+
+class SavedSearchTestCase(TestCase):
+
+    def setUp(self):
+        from rest_framework.test import APIClient
+        self.client = APIClient()
+        self.employer = User.objects.create(username='employer')
+        Profile.objects.create(user=self.employer, role='employer', city='almaty')
+        self.programming = Category.objects.create(name='Programming')
+        self.design = Category.objects.create(name='Design')
+        self.workers = []
+        for index in range(6):
+            worker = User.objects.create(username=f'worker{index}')
+            Profile.objects.create(user=worker, role='worker')
+            self.workers.append(worker)
+
+    def _search(self, worker, **fields):
+        from .services import SavedSearchService
+        return SavedSearchService.create_saved_search(worker, fields)
+
+    def _order(self, title='Django API', budget='1000', category=None):
+        return OrderService.create_order({
+            'employer': self.employer, 'title': title, 'description': 'Backend на Python',
+            'budget': Decimal(budget), 'category': category or self.programming,
+        })
+
+    def test_new_order_reaches_only_matching_searches(self):
+        from .models import SavedSearchMatch
+        exact, anywhere, wrong_city, too_cheap, keywords, other_keywords = self.workers
+        self._search(exact, category=self.programming, city='almaty', min_budget=Decimal('500'),
+                     max_budget=Decimal('2000'))
+        # две подходящие подписки одного воркера — одна запись во входящих
+        self._search(exact, category=self.programming)
+        self._search(anywhere)
+        self._search(wrong_city, category=self.programming, city='astana')
+        self._search(too_cheap, max_budget=Decimal('999'))
+        self._search(keywords, keywords='django')
+        self._search(other_keywords, keywords='flutter')
+
+        order = self._order()
+        self.assertEqual(
+            set(SavedSearchMatch.objects.filter(order=order).values_list('user_id', flat=True)),
+            {exact.pk, anywhere.pk, keywords.pk}
+        )
+
+        bulk = OrderService.bulk_create_orders(self.employer, [
+            {'title': 'Логотип', 'description': 'x', 'budget': Decimal('100'), 'category_id': self.design.pk},
+        ])
+        self.assertEqual(
+            set(SavedSearchMatch.objects.filter(order=bulk[0]).values_list('user_id', flat=True)),
+            {anywhere.pk, too_cheap.pk}
+        )
+
+    def test_saved_search_and_inbox_endpoints(self):
+        worker = self.workers[0]
+        self.client.force_authenticate(worker)
+        response = self.client.post('/api/v1/saved-searches/', {
+            'category': self.programming.pk, 'min_budget': '2000', 'max_budget': '1000',
+        }, format='json')
+        self.assertEqual(response.status_code, 400)
+        response = self.client.post('/api/v1/saved-searches/', {
+            'name': 'Python', 'category': self.programming.pk, 'keywords': 'python',
+        }, format='json')
+        self.assertEqual(response.status_code, 201)
+        search_id = response.data['id']
+
+        first, second = self._order('Django API'), self._order('FastAPI сервис')
+        self._order('Баннер', category=self.design)
+        inbox = self.client.get('/api/v1/saved-searches/inbox/').data['results']
+        self.assertEqual([row['order'] for row in inbox], [second.pk, first.pk])
+        self.assertEqual(inbox[0]['search_name'], 'Python')
+
+        response = self.client.post('/api/v1/saved-searches/inbox/read/', {'ids': [inbox[1]['id']]}, format='json')
+        self.assertEqual(response.data['updated'], 1)
+        unread = self.client.get('/api/v1/saved-searches/inbox/', {'unread': 1}).data['results']
+        self.assertEqual([row['order'] for row in unread], [second.pk])
+
+        self.assertEqual(self.client.delete(f'/api/v1/saved-searches/{search_id}/').status_code, 204)
+        self.assertEqual(self.client.get('/api/v1/saved-searches/inbox/').data['results'], [])
+        self.client.force_authenticate(self.employer)
+        self.assertEqual(self.client.get('/api/v1/saved-searches/').status_code, 403)
+
+
+class ReplicaRoutingTestCase(TransactionTestCase):
+    # 'replica' — зеркало default из settings: та же база, но отдельное соединение
+    databases = {'default', 'replica'}
+
+    def setUp(self):
+        from django.test import override_settings
+        settings_override = override_settings(DATABASE_REPLICAS=['replica'])
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        self.employer = User.objects.create(username='employer')
+        Profile.objects.create(user=self.employer, role='employer')
+        self.other = User.objects.create(username='other')
+        Profile.objects.create(user=self.other, role='employer')
+        self.category = Category.objects.create(name='Programming')
+
+    def _aliases(self, method, path, user=None, data=None):
+        """Каждый запрос — новым клиентом с bearer-токеном, без общих кук."""
+        from django.db import connections
+        from django.test.utils import CaptureQueriesContext
+        from rest_framework.test import APIClient
+        from .serializers import WorkifyTokenObtainPairSerializer
+        client = APIClient()
+        if user is not None:
+            token = WorkifyTokenObtainPairSerializer.get_token(user).access_token
+            client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+        with CaptureQueriesContext(connections['default']) as primary, \
+                CaptureQueriesContext(connections['replica']) as replica:
+            response = getattr(client, method)(path, data, format='json')
+        self.assertLess(response.status_code, 400, response.content)
+        self.assertFalse(response.cookies)
+        return len(primary), len(replica)
+
+    def test_reads_go_to_replica_and_writes_stick_to_primary(self):
+        primary, replica = self._aliases('get', '/api/v1/orderlist/')
+        self.assertEqual(primary, 0)
+        self.assertGreater(replica, 0)
+
+        primary, replica = self._aliases('post', '/api/v1/ordercreate/', self.employer, {
+            'title': 'Django API', 'description': 'REST', 'budget': '1000.00', 'category': self.category.pk,
+        })
+        self.assertEqual(replica, 0)
+
+        # свою запись автор читает с primary с любого клиента, остальные — с реплики
+        primary, replica = self._aliases('get', '/api/v1/myorderslist/', self.employer)
+        self.assertEqual(replica, 0)
+        self.assertGreater(primary, 0)
+        primary, replica = self._aliases('get', '/api/v1/myorderslist/', self.other)
+        self.assertEqual(primary, 1)  # только проверка PrimaryReadPin
+        self.assertGreater(replica, 0)
+
+        # метка истекает через REPLICA_STICKY_SECONDS
+        from django.utils import timezone
+        from .models import PrimaryReadPin
+        PrimaryReadPin.objects.update(until=timezone.now())
+        primary, replica = self._aliases('get', '/api/v1/myorderslist/', self.employer)
+        self.assertEqual(primary, 1)
+        self.assertGreater(replica, 0)
+
+    def test_router_keeps_atomic_blocks_and_background_reads_on_primary(self):
+        from django.db import router, transaction
+        from django.test import RequestFactory
+        from .db_router import Route, _route
+
+        self.assertEqual(router.db_for_read(Order), 'default')
+        token = _route.set(Route(RequestFactory().get('/'), 'replica', safe=True))
+        try:
+            self.assertEqual(router.db_for_read(Order), 'replica')
+            with transaction.atomic():
+                self.assertEqual(router.db_for_read(Order), 'default')
+            self.assertEqual(router.db_for_write(Order), 'default')
+            # после записи в этом же запросе чтения тоже идут на primary
+            self.assertEqual(router.db_for_read(Order), 'default')
+        finally:
+            _route.reset(token)
+
+
+class BatchTestCase(TestCase):
+
+    def setUp(self):
+        from rest_framework.test import APIClient
+        from rest_framework_simplejwt.tokens import AccessToken
+        from .services import StatsService
+        self.addCleanup(StatsService.invalidate)
+        self.employer = User.objects.create(username='employer')
+        Profile.objects.create(user=self.employer, role='employer', city='almaty')
+        self.category = Category.objects.create(name='Programming')
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(self.employer)}')
+
+    def _batch(self, requests, **options):
+        return self.client.post('/api/v1/batch/', {'requests': requests, **options}, format='json')
+
+    def test_subrequests_share_one_authentication(self):
+        from unittest import mock
+        from .authentication import ClaimsJWTAuthentication
+        with mock.patch.object(
+            ClaimsJWTAuthentication, 'get_validated_token', autospec=True,
+            side_effect=ClaimsJWTAuthentication.get_validated_token
+        ) as get_validated_token:
+            response = self._batch([
+                {'id': 'create', 'method': 'POST', 'path': '/api/v1/ordercreate/', 'body': {
+                    'title': 'Django API', 'description': 'REST', 'budget': '1000.00', 'category': self.category.pk,
+                }},
+                {'id': 'mine', 'path': '/api/v1/myorderslist/'},
+                {'id': 'profile', 'path': '/api/v1/profile/'},
+                {'id': 'stats', 'path': '/api/v1/stats/'},
+            ])
+        self.assertEqual(get_validated_token.call_count, 1)
+        self.assertEqual(response.status_code, 200)
+        created, mine, profile, stats = response.json()['responses']
+        self.assertEqual((created['id'], created['status']), ('create', 201))
+        # подзапросы идут по порядку: список уже видит созданный заказ
+        self.assertEqual([row['title'] for row in mine['body']['results']], ['Django API'])
+        self.assertIn('ETag', mine['headers'])
+        self.assertEqual(profile['body']['city'], 'almaty')
+        self.assertEqual(stats['body']['total_jobs'], 1)
+
+    def test_subrequest_errors_stay_inside_envelope(self):
+        etag = self._batch([{'path': '/api/v1/profile/'}]).json()['responses'][0]['headers']['ETag']
+        responses = self._batch([
+            {'path': '/api/v1/profile/', 'headers': {'If-None-Match': etag}},
+            {'path': '/api/v1/unknown/'},
+            {'path': '/api/v1/export/orders.csv'},
+            {'path': '/api/v1/myapplicationslist/'},
+        ]).json()['responses']
+        self.assertEqual([item['status'] for item in responses], [304, 404, 400, 403])
+        self.assertIsNone(responses[0]['body'])
+
+        self.assertEqual(self._batch([{'path': '/admin/'}]).status_code, 400)
+        self.assertEqual(self._batch([{'path': '/api/v1/profile/'}] * 21).status_code, 400)
+
+    def test_failed_subrequest_is_500_item_and_metrics_are_per_subrequest(self):
+        from unittest import mock
+        from . import metrics
+        from .services import StatsService
+        with mock.patch.object(StatsService, 'get_job_stats', side_effect=RuntimeError('boom')), \
+                mock.patch.object(metrics, 'observe', wraps=metrics.observe) as observe, \
+                self.assertLogs('core.batch', 'ERROR'):
+            response = self._batch([{'path': '/api/v1/stats/'}, {'path': '/api/v1/profile/'}])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([item['status'] for item in response.json()['responses']], [500, 200])
+        observed = [(call.args[0], call.args[2]) for call in observe.call_args_list]
+        self.assertEqual(observed[:2], [('job-stats', 500), ('profile', 200)])
+        self.assertEqual(observed[2][0], 'batch')
+
+
+class ParallelBatchTestCase(TransactionTestCase):
+    # потоки пула читают своими соединениями и не видят транзакцию TestCase
+
+    def test_parallel_reads_match_sequential(self):
+        from rest_framework.test import APIClient
+        from .services import StatsService
+        self.addCleanup(StatsService.invalidate)
+        worker = User.objects.create(username='worker')
+        Profile.objects.create(user=worker, role='worker')
+        Category.objects.create(name='Programming')
+        client = APIClient()
+        client.force_authenticate(worker)
+
+        requests = [
+            {'id': name, 'path': f'/api/v1/{name}/'}
+            for name in ('profile', 'myapplicationslist', 'myacceptedorders', 'reviewlist', 'categorylist', 'stats')
+        ]
+        sequential = client.post('/api/v1/batch/', {'requests': requests}, format='json').json()
+        parallel = client.post('/api/v1/batch/', {'requests': requests, 'parallel': True}, format='json').json()
+        self.assertEqual(parallel, sequential)
+        self.assertEqual({item['status'] for item in parallel['responses']}, {200})
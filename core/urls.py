@@ -1,18 +1,47 @@
-from django.urls import path 
+from django.conf import settings
+from django.urls import path, re_path
 from .views import (
     RegisterView, OrderAPIView, CreateOrderAPIView, CategoryAPIView, 
     ProfileAPIView, CreateOrderApplicationAPIView, MyOrdersAPIView, 
     ApplicationAPIView, ApplicationListByOrderAPIView, WorkerApplicationsAPIView, 
     ReviewAPIView, CreateReviewAPIView, UpdateOrderStatusAPIView, 
     WorkerAcceptedOrdersAPIView, JobStatsAPIView, CategorySyncAPIView,
-    DeleteOrderAPIView
+    DeleteOrderAPIView, OrderSearchAPIView, BulkApplicationActionAPIView, MetricsAPIView,
+    ExportAPIView, BulkCreateOrderAPIView, WorkerLeaderboardAPIView, WorkerReputationAPIView,
+    RecommendedOrdersAPIView, SavedSearchListCreateAPIView, DeleteSavedSearchAPIView, SavedSearchInboxAPIView,
+    SavedSearchInboxReadAPIView, BatchAPIView
 )
 
-urlpatterns = [
+asgi_only_patterns = []
+read_views = {
+    'orderlist': OrderAPIView.as_view(),
+    'categorylist': CategoryAPIView.as_view(),
+    'reviewlist': ReviewAPIView.as_view(),
+    'job-stats': JobStatsAPIView.as_view(),
+}
+if settings.ASYNC_READ_VIEWS:
+    from .async_views import (
+        AsyncCategoryListView, AsyncJobStatsView, AsyncOrderListView, AsyncReviewListView, EventStreamView
+    )
+    read_views = {
+        'orderlist': AsyncOrderListView.as_view(),
+        'categorylist': AsyncCategoryListView.as_view(),
+        'reviewlist': AsyncReviewListView.as_view(),
+        'job-stats': AsyncJobStatsView.as_view(),
+    }
+    # долгоживущие SSE-соединения держим только под ASGI: под WSGI каждое заняло бы воркер
+    asgi_only_patterns = [
+        path('api/v1/events/', EventStreamView.as_view(), name='events'),
+    ]
+
+urlpatterns = asgi_only_patterns + [
     path('api/v1/register/', RegisterView.as_view(), name='register'),
-    path('api/v1/orderlist/', OrderAPIView.as_view(), name='orderlist'),
+    path('api/v1/orderlist/', read_views['orderlist'], name='orderlist'),
+    path('api/v1/ordersearch/', OrderSearchAPIView.as_view(), name='order-search'),
+    path('api/v1/orders/recommended/', RecommendedOrdersAPIView.as_view(), name='recommended-orders'),
     path('api/v1/ordercreate/', CreateOrderAPIView.as_view(), name='create-order'),
-    path('api/v1/categorylist/', CategoryAPIView.as_view(), name='categorylist'),
+    path('api/v1/orders/bulk/', BulkCreateOrderAPIView.as_view(), name='bulk-create-order'),
+    path('api/v1/categorylist/', read_views['categorylist'], name='categorylist'),
     path('api/v1/profile/', ProfileAPIView.as_view(), name='profile'),
     path('api/v1/profile/<int:pk>/', ProfileAPIView.as_view(), name ='update-profile'),
     path('api/v1/applicationcreate/', CreateOrderApplicationAPIView.as_view(), name='create-application'),  
@@ -20,12 +49,25 @@ urlpatterns = [
     path('api/v1/myapplicationslist/', WorkerApplicationsAPIView.as_view(), name='myapplicationslist'),
     path('api/v1/myacceptedorders/', WorkerAcceptedOrdersAPIView.as_view(), name='myacceptedorders'),
     path('api/v1/applicationlist/', ApplicationAPIView.as_view(), name='applicationlist'),
+    path('api/v1/applications/bulk/', BulkApplicationActionAPIView.as_view(), name='applications-bulk'),
     path('api/v1/orders/<int:order_id>/applications/', ApplicationListByOrderAPIView.as_view(), name='order-applications'),
     path('api/v1/orders/<int:order_id>/status/', UpdateOrderStatusAPIView.as_view(), name='update-order-status'),
     path('api/v1/reviewcreate/', CreateReviewAPIView.as_view(), name='create-review'),
-    path('api/v1/reviewlist/', ReviewAPIView.as_view(), name='reviewlist'),
-    path('api/v1/stats/', JobStatsAPIView.as_view(), name='job-stats'),
+    path('api/v1/reviewlist/', read_views['reviewlist'], name='reviewlist'),
+    path('api/v1/stats/', read_views['job-stats'], name='job-stats'),
+    path('api/v1/workers/leaderboard/', WorkerLeaderboardAPIView.as_view(), name='worker-leaderboard'),
+    path('api/v1/workers/<int:worker_id>/reputation/', WorkerReputationAPIView.as_view(), name='worker-reputation'),
+    path('api/v1/saved-searches/', SavedSearchListCreateAPIView.as_view(), name='saved-searches'),
+    path('api/v1/saved-searches/<int:pk>/', DeleteSavedSearchAPIView.as_view(), name='delete-saved-search'),
+    path('api/v1/saved-searches/inbox/', SavedSearchInboxAPIView.as_view(), name='saved-search-inbox'),
+    path('api/v1/saved-searches/inbox/read/', SavedSearchInboxReadAPIView.as_view(), name='saved-search-inbox-read'),
     path('api/v1/categories/sync/', CategorySyncAPIView.as_view(), name='categories-sync'),
     path('api/v1/orders/<int:pk>/delete/', DeleteOrderAPIView.as_view(), name='delete-order'),
+    path('api/v1/batch/', BatchAPIView.as_view(), name='batch'),
+    path('api/v1/metrics', MetricsAPIView.as_view(), name='metrics'),
+    re_path(
+        r'^api/v1/export/(?P<dataset>orders|applications|reviews)\.(?P<fmt>csv|ndjson)$',
+        ExportAPIView.as_view(), name='export'
+    ),
 ]
 
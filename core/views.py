@@ -1,7 +1,12 @@
+import hmac
+
+from django.conf import settings
+from django.db.models import Count, Max
+from django.http import HttpResponse, StreamingHttpResponse
 from django.shortcuts import render
 from rest_framework.views import APIView
 from rest_framework.response import Response
-from rest_framework import status, permissions, generics
+from rest_framework import status, permissions, generics, exceptions
 from rest_framework.exceptions import ValidationError
 from django.contrib.auth.models import User
 from django.contrib.auth.password_validation import validate_password, ValidationError
@@ -9,13 +14,92 @@ from django.db import IntegrityError
 from django.template.context_processors import request
 from .serializers import RegisterSerializer
 from .models import Order, OrderApplication, Profile, Category, Review
-from .serializers import OrderSerializer, CategorySerializer, ProfileSerializer, OrderApplicationSerializer, OrderApplicationSerializerForEmployer, ReviewSerializer
+from .serializers import OrderSerializer, OrderFilterSerializer, CategorySerializer, ProfileSerializer, OrderApplicationSerializer, OrderApplicationSerializerForEmployer, ReviewSerializer, BulkApplicationActionSerializer
+from .serializers import (
+    OrderRowSerializer, OrderApplicationRowSerializer, OrderApplicationRowSerializerForEmployer,
+    ReviewRowSerializer, StatsBreakdownSerializer, LeaderboardFilterSerializer, WorkerReputationSerializer,
+    WorkerReputationRowSerializer, SavedSearchSerializer, SavedSearchMatchRowSerializer, InboxReadSerializer,
+    BatchSerializer
+)
+from . import batch, exports, importers, recommendations
+from .conditional import Validators
+from .metrics import render_latest
+from .pagination import KeysetPagination
 from .permissions import IsEmployer, IsWorker
+from .renderers import JSONArrayStreamingResponse
 from .services import (
     UserService, OrderService, OrderApplicationService, 
-    ReviewService, ProfileService, CategoryService
+    ReviewService, ProfileService, CategoryService, StatsService, ReputationService, SavedSearchService
 )
 
+class RowListMixin:
+    """
+    Списки только для чтения через RowSerializer: строки из .values()
+    и скомпилированный to_dict вместо ModelSerializer на каждую запись.
+
+    ?stream=1 отдаёт список без пагинации потоковым JSON-массивом: строки
+    читаются серверным курсором пачками по stream_chunk_size. Только для
+    аутентифицированных: поток держит воркер и соединение с БД всё время
+    передачи. Если строк больше STREAM_MAX_ROWS, до начала потока отдаётся
+    400 со ссылкой на /export/ — обрезанный массив нельзя отличить от полного.
+    """
+    row_serializer_class = None
+    stream_chunk_size = 2000
+
+    def list(self, request, *args, **kwargs):
+        queryset = self.row_serializer_class.project(self.filter_queryset(self.get_queryset()))
+        if request.query_params.get('stream') == '1':
+            if not request.user.is_authenticated:
+                raise exceptions.NotAuthenticated('Streaming requires authentication')
+            return self.stream(queryset)
+
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(self.row_serializer_class.serialize(page))
+        return Response(self.row_serializer_class.serialize(queryset))
+
+    def stream(self, queryset):
+        limit = settings.STREAM_MAX_ROWS
+        if queryset.order_by()[limit:limit + 1].exists():
+            raise exceptions.ValidationError({'stream': [
+                f'The list has more than {limit} rows; use page cursors or /api/v1/export/ instead.'
+            ]})
+        ordering = getattr(self, 'keyset_ordering', KeysetPagination.ordering)
+        rows = queryset.order_by(*ordering).iterator(chunk_size=self.stream_chunk_size)
+        return JSONArrayStreamingResponse(self.row_serializer_class.iter_serialize(rows))
+
+
+class ConditionalGetMixin:
+    """
+    Условный GET по версии ресурса: время последнего изменения и число
+    строк. ETag считается до сериализации, на совпавший If-None-Match
+    сразу уходит 304. Запрос версии читает те же строки, что и страница,
+    но без сортировки, выборки полей и рендеринга.
+    """
+    version_field = 'updated_at'
+
+    def get_version(self):
+        queryset = self.filter_queryset(self.get_queryset()).order_by()
+        return queryset.aggregate(count=Count('pk'), last_modified=Max(self.version_field))
+
+    def get(self, request, *args, **kwargs):
+        validators = Validators(
+            self.get_version(), request.get_full_path(), request.user.pk, request.accepted_renderer.format
+        )
+        response = validators.not_modified(request)
+        if response is None:
+            response = validators.apply(super().get(request, *args, **kwargs))
+        return response
+
+
+class ArchivedMixin:
+    """?archived=1 — та же выдача по архиву давно закрытых заказов (ArchiveService)."""
+
+    @property
+    def archived(self):
+        return self.request.query_params.get('archived') == '1'
+
+
 class RegisterView(APIView):
     def post(self, request):
         serializer = RegisterSerializer(data=request.data)
@@ -36,18 +120,85 @@ class RegisterView(APIView):
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
-class OrderAPIView(generics.ListAPIView):
+class OrderAPIView(ConditionalGetMixin, RowListMixin, generics.ListAPIView):
     serializer_class = OrderSerializer
+    row_serializer_class = OrderRowSerializer
+
+    def get_version(self):
+        # COUNT по фильтрам на всей ленте дорог, версия общая для любых фильтров
+        return OrderService.get_orders_version()
     
     def get_queryset(self):
-        category = self.request.query_params.get('category')
-        return OrderService.get_orders_by_category(category)
+        filters = OrderFilterSerializer(data=self.request.query_params)
+        filters.is_valid(raise_exception=True)
+        return OrderService.get_filtered_orders(filters.validated_data)
+
+    def list(self, request, *args, **kwargs):
+        response = super().list(request, *args, **kwargs)
+        # фасеты нужны UI один раз — на первой странице, без курсора
+        if isinstance(getattr(response, 'data', None), dict) and not request.query_params.get('cursor'):
+            response.data['facets'] = OrderService.get_order_facets(self.get_queryset())
+        return response
     
-class MyOrdersAPIView(generics.ListAPIView):
+class OrderSearchAPIView(ConditionalGetMixin, generics.ListAPIView):
+    serializer_class = OrderSerializer
+    # ранжированная выдача: отдаём первые ?limit= результатов без курсора
+    pagination_class = None
+
+    def get_version(self):
+        return OrderService.get_orders_version()
+
+    def get_queryset(self):
+        query = self.request.query_params.get('q', '').strip()
+        if not query:
+            raise exceptions.ValidationError({'q': 'Search query is required'})
+
+        limit = settings.MAX_PAGE_SIZE
+        try:
+            limit = min(int(self.request.query_params.get('limit', limit)), limit)
+        except ValueError:
+            pass
+
+        category = self.request.query_params.get('category')
+        return OrderService.search_orders(query, category)[:max(limit, 1)]
+
+
+class RecommendedOrdersAPIView(APIView):
+    """
+    Открытые заказы, ранжированные для текущего воркера (core.recommendations):
+    первые ?limit= результатов с оценкой, без курсора — как у поиска.
+    """
+    permission_classes = [permissions.IsAuthenticated, IsWorker]
+
+    def get(self, request):
+        limit = settings.MAX_PAGE_SIZE
+        try:
+            limit = min(int(request.query_params.get('limit', limit)), limit)
+        except ValueError:
+            pass
+
+        ranked = recommendations.recommend(request.user.pk, max(limit, 1))
+        scores = dict(ranked)
+        # снимок в памяти мог отстать: заказ уже не открыт — пропускаем
+        rows = {
+            row['id']: row for row in OrderRowSerializer.serialize(
+                OrderRowSerializer.project(Order.objects.filter(id__in=scores, status='open'))
+            )
+        }
+        results = []
+        for order_id, score in ranked:
+            if order_id in rows:
+                rows[order_id]['score'] = round(score, 4)
+                results.append(rows[order_id])
+        return Response({'results': results})
+
+
+class MyOrdersAPIView(ArchivedMixin, ConditionalGetMixin, RowListMixin, generics.ListAPIView):
     serializer_class = OrderSerializer
+    row_serializer_class = OrderRowSerializer
 
     def get_queryset(self):
-        return OrderService.get_user_orders(self.request.user)
+        return OrderService.get_user_orders(self.request.user, self.archived)
         
 
 class CreateOrderAPIView(generics.CreateAPIView):
@@ -59,6 +210,36 @@ class CreateOrderAPIView(generics.CreateAPIView):
         OrderService.create_order(serializer.validated_data)
 
 
+class BulkCreateOrderAPIView(APIView):
+    """
+    Массовое создание заказов (core.importers). Тело — JSON-список
+    (или {"orders": [...]}), CSV с заголовком title,description,budget,category
+    либо NDJSON по Content-Type. Корректные строки создаются, ошибочные
+    возвращаются в errors с номером строки.
+    """
+    permission_classes = [IsEmployer]
+
+    def post(self, request):
+        fmt = importers.FORMATS.get(request.content_type.split(';')[0].strip())
+        if fmt is not None:
+            # CSV/NDJSON читаем из потока сами, мимо парсеров DRF
+            if request.stream is None:
+                raise exceptions.ValidationError({'detail': 'Empty body'})
+            records = importers.iter_records(request.stream, fmt)
+        else:
+            data = request.data
+            if isinstance(data, dict):
+                data = data.get('orders')
+            if not isinstance(data, list) or not data:
+                raise exceptions.ValidationError({'orders': 'Expected a non-empty list of orders'})
+            records = enumerate(data, 1)
+
+        report = importers.import_orders(request.user, records, max_rows=settings.BULK_ORDER_MAX_ROWS)
+        if not report['created'] and report['failed']:
+            return Response(report, status=status.HTTP_400_BAD_REQUEST)
+        return Response(report, status=status.HTTP_201_CREATED)
+
+
 class DeleteOrderAPIView(APIView):
     permission_classes = [permissions.IsAuthenticated, IsEmployer]
 
@@ -72,28 +253,39 @@ class DeleteOrderAPIView(APIView):
         except ValidationError as e:
             return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
-class CategoryAPIView(generics.ListAPIView):
+class CategoryAPIView(ConditionalGetMixin, generics.ListAPIView):
     queryset = Category.objects.all()
     serializer_class = CategorySerializer
 
-class ProfileAPIView(generics.RetrieveUpdateAPIView):
+class ProfileAPIView(ConditionalGetMixin, generics.RetrieveUpdateAPIView):
     serializer_class = ProfileSerializer
     permission_classes = [permissions.IsAuthenticated]   
 
+    def get_version(self):
+        return ProfileService.get_profile_version(self.request.user)
+
     def get_object(self):
         return ProfileService.get_user_profile(self.request.user)
 
+    def perform_update(self, serializer):
+        # через сервис: смена города воркера попадает и в WorkerReputation
+        serializer.instance = ProfileService.update_user_profile(self.request.user, serializer.validated_data)
+
 class CreateOrderApplicationAPIView(generics.CreateAPIView):
     serializer_class = OrderApplicationSerializer
     permission_classes = [IsWorker]
 
-class ApplicationAPIView(generics.ListAPIView):
+    def perform_create(self, serializer):
+        serializer.instance = OrderApplicationService.create_application(serializer.validated_data)
+
+class ApplicationAPIView(ArchivedMixin, ConditionalGetMixin, RowListMixin, generics.ListAPIView):
     serializer_class = OrderApplicationSerializerForEmployer
+    row_serializer_class = OrderApplicationRowSerializerForEmployer
     permission_classes = [permissions.IsAuthenticated, IsEmployer]
 
     def get_queryset(self):
         order_id = self.request.query_params.get('order')
-        return OrderApplicationService.get_employer_applications(self.request.user, order_id)
+        return OrderApplicationService.get_employer_applications(self.request.user, order_id, self.archived)
 
     def post(self, request, *args, **kwargs):
         action = request.data.get('action')
@@ -144,13 +336,34 @@ class ApplicationAPIView(generics.ListAPIView):
                 status=status.HTTP_400_BAD_REQUEST
             )
 
-class ApplicationListByOrderAPIView(generics.ListAPIView):
+class BulkApplicationActionAPIView(APIView):
+    permission_classes = [permissions.IsAuthenticated, IsEmployer]
+
+    def post(self, request):
+        serializer = BulkApplicationActionSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        results = OrderApplicationService.bulk_update_applications(
+            serializer.validated_data['application_ids'],
+            serializer.validated_data['action'],
+            request.user
+        )
+        failed = sum(1 for item in results if item['status'] == 'error')
+        return Response({
+            'action': serializer.validated_data['action'],
+            'succeeded': len(results) - failed,
+            'failed': failed,
+            'results': results
+        })
+
+class ApplicationListByOrderAPIView(ArchivedMixin, ConditionalGetMixin, RowListMixin, generics.ListAPIView):
     serializer_class = OrderApplicationSerializerForEmployer
+    row_serializer_class = OrderApplicationRowSerializerForEmployer
     permission_classes = [permissions.IsAuthenticated, IsEmployer]
 
     def get_queryset(self):
         order_id = self.kwargs.get('order_id')
-        return OrderApplicationService.get_applications_by_order(order_id, self.request.user)
+        return OrderApplicationService.get_applications_by_order(order_id, self.request.user, self.archived)
 
 class CreateReviewAPIView(generics.CreateAPIView):
     queryset = Review.objects.all()
@@ -160,16 +373,20 @@ class CreateReviewAPIView(generics.CreateAPIView):
     def perform_create(self, serializer):
         ReviewService.create_review(serializer.validated_data, self.request.user)
 
-class WorkerApplicationsAPIView(generics.ListAPIView):
+class WorkerApplicationsAPIView(ArchivedMixin, ConditionalGetMixin, RowListMixin, generics.ListAPIView):
     serializer_class = OrderApplicationSerializer
+    row_serializer_class = OrderApplicationRowSerializer
     permission_classes = [permissions.IsAuthenticated, IsWorker]
 
     def get_queryset(self):
-        return OrderApplicationService.get_worker_applications(self.request.user)
+        return OrderApplicationService.get_worker_applications(self.request.user, self.archived)
 
-class ReviewAPIView(generics.ListAPIView):
+class ReviewAPIView(ConditionalGetMixin, RowListMixin, generics.ListAPIView):
     serializer_class = ReviewSerializer
+    row_serializer_class = ReviewRowSerializer
     permission_classes = [permissions.IsAuthenticated]
+    # отзывы не редактируются
+    version_field = 'created_at'
 
     def get_queryset(self):
         order_id = self.request.query_params.get('order')
@@ -210,28 +427,164 @@ class UpdateOrderStatusAPIView(APIView):
             )
 
 
-class WorkerAcceptedOrdersAPIView(generics.ListAPIView):
+class WorkerAcceptedOrdersAPIView(ArchivedMixin, ConditionalGetMixin, RowListMixin, generics.ListAPIView):
     serializer_class = OrderSerializer
+    row_serializer_class = OrderRowSerializer
     permission_classes = [permissions.IsAuthenticated, IsWorker]
 
     def get_queryset(self):
-        return OrderService.get_worker_accepted_orders(self.request.user)
+        return OrderService.get_worker_accepted_orders(self.request.user, self.archived)
 
 
 class JobStatsAPIView(APIView):
+    """
+    Без параметров — общие числа (кэш в памяти). С by/category/city/status —
+    разбивка из материализованного core_orderstats (StatsService.get_breakdown).
+    """
     permission_classes = [permissions.AllowAny]
 
     def get(self, request):
+        if not any(key in request.query_params for key in ('by',) + StatsBreakdownSerializer.DIMENSIONS):
+            return Response(StatsService.get_job_stats())
+        params = StatsBreakdownSerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        return Response(StatsService.get_breakdown(**params.validated_data))
+
+
+class WorkerLeaderboardAPIView(ConditionalGetMixin, RowListMixin, generics.ListAPIView):
+    """
+    Лучшие воркеры по среднему рейтингу, ?category= и ?city= сужают выдачу.
+    Читается из WorkerReputation по индексу reputation_*board_idx, в выдачу
+    попадают воркеры хотя бы с LEADERBOARD_MIN_REVIEWS отзывами.
+    """
+    serializer_class = WorkerReputationSerializer
+    row_serializer_class = WorkerReputationRowSerializer
+    permission_classes = [permissions.AllowAny]
+    keyset_ordering = ('-average_rating', '-review_count', '-worker')
+
+    def get_queryset(self):
+        filters = LeaderboardFilterSerializer(data=self.request.query_params)
+        filters.is_valid(raise_exception=True)
+        return ReputationService.get_leaderboard(**filters.validated_data)
+
+
+class WorkerReputationAPIView(APIView):
+    """Итоговый рейтинг воркера и разбивка по категориям."""
+    permission_classes = [permissions.AllowAny]
+
+    def get(self, request, worker_id):
+        rows = WorkerReputationRowSerializer.serialize(
+            WorkerReputationRowSerializer.project(ReputationService.get_worker_reputation(worker_id)).order_by('category')
+        )
+        overall = next((row for row in rows if row['category'] is None), None)
+        if overall is None:
+            return Response({'detail': 'Worker has no reviews or completed orders'}, status=status.HTTP_404_NOT_FOUND)
         return Response({
-            'total_jobs': OrderService.get_total_job_count(),
-            'total_categories': Category.objects.count()
+            'overall': overall,
+            'categories': [row for row in rows if row['category'] is not None],
         })
 
 
+class SavedSearchListCreateAPIView(generics.ListCreateAPIView):
+    serializer_class = SavedSearchSerializer
+    permission_classes = [permissions.IsAuthenticated, IsWorker]
+
+    def get_queryset(self):
+        return SavedSearchService.get_user_saved_searches(self.request.user)
+
+    def perform_create(self, serializer):
+        serializer.instance = SavedSearchService.create_saved_search(self.request.user, serializer.validated_data)
+
+
+class DeleteSavedSearchAPIView(APIView):
+    permission_classes = [permissions.IsAuthenticated, IsWorker]
+
+    def delete(self, request, pk):
+        if not SavedSearchService.delete_saved_search(request.user, pk):
+            return Response({'detail': 'Saved search not found'}, status=status.HTTP_404_NOT_FOUND)
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+
+class SavedSearchInboxAPIView(RowListMixin, generics.ListAPIView):
+    """Новые заказы по сохранённым поискам, свежие сверху; ?unread=1 — только непрочитанные."""
+    row_serializer_class = SavedSearchMatchRowSerializer
+    permission_classes = [permissions.IsAuthenticated, IsWorker]
+
+    def get_queryset(self):
+        return SavedSearchService.get_inbox(self.request.user, self.request.query_params.get('unread') == '1')
+
+
+class SavedSearchInboxReadAPIView(APIView):
+    permission_classes = [permissions.IsAuthenticated, IsWorker]
+
+    def post(self, request):
+        serializer = InboxReadSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        updated = SavedSearchService.mark_read(request.user, serializer.validated_data.get('ids'))
+        return Response({'updated': updated})
+
+
 class CategorySyncAPIView(APIView):
     permission_classes = [permissions.IsAdminUser]
 
+    def get(self, request):
+        category_ids = [int(pk) for pk in request.query_params.getlist('category') if pk.isdigit()]
+        drift = CategoryService.find_counter_drift(category_ids or None)
+        return Response({'in_sync': not drift, 'drift': drift})
+
     def post(self, request):
         CategoryService.sync_category_job_counts()
         return Response({'message': 'Category job counts synced successfully'})
 
+
+
+class MetricsAPIView(APIView):
+    """Метрики Prometheus (core.metrics). Если задан METRICS_TOKEN, нужен Bearer с ним."""
+    authentication_classes = []
+    permission_classes = [permissions.AllowAny]
+
+    def get(self, request):
+        token = settings.METRICS_TOKEN
+        if token and not hmac.compare_digest(request.headers.get('Authorization', ''), f'Bearer {token}'):
+            return Response({'detail': 'Invalid metrics token'}, status=status.HTTP_403_FORBIDDEN)
+        body, content_type = render_latest()
+        return HttpResponse(body, content_type=content_type)
+
+
+class ExportAPIView(APIView):
+    """
+    Полная выгрузка /api/v1/export/<orders|applications|reviews>.<csv|ndjson>
+    потоком (core.exports), с теми же правами, что у списков. ?order=<id>
+    сужает заявки и отзывы до одного заказа, ?archived=1 выгружает архив
+    заказов и заявок.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request, dataset, fmt):
+        order_id = request.query_params.get('order')
+        if order_id and not order_id.isdigit():
+            raise exceptions.ValidationError({'order': 'Must be an integer'})
+        archived = request.query_params.get('archived') == '1'
+        response = StreamingHttpResponse(
+            exports.iter_export(dataset, fmt, request.user, order_id, archived=archived),
+            content_type=exports.CONTENT_TYPES[fmt]
+        )
+        response['Content-Disposition'] = f'attachment; filename="{dataset}.{fmt}"'
+        return response
+
+
+class BatchAPIView(APIView):
+    """
+    Несколько запросов к /api/v1/ за один round trip (core.batch): токен
+    проверяется один раз, ответы подзапросов приходят в одном конверте.
+    """
+    permission_classes = [permissions.AllowAny]
+
+    def post(self, request):
+        serializer = BatchSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        content = batch.run_batch(
+            request._request, request.user, request.auth,
+            serializer.validated_data['requests'], serializer.validated_data['parallel'],
+        )
+        return HttpResponse(content, content_type='application/json')
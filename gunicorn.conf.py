@@ -0,0 +1,21 @@
+# gunicorn подхватывает этот файл из рабочей директории сам.
+import os
+import shutil
+
+# Метрики core.metrics в multiprocess-режиме: каждый воркер пишет свои
+# mmap-файлы, /api/v1/metrics суммирует их. Переменная должна быть задана
+# до импорта prometheus_client.
+os.environ.setdefault('PROMETHEUS_MULTIPROC_DIR', '/tmp/workify-prometheus')
+
+from prometheus_client import multiprocess  # noqa: E402
+
+
+def on_starting(server):
+    # файлы прошлого запуска дали бы старые счётчики
+    path = os.environ['PROMETHEUS_MULTIPROC_DIR']
+    shutil.rmtree(path, ignore_errors=True)
+    os.makedirs(path, exist_ok=True)
+
+
+def child_exit(server, worker):
+    multiprocess.mark_process_dead(worker.pid)
@@ -45,12 +45,16 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     'rest_framework',
     'core',
     'corsheaders',
 ]
 
 MIDDLEWARE = [
+    # первым, чтобы задержка включала остальные middleware
+    'core.middleware.MetricsMiddleware',
+    'core.db_router.ReplicaRoutingMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',
@@ -114,6 +118,20 @@ if os.environ.get('DATABASE_URL'):
         ssl_require=True
     )
 
+# Реплики только для чтения (core.db_router): DB_REPLICA_HOSTS=host1,host2,
+# остальные параметры как у default. В тестах реплики — зеркала default.
+DATABASE_REPLICAS = []
+for index, host in enumerate(filter(None, os.environ.get('DB_REPLICA_HOSTS', '').split(',')), start=1):
+    DATABASE_REPLICAS.append(f'replica{index}')
+    DATABASES[f'replica{index}'] = {**DATABASES['default'], 'HOST': host.strip(), 'TEST': {'MIRROR': 'default'}}
+# Зеркало default для тестов роутера (они подменяют DATABASE_REPLICAS на него).
+# В DATABASE_REPLICAS не входит, поэтому вне тестов запросы на него не идут.
+DATABASES['replica'] = {**DATABASES['default'], 'TEST': {'MIRROR': 'default'}}
+
+DATABASE_ROUTERS = ['core.db_router.ReplicaRouter']
+# Сколько секунд после изменяющего запроса пользователь читает с default (PrimaryReadPin)
+REPLICA_STICKY_SECONDS = float(os.environ.get('REPLICA_STICKY_SECONDS', 5))
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -160,15 +178,73 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES':(
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
-    )
+        'core.authentication.ClaimsJWTAuthentication',
+    ),
+    'DEFAULT_RENDERER_CLASSES': (
+        'core.renderers.ORJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ),
+    'DEFAULT_PARSER_CLASSES': (
+        'core.renderers.ORJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ),
+    'DEFAULT_PAGINATION_CLASS': 'core.pagination.KeysetPagination',
+    'PAGE_SIZE': int(os.environ.get('PAGE_SIZE', 20)),
 }
 
+# Верхняя граница для ?page_size= в списках
+MAX_PAGE_SIZE = int(os.environ.get('MAX_PAGE_SIZE', 100))
+# Больше строк ?stream=1 (RowListMixin) не отдаёт, а отвечает 400 со ссылкой на /export/
+STREAM_MAX_ROWS = int(os.environ.get('STREAM_MAX_ROWS', 10000))
+
+# Сколько секунд /api/v1/stats/ отдаётся из памяти процесса. Мутации в текущем
+# процессе сбрасывают кэш сразу, остальные воркеры догоняют не позже TTL.
+STATS_CACHE_TTL = float(os.environ.get('STATS_CACHE_TTL', 10))
+
+# Под ASGI (workify/asgi.py) списки заказов, категорий, отзывов и статистика
+# обслуживаются async-представлениями из core.async_views
+ASYNC_READ_VIEWS = os.environ.get('ASYNC_READ_VIEWS', 'False') == 'True'
+# Сколько async-запросов одного процесса одновременно держат соединение с БД
+ASYNC_DB_CONCURRENCY = int(os.environ.get('ASYNC_DB_CONCURRENCY', 10))
+
+# SSE /api/v1/events/ (core.events): пинг простаивающего потока и сколько
+# непрочитанных событий держим на соединение, прежде чем закрыть его с resync
+SSE_HEARTBEAT_SECONDS = float(os.environ.get('SSE_HEARTBEAT_SECONDS', 15))
+SSE_QUEUE_SIZE = int(os.environ.get('SSE_QUEUE_SIZE', 100))
+
+# Если задан, /api/v1/metrics требует заголовок Authorization: Bearer <METRICS_TOKEN>
+METRICS_TOKEN = os.environ.get('METRICS_TOKEN', '')
+
+# Максимум строк в одном запросе /api/v1/orders/bulk/ (core.importers)
+BULK_ORDER_MAX_ROWS = int(os.environ.get('BULK_ORDER_MAX_ROWS', 10000))
+
+# Через сколько дней после закрытия заказ уезжает в архив (manage.py archive_orders)
+ARCHIVE_AFTER_DAYS = int(os.environ.get('ARCHIVE_AFTER_DAYS', 180))
+
+# Сколько отзывов нужно воркеру, чтобы попасть в /api/v1/workers/leaderboard/
+LEADERBOARD_MIN_REVIEWS = int(os.environ.get('LEADERBOARD_MIN_REVIEWS', 3))
+
+# Рекомендации заказов (core.recommendations): как часто дочитывать открытые
+# заказы, когда перечитывать их целиком и сколько хранить признаки воркера
+RECOMMENDATIONS_REFRESH_INTERVAL = float(os.environ.get('RECOMMENDATIONS_REFRESH_INTERVAL', 2))
+RECOMMENDATIONS_FULL_RELOAD = float(os.environ.get('RECOMMENDATIONS_FULL_RELOAD', 600))
+RECOMMENDATIONS_FEATURES_TTL = float(os.environ.get('RECOMMENDATIONS_FEATURES_TTL', 60))
+RECOMMENDATIONS_FEATURES_CACHE_SIZE = int(os.environ.get('RECOMMENDATIONS_FEATURES_CACHE_SIZE', 10000))
+
+# Сколько сохранённых поисков может завести один воркер
+SAVED_SEARCHES_PER_USER = int(os.environ.get('SAVED_SEARCHES_PER_USER', 20))
+
+# /api/v1/batch/: сколько подзапросов в пакете и в сколько потоков их читать
+BATCH_MAX_REQUESTS = int(os.environ.get('BATCH_MAX_REQUESTS', 20))
+BATCH_MAX_WORKERS = int(os.environ.get('BATCH_MAX_WORKERS', 4))
+
 from datetime import timedelta
 
 SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(minutes=60),
     'REFRESH_TOKEN_LIFETIME': timedelta(days=30),
+    'TOKEN_OBTAIN_SERIALIZER': 'core.serializers.WorkifyTokenObtainPairSerializer',
 }
 
 # Database configuration for Render/Railway